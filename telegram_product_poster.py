@@ -14,30 +14,2355 @@ Features:
 Created for educational and sharing purposes.
 """
 
+import time
+_PROCESS_START = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
+from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 import os
 import json
 import threading
 import logging
-from datetime import datetime
-import time
-import requests
-
-# Setup logging with UTF-8 encoding
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('telegram_product_poster.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+import logging.handlers
+import gzip
+import shutil
+import queue
+import atexit
+import sys
+import hashlib
+import importlib
+import argparse
+import base64
+import random
+import re
+import sqlite3
+import socket
+import urllib.parse
+import pathlib
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access.
+
+    pandas and requests dominate cold start, so they are only imported once
+    a catalog is loaded or the Bot API is called.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+pd = _LazyModule('pandas')
+np = _LazyModule('numpy')
+requests = _LazyModule('requests')
+
+# Log files - rotated by size and daily, older files gzip-compressed
+LOG_FILE = 'telegram_product_poster.log'
+LOG_JSON_FILE = 'telegram_product_poster.jsonl'
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+LOG_ROTATE_INTERVAL = 24 * 60 * 60
+
+# How often queued log lines are added to the logs tab (milliseconds)
+LOG_UI_INTERVAL = 200
+
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that also rolls over on age and gzips old files"""
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                 interval=LOG_ROTATE_INTERVAL):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at and self.stream and self.stream.tell():
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging():
+    """Send log records through a queue to a background thread that writes the files.
+
+    Logging calls only enqueue the record, so file I/O never blocks posting.
+    Returns the started QueueListener.
+    """
+    text_handler = CompressedRotatingFileHandler(LOG_FILE)
+    text_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    json_handler = CompressedRotatingFileHandler(LOG_JSON_FILE)
+    json_handler.setFormatter(JsonLineFormatter())
+    # Consoles that can't show emojis escape them instead of failing
+    if hasattr(sys.stderr, 'reconfigure'):
+        sys.stderr.reconfigure(errors='backslashreplace')
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(text_handler.formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, text_handler, json_handler, console_handler)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+# Columns the app adds to every catalog (never offered as template placeholders)
+TRACKING_COLUMNS = ['posted_date', 'posted_status', 'channel_status']
+
+# Compact status enum - 'posted_status' is stored as a categorical of these values
+# ('partial' = delivered to some channels; the rest are retried next session)
+POSTED_STATUSES = ['pending', 'posted', 'partial', 'failed']
+
+# Columns recording where each row came from when several sheets/workbooks are loaded
+SOURCE_COLUMNS = ['source_file', 'source_sheet']
+
+# Retry with exponential backoff (full jitter) for transient Bot API failures
+SEND_MAX_ATTEMPTS = 4
+SEND_BACKOFF_BASE = 1.0
+SEND_BACKOFF_MAX = 30.0
+
+# (connect, read) timeouts - an unreachable host fails fast instead of after 30s
+SEND_TIMEOUT = (5, 30)
+
+# A send that timed out may still have posted; the message ids after the last
+# known one in the channel are probed for it before the send is retried
+RECONCILE_PROBES = 10
+# Sessions an unconfirmed send is checked in before it is given up on and sent again
+RECONCILE_MAX_CHECKS = 3
+
+# Bot API length limits (counted in UTF-16 code units, like Telegram does)
+TELEGRAM_TEXT_LIMIT = 4096
+TELEGRAM_CAPTION_LIMIT = 1024
+
+# deleteMessages accepts at most this many message ids per call
+DELETE_BATCH_SIZE = 100
+
+# Channel checks (getChat/getChatMember) are reused for this long, in seconds
+CHANNEL_CHECK_TTL = 6 * 60 * 60
+# ...but a failed check only this long, so a fixed channel is picked up soon
+CHANNEL_CHECK_FAILED_TTL = 5 * 60
+CHANNEL_CHECK_WORKERS = 8
+
+# Image URL checks before sendPhoto (Telegram fetches photos up to 5 MB from URLs)
+IMAGE_MAX_BYTES = 5 * 1024 * 1024
+IMAGE_CHECK_TTL = 60 * 60
+IMAGE_CHECK_WORKERS = 16
+IMAGE_CHECK_TIMEOUT = (3, 10)
+
+# Image thumbnails for previews: decoded ones kept in memory (LRU), the small
+# files on disk so images aren't downloaded or decoded again between runs
+THUMBNAIL_CACHE_DIR = 'thumbnail_cache'
+THUMBNAIL_SIZE = 160
+THUMBNAIL_MEMORY_ITEMS = 500
+THUMBNAIL_DISK_ITEMS = 5000    # least recently shown files beyond this are deleted
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_PREFETCH_DELAY = 200  # ms of scrolling quiet before visible rows are fetched
+
+# Continuous posting reads eligible rows in chunks of this size and checks
+# the Excel file for new rows this often (seconds) once the backlog is empty
+STREAM_CHUNK_SIZE = 50
+CATALOG_WATCH_INTERVAL = 15
+# Seconds a reload waits for the Tk thread to put the new catalog in place
+CATALOG_INSTALL_TIMEOUT = 60
+
+# Posting pipeline: items each stage may hold ahead of the next one, and the
+# default number of threads per stage (overridable with 'pipeline_workers')
+PIPELINE_QUEUE_SIZE = 4
+# The send stage always has one thread: posts share pacing, circuit breakers and row writes
+PIPELINE_WORKERS = {'render': 2, 'media': 8}
+
+# Digest channels ("@channel | template | digest [minutes]") get one message
+# with several products this often (minutes) unless their line says otherwise
+DIGEST_INTERVAL = 60
+
+# copyMessages accepts at most this many message ids per call
+COPY_BATCH_SIZE = 100
+
+# Shared job store: a node holds claimed products for this long (seconds),
+# renewing the lease while it works; expired leases are claimed by other nodes
+JOB_LEASE_SECONDS = 300
+JOB_CLAIM_BATCH = 5
+
+# Catalog loads in the background report the rows parsed every this many rows
+LOAD_PROGRESS_ROWS = 5000
+
+# Catalog sources given as http(s) URLs are downloaded into this directory and
+# re-checked with conditional requests at most this often (seconds) while watching
+FEED_CACHE_DIR = 'catalog_cache'
+FEED_POLL_INTERVAL = 5 * 60
+FEED_WORKERS = 8
+FEED_TIMEOUT = (10, 60)
+FEED_CHUNK_SIZE = 1024 * 1024
+
+# Permanent errors that mean the channel itself is unusable (not just this product)
+CHANNEL_ERROR_MARKERS = (
+    'chat not found', 'bot was kicked', 'bot is not a member', 'not enough rights',
+    'need administrator rights', 'have no rights', 'chat_write_forbidden',
+    'bot was blocked', 'chat_admin_required', 'channel_private',
+)
+
+# Template used by channels that don't name one ("@channel | name" picks another)
+DEFAULT_TEMPLATE_NAME = 'default'
+
+# Rendered messages kept in memory, shared by channels, sessions and previews
+RENDER_CACHE_SIZE = 4096
+
+# Text columns with fewer distinct values than this share of rows become categoricals
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def _has_pyarrow():
+    """Check whether pyarrow is available for Arrow-backed string columns"""
+    import importlib.util
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def compact_products_df(df):
+    """Shrink the in-memory catalog without changing how any value renders.
+
+    - 'posted_status' becomes a categorical status enum
+    - low-cardinality text columns become categoricals
+    - remaining text columns become Arrow-backed strings (when pyarrow is installed)
+    - integer columns are downcast, float columns only when the downcast is lossless
+    """
+    string_dtype = 'string[pyarrow]' if _has_pyarrow() else None
+    rows = len(df)
+
+    for col in df.columns:
+        series = df[col]
+
+        if col == 'posted_status':
+            statuses = series.fillna('pending').astype(str).replace('', 'pending')
+            extra = sorted(set(statuses.unique()) - set(POSTED_STATUSES))
+            df[col] = pd.Categorical(statuses, categories=POSTED_STATUSES + extra)
+            continue
+
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+            continue
+
+        if pd.api.types.is_float_dtype(series):
+            downcast = series.astype('float32')
+            # Keep float64 where float32 would change the printed price (e.g. 19.99)
+            if (downcast.astype('float64') == series)[series.notna()].all():
+                df[col] = downcast
+            continue
+
+        # Only columns that hold nothing but text - mixed cells keep their Excel types
+        if series.dtype == object:
+            is_text = pd.api.types.infer_dtype(series, skipna=True) == 'string'
+        else:
+            is_text = pd.api.types.is_string_dtype(series)
+        if not is_text:
+            continue
+
+        if col not in TRACKING_COLUMNS and rows and series.nunique() <= rows * CATEGORICAL_MAX_RATIO:
+            df[col] = series.astype('category')
+        elif string_dtype:
+            df[col] = series.astype(string_dtype)
+
+    return df
+
+
+# Profile reports (text report, .prof for pstats/snakeviz, .folded for flame graphs)
+PROFILE_DIR = 'profiles'
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# Pipeline stages of the profile report and the functions whose cumulative time they cover
+PROFILE_STAGES = (
+    ('Excel loading', ('refresh_excel_data',)),
+    ('Rendering', ('format_product_message',)),
+    ('Sending', ('send_message_to_channel',)),
+    ('UI updates', ('update_status', 'update_action', 'update_progress', 'log_message')),
 )
 
+
+class SessionProfiler:
+    """Profile one worker session with cProfile and tracemalloc, optionally sampling stacks.
+
+    start() and stop() must be called on the thread that runs the session;
+    functions it hands to other threads (pipeline stages) are profiled
+    through wrap() and merged into the same report. cProfile and tracemalloc
+    are process-wide, so only one session is profiled at a time.
+    """
+
+    active = threading.Lock()
+
+    def __init__(self, name, flame_graph=False):
+        import cProfile
+        self.name = name
+        self.flame_graph = flame_graph
+        self.profile = cProfile.Profile()
+        self.thread_profiles = []
+        self.thread_ids = set()
+        self.lock = threading.Lock()
+        self.running = False
+        self.samples = Counter()
+        self.sampling = False
+        self.started = self.elapsed = 0.0
+        self.snapshot = None
+        self.peak_memory = 0
+
+    def start(self):
+        """Start profiling, or return False if another session is being profiled"""
+        import tracemalloc
+        if not SessionProfiler.active.acquire(blocking=False):
+            return False
+        tracemalloc.start()
+        self.thread_ids = {threading.get_ident()}
+        self.running = True
+        if self.flame_graph:
+            self.sampling = True
+            sampler = threading.Thread(target=self._sample)
+            sampler.daemon = True
+            sampler.start()
+        self.started = time.perf_counter()
+        self.profile.enable()
+        return True
+
+    def stop(self):
+        import tracemalloc
+        self.profile.disable()
+        self.running = False
+        self.elapsed = time.perf_counter() - self.started
+        self.sampling = False
+        try:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            SessionProfiler.active.release()
+
+    def wrap(self, fn):
+        """Return fn profiled on whichever thread calls it, with one profile per thread"""
+        import cProfile
+        local = threading.local()
+
+        def run(*args):
+            if not self.running:
+                return fn(*args)
+            profile = getattr(local, 'profile', None)
+            if profile is None:
+                profile = local.profile = cProfile.Profile()
+                with self.lock:
+                    self.thread_profiles.append(profile)
+                    self.thread_ids.add(threading.get_ident())
+            return profile.runcall(fn, *args)
+        return run
+
+    def stats(self, stream=None):
+        """Return the session's statistics, merged over every profiled thread"""
+        import pstats
+        stats = pstats.Stats(self.profile, stream=stream)
+        with self.lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        return stats
+
+    def _sample(self):
+        """Count the profiled threads' call stacks in folded form ("outer;inner")"""
+        while self.sampling:
+            frames = sys._current_frames()
+            with self.lock:
+                thread_ids = list(self.thread_ids)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.samples[';'.join(reversed(stack))] += 1
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+
+    def stage_times(self):
+        """Return (stage, seconds, calls) for each pipeline stage"""
+        stats = self.stats().stats
+        module = os.path.basename(__file__)
+        stages = []
+        for stage, functions in PROFILE_STAGES:
+            seconds = calls = 0
+            for (filename, _, function), (_, ncalls, _, cumulative, _) in stats.items():
+                if function in functions and os.path.basename(filename) == module:
+                    seconds += cumulative
+                    calls += ncalls
+            stages.append((stage, seconds, calls))
+        return stages
+
+    def write_report(self, directory=PROFILE_DIR):
+        """Write the report files and return the path of the text report"""
+        import io
+        import tracemalloc
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.stats().dump_stats(base + '.prof')
+        
+        lines = [f"Profile of {self.name} session - {self.elapsed:.2f} s wall time, "
+                 f"peak traced memory {self.peak_memory / 1024 / 1024:.1f} MB", "",
+                 "Time by pipeline stage (cumulative; a stage includes stages it calls):"]
+        for stage, seconds, calls in self.stage_times():
+            share = seconds / self.elapsed if self.elapsed else 0
+            lines.append(f"  {stage:<15} {seconds:>9.3f} s {share:>7.1%} {calls:>9} calls")
+            
+        stream = io.StringIO()
+        self.stats(stream).sort_stats('cumulative').print_stats(30)
+        lines += ["", "Top functions by cumulative time:", stream.getvalue()]
+        
+        lines.append("Top allocations still held at the end of the session:")
+        traces = self.snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                              tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')])
+        for stat in traces.statistics('lineno')[:20]:
+            lines.append(f"  {stat.size / 1024:>10.1f} KB {stat.count:>8} blocks  {stat.traceback}")
+            
+        if self.flame_graph:
+            with open(base + '.folded', 'w', encoding='utf-8') as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in self.samples.items())
+            lines += ["", f"Flame graph stacks: {base}.folded (flamegraph.pl or speedscope)"]
+            
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return base + '.txt'
+
+
+class StartupTimeline:
+    """Record named startup milestones relative to process start"""
+
+    def __init__(self):
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - _PROCESS_START))
+
+    def summary(self):
+        return " | ".join(f"{name}: {elapsed * 1000:.0f} ms" for name, elapsed in self.marks)
+
+
+def list_sheet_names(path):
+    """Return the sheet names of a workbook (empty list if they can't be read)"""
+    try:
+        with pd.ExcelFile(path) as workbook:
+            return [str(name) for name in workbook.sheet_names]
+    except Exception:
+        return []
+
+
+class CatalogLoadCancelled(Exception):
+    """Raised by a load's progress callback to stop reading the catalog"""
+
+
+def read_xlsx_sheet(path, sheet, progress):
+    """Read an .xlsx sheet row by row, calling progress(rows read) as it goes.
+
+    Cells are converted and parsed the way pd.read_excel does it, so the
+    result is the same; progress may raise to abandon the read.
+    """
+    import openpyxl
+    from pandas.io.parsers import TextParser
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if isinstance(sheet, str) else workbook.worksheets[sheet]
+        rows = []
+        for row in worksheet.iter_rows(values_only=True):
+            # Like pandas' openpyxl reader: empty cells are "", whole floats are ints
+            rows.append(["" if value is None else int(value) if isinstance(value, float) and value.is_integer()
+                         else value for value in row])
+            if len(rows) % LOAD_PROGRESS_ROWS == 0:
+                progress(len(rows))
+    finally:
+        workbook.close()
+    while rows and all(value == "" for value in rows[-1]):
+        rows.pop()
+    # Rows are only as long as their last cell when the file has no <dimension>; pad them like pandas
+    width = max(map(len, rows), default=0)
+    for row in rows:
+        row.extend([""] * (width - len(row)))
+    progress(max(len(rows) - 1, 0))
+    return TextParser(rows, header=0).read() if rows else pd.DataFrame()
+
+
+def read_catalog_sheet(path, sheet=0, progress=None):
+    """Read one catalog sheet with stripped headers and without all-empty columns.
+
+    Module-level (not a method) so it can run in a worker process. With a
+    progress callback, .xlsx sheets are streamed so it sees the rows parsed.
+    """
+    if progress is not None and path.lower().endswith('.xlsx'):
+        df = read_xlsx_sheet(path, sheet, progress)
+    elif path.lower().endswith('.csv'):
+        df = pd.read_csv(path)
+    elif path.lower().endswith('.xls'):
+        # Try xlrd first, then pyexcel, then raise error
+        try:
+            df = pd.read_excel(path, sheet_name=sheet, header=0, engine='xlrd')
+        except Exception as e1:
+            try:
+                import pyexcel as pe
+                kwargs = {'sheet_name': sheet} if isinstance(sheet, str) else {}
+                df = pd.DataFrame(list(pe.get_records(file_name=path, **kwargs)))
+            except Exception as e2:
+                raise ValueError("Could not read .xls file. Please convert it to .xlsx or install the required "
+                                 "engines (xlrd < 2.0.0, pyexcel, pyexcel-xls).\n\n"
+                                 "Error details: {} | {}".format(e1, e2))
+    else:
+        df = pd.read_excel(path, sheet_name=sheet, header=0)
+
+    # PRESERVE EXACT ORIGINAL HEADERS - only strip whitespace, no renaming
+    df.columns = [str(col).strip() for col in df.columns]
+    return df.dropna(axis=1, how='all')
+
+
+def read_catalog_sheets(jobs, progress=None):
+    """Read (path, sheet) jobs in parallel worker processes, keeping their order.
+
+    progress(rows), if given, is called with the rows of the sheets read so far
+    (and, with a single sheet, while it is read); it may raise to stop the load.
+    """
+    if len(jobs) == 1:
+        return [read_catalog_sheet(*jobs[0], progress=progress)]
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    pool = ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1))
+    try:
+        futures = [pool.submit(read_catalog_sheet, path, sheet) for path, sheet in jobs]
+        running = set(futures)
+        while running:
+            _, running = wait(running, timeout=LOG_UI_INTERVAL / 1000, return_when=FIRST_COMPLETED)
+            if progress is not None:
+                progress(sum(len(future.result()) for future in futures if future.done()))
+        return [future.result() for future in futures]
+    finally:
+        # Sheets not started yet are dropped when the load is stopped
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def write_catalog_sheets(path, sheets):
+    """Write {sheet name: DataFrame} back into a workbook without dropping its other sheets"""
+    if (os.path.exists(path) and path.lower().endswith('.xlsx')
+            and all(isinstance(name, str) for name in sheets)):
+        with pd.ExcelWriter(path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            for name, frame in sheets.items():
+                frame.to_excel(writer, sheet_name=name, index=False)
+    else:
+        # Sheet names unknown (e.g. .xls read through pyexcel) - rewrite the file
+        next(iter(sheets.values())).to_excel(path, index=False)
+
+
+def is_remote_source(path):
+    """Return True for catalog sources given as http(s) URLs"""
+    return str(path).strip().lower().startswith(('http://', 'https://'))
+
+
+class FeedCache:
+    """Local copies of remote catalog feeds, refreshed with conditional GET requests.
+
+    Each copy keeps the feed's ETag/Last-Modified in a .json file beside it, so an
+    unchanged feed costs a single 304 response. A changed feed is streamed to a
+    temporary file and swapped in atomically; its 'version' (a content hash)
+    only changes when the content does. Posting status of feed rows is kept in
+    a .status.json file, as a feed can't be written back to.
+    """
+
+    def __init__(self, directory=FEED_CACHE_DIR):
+        self.directory = directory
+        self.urls = {}
+        self.lock = threading.Lock()
+
+    def local_path(self, url):
+        """Return the cache file of a feed URL, keeping its .xlsx/.xls/.csv extension"""
+        ext = os.path.splitext(urllib.parse.urlparse(url).path)[1].lower()
+        if ext not in ('.xlsx', '.xls', '.csv'):
+            ext = '.xlsx'
+        path = os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + ext)
+        with self.lock:
+            self.urls[path] = url
+        return path
+
+    def read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_json(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path + '.part', path)
+
+    def version(self, path):
+        """Return the content version of a cached feed (None if it was never downloaded)"""
+        return self.read_json(path + '.json').get('version')
+
+    def fetch_all(self, urls, max_age=0):
+        """Fetch feeds in parallel; returns {url: {'path', 'changed', 'error'}}"""
+        from concurrent.futures import ThreadPoolExecutor
+        workers = min(FEED_WORKERS, len(urls)) or 1
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with session, ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(urls, pool.map(lambda url: self.fetch(session, url, max_age), urls)))
+
+    def fetch(self, session, url, max_age=0):
+        """Download a feed unless the server says it is unchanged (or it was checked within max_age)"""
+        path = self.local_path(url)
+        meta = self.read_json(path + '.json')
+        result = {'path': path, 'changed': False, 'error': None}
+        have_copy = os.path.exists(path) and meta.get('version')
+        if have_copy and time.time() - meta.get('checked_at', 0) < max_age:
+            return result
+            
+        headers = {}
+        if have_copy and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if have_copy and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=FEED_TIMEOUT) as response:
+                if response.status_code != 304:
+                    response.raise_for_status()
+                    os.makedirs(self.directory, exist_ok=True)
+                    digest = hashlib.sha256()
+                    with open(path + '.part', 'wb') as f:
+                        for block in response.iter_content(chunk_size=FEED_CHUNK_SIZE):
+                            digest.update(block)
+                            f.write(block)
+                    os.replace(path + '.part', path)
+                    result['changed'] = digest.hexdigest() != meta.get('version')
+                    meta.update(version=digest.hexdigest(), etag=response.headers.get('ETag'),
+                                last_modified=response.headers.get('Last-Modified'))
+        except (requests.exceptions.RequestException, OSError) as e:
+            result['error'] = str(e)
+            return result
+        meta.update(url=url, checked_at=time.time())
+        self.write_json(path + '.json', meta)
+        return result
+
+    def load_status(self, path):
+        """Return the saved {product key: tracking values} of a feed's rows"""
+        return self.read_json(path + '.status.json')
+
+    def save_status(self, path, status):
+        self.write_json(path + '.status.json', status)
+
+
+def telegram_length(text):
+    """Return the length of text as Telegram counts it (UTF-16 code units)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def split_telegram_text(text, limit):
+    """Split text into chunks within limit, preferring line, then word boundaries"""
+    chunks = []
+    current = ""
+    for line in text.split('\n'):
+        candidate = f"{current}\n{line}" if current else line
+        if telegram_length(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        # A single line longer than the limit is cut at the last space that fits
+        while telegram_length(line) > limit:
+            cut, used = 0, 0
+            for i, char in enumerate(line):
+                used += 2 if ord(char) > 0xFFFF else 1
+                if used > limit:
+                    break
+                cut = i + 1
+            space = line.rfind(' ', 0, cut)
+            cut = space if space > 0 else cut
+            chunks.append(line[:cut].rstrip())
+            line = line[cut:].lstrip()
+        current = line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def plan_telegram_post(message, photo=None, auto_split=False):
+    """Validate a rendered post offline and turn it into Bot API calls.
+
+    Returns (parts, problems): parts is a list of (method, data) without
+    chat_id; problems is a list of (severity, text) where any 'error' means
+    Telegram would reject the post. With auto_split, over-long captions and
+    texts are split into a photo plus follow-up messages instead.
+    """
+    problems = []
+    if not message.strip():
+        problems.append(('error', "message is empty"))
+    if message.startswith("Error formatting message"):
+        problems.append(('error', message))
+    for missing in re.findall(r'\[Missing: ([^\]]+)\]', message):
+        problems.append(('error', f"template placeholder {{{missing}}} has no matching column"))
+
+    length = telegram_length(message)
+    if photo:
+        if length <= TELEGRAM_CAPTION_LIMIT:
+            return [('sendPhoto', {'photo': photo, 'caption': message})], problems
+        if not auto_split:
+            problems.append(('error', f"caption is {length} characters (limit {TELEGRAM_CAPTION_LIMIT})"))
+            return [('sendPhoto', {'photo': photo, 'caption': message})], problems
+        caption = split_telegram_text(message, TELEGRAM_CAPTION_LIMIT)[0]
+        rest = split_telegram_text(message[len(caption):].strip(), TELEGRAM_TEXT_LIMIT)
+        problems.append(('warning', f"caption of {length} characters split into photo + {len(rest)} message(s)"))
+        return [('sendPhoto', {'photo': photo, 'caption': caption})] + \
+               [('sendMessage', {'text': chunk}) for chunk in rest], problems
+
+    if length <= TELEGRAM_TEXT_LIMIT:
+        return [('sendMessage', {'text': message})], problems
+    if not auto_split:
+        problems.append(('error', f"text is {length} characters (limit {TELEGRAM_TEXT_LIMIT})"))
+        return [('sendMessage', {'text': message})], problems
+    chunks = split_telegram_text(message, TELEGRAM_TEXT_LIMIT)
+    problems.append(('warning', f"text of {length} characters split into {len(chunks)} messages"))
+    return [('sendMessage', {'text': chunk}) for chunk in chunks], problems
+
+
+def pack_digest(header, entries, limit=TELEGRAM_TEXT_LIMIT):
+    """Pack a digest header and product entries into as few messages as the length limit allows.
+
+    Entries are kept whole unless a single entry is longer than a message.
+    """
+    messages = []
+    current = header.strip()
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        candidate = f"{current}\n\n{entry}" if current else entry
+        if telegram_length(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            messages.append(current)
+        pieces = split_telegram_text(entry, limit)
+        messages.extend(pieces[:-1])
+        current = pieces[-1]
+    if current:
+        messages.append(current)
+    return messages
+
+
+def parse_channel_status(text):
+    """Parse a 'channel_status' cell ("@a: posted; @b: failed (reason)") into a dict"""
+    statuses = {}
+    if not isinstance(text, str):
+        return statuses
+    for part in text.split(';'):
+        channel, _, status = part.partition(':')
+        if channel.strip() and status.strip():
+            statuses[channel.strip()] = status.strip()
+    return statuses
+
+
+def format_channel_status(statuses):
+    """Format a channel -> status dict for the 'channel_status' column"""
+    return '; '.join(f"{channel}: {str(status).replace(';', ',')}" for channel, status in statuses.items())
+
+
+def parse_channel_line(line):
+    """Split a target channel line ("@channel", "@channel | template" or
+    "@channel | template | digest [minutes]") into (channel, template, digest minutes or None)"""
+    channel, template, schedule = (line.split('|') + ['', ''])[:3]
+    digest = None
+    words = schedule.split()
+    if words and words[0].lower() == 'digest':
+        digest = int(words[1]) if len(words) > 1 and words[1].isdigit() else DIGEST_INTERVAL
+    return channel.strip(), template.strip() or DEFAULT_TEMPLATE_NAME, digest
+
+
+def row_digest(product_row):
+    """Hash a product row's columns and values, so equal rows render the same.
+
+    The tracking columns are left out: posting a product changes them, but
+    not what its templates render.
+    """
+    payload = repr(tuple((column, value) for column, value in zip(product_row.index, product_row.values)
+                         if column not in TRACKING_COLUMNS))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+def cell_text(value):
+    """Return a catalog cell as stripped text ("" for empty, NaN, NaT and NA cells)"""
+    try:
+        if value is None or value != value:
+            return ""
+    except TypeError:
+        # pd.NA refuses to be used as a boolean
+        return ""
+    text = str(value).strip()
+    return "" if text in ('nan', 'NaN') else text
+
+
+class ProductRow:
+    """Lightweight read-only catalog row: a tuple of values and a column -> position map.
+
+    Supports the parts of the pandas Series API the posting code uses (get,
+    [], in, index, values) without building a Series per row.
+    """
+
+    __slots__ = ('values', 'positions')
+
+    def __init__(self, values, positions):
+        self.values = values
+        self.positions = positions
+
+    @property
+    def index(self):
+        return tuple(self.positions)
+
+    def __getitem__(self, column):
+        return self.values[self.positions[column]]
+
+    def __contains__(self, column):
+        return column in self.positions
+
+    def get(self, column, default=None):
+        position = self.positions.get(column)
+        return default if position is None else self.values[position]
+
+    def items(self):
+        return zip(self.positions, self.values)
+
+
+def product_rows(df, positions=None):
+    """Return (index, ProductRow) pairs for a DataFrame's rows (or the rows at positions) in one pass"""
+    if positions is not None:
+        df = df.iloc[positions]
+    column_positions = {column: i for i, column in enumerate(df.columns)}
+    return [(index, ProductRow(values, column_positions))
+            for index, values in zip(df.index, df.itertuples(index=False, name=None))]
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered messages keyed by (template version, row hash, timestamp)"""
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """Return the cached message for key, calling render() on a miss"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        message = render()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = message
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return message
+
+
+class TelegramAPIError(Exception):
+    """A failed Bot API call, classified as transient (retry) or permanent"""
+
+    def __init__(self, description, error_code=None, retry_after=None, unknown=False):
+        super().__init__(description)
+        self.description = description
+        self.error_code = error_code
+        self.retry_after = retry_after
+        # The request may have reached Telegram (e.g. a read timeout), so it may have taken effect
+        self.unknown = unknown
+
+    @property
+    def transient(self):
+        """Network errors, timeouts, flood limits (429) and server errors (5xx)"""
+        return self.error_code is None or self.error_code == 429 or self.error_code >= 500
+
+    @property
+    def channel_error(self):
+        """Permanent errors caused by the channel (missing, bot kicked, no rights)"""
+        description = self.description.lower()
+        return not self.transient and any(marker in description for marker in CHANNEL_ERROR_MARKERS)
+
+
+class TelegramBotClient:
+    """Minimal Bot API client: returns the call's result or raises TelegramAPIError.
+
+    `api_url` points it at another Bot API server, e.g. a self-hosted
+    telegram-bot-api or a local stand-in for tests. Product images given as
+    paths on disk are uploaded; with `local` (a server started with --local,
+    on the same machine) they are passed by path instead, without its
+    upload limits.
+    """
+
+    API_URL = "https://api.telegram.org"
+
+    def __init__(self, bot_token, timeout=SEND_TIMEOUT, api_url=None, local=False):
+        self.bot_token = bot_token
+        self.timeout = timeout
+        self.api_url = (api_url or self.API_URL).rstrip('/')
+        self.local = local
+
+    def call(self, method, data=None, files=None, timeout=None):
+        url = f"{self.api_url}/bot{self.bot_token}/{method}"
+        data, uploads = self.attach_local_files(data)
+        try:
+            response = requests.post(url, data=data, files=dict(files or {}, **uploads) or None,
+                                     timeout=timeout or self.timeout)
+        except requests.exceptions.RequestException as e:
+            # Failing to connect means nothing was sent; a read timeout or a dropped
+            # connection may come after Telegram already carried out the call
+            from urllib3.exceptions import ConnectTimeoutError
+            reason = getattr(e.args[0], 'reason', None) if e.args else None
+            unknown = not isinstance(e, requests.exceptions.ConnectTimeout) and not isinstance(reason, ConnectTimeoutError)
+            raise TelegramAPIError(f"{type(e).__name__}: {e}", unknown=unknown)
+        finally:
+            for upload in uploads.values():
+                upload.close()
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.status_code == 200 and payload.get('ok'):
+            return payload.get('result')
+
+        raise TelegramAPIError(payload.get('description', f'HTTP {response.status_code}'),
+                               error_code=payload.get('error_code', response.status_code),
+                               retry_after=(payload.get('parameters') or {}).get('retry_after'))
+
+    def attach_local_files(self, data):
+        """Return the call's data and files to upload, with a photo on disk as a file:// URI or an upload"""
+        uploads = {}
+        photo = (data or {}).get('photo')
+        if isinstance(photo, str) and not re.match(r'[a-z]+://', photo) and os.path.isfile(photo):
+            data = dict(data)
+            if self.local:
+                data['photo'] = pathlib.Path(os.path.abspath(photo)).as_uri()
+            else:
+                del data['photo']
+                uploads['photo'] = open(photo, 'rb')
+        return data, uploads
+
+
+class ChannelPreflight:
+    """Check target channels in parallel with getChat/getChatMember, caching results with a TTL.
+
+    Each result holds the numeric chat id, title and type, whether the bot can
+    post ('ok', else 'problem') and whether it can delete messages. Failed
+    checks expire after failed_ttl, so a channel fixed by its admin (bot added
+    or given the right) isn't skipped for hours.
+    """
+
+    def __init__(self, ttl=CHANNEL_CHECK_TTL, failed_ttl=CHANNEL_CHECK_FAILED_TTL):
+        self.ttl = ttl
+        self.failed_ttl = failed_ttl
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def cached(self, client, channel):
+        """Return the unexpired result for a channel, or None"""
+        with self.lock:
+            result = self.results.get((client.bot_token, channel))
+        if result and time.time() - result['checked_at'] < (self.ttl if result['ok'] else self.failed_ttl):
+            return result
+        return None
+
+    def check_all(self, client, channels, refresh=False):
+        """Return a result per channel, checking channels without a cached result in parallel"""
+        from concurrent.futures import ThreadPoolExecutor
+        results = {} if refresh else {c: r for c in channels if (r := self.cached(client, c))}
+        missing = [channel for channel in channels if channel not in results]
+        if missing:
+            bot_id = client.call('getMe')['id']
+            with ThreadPoolExecutor(max_workers=min(CHANNEL_CHECK_WORKERS, len(missing))) as pool:
+                for result in pool.map(lambda channel: self.check(client, bot_id, channel), missing):
+                    results[result['channel']] = result
+                    # Network trouble says nothing about the channel, so don't remember it
+                    if not result.get('transient'):
+                        with self.lock:
+                            self.results[(client.bot_token, result['channel'])] = result
+        return {channel: results[channel] for channel in channels}
+
+    def check(self, client, bot_id, channel):
+        """Resolve one channel and check the bot's rights in it"""
+        result = {'channel': channel, 'chat_id': channel, 'title': '', 'type': '', 'ok': False,
+                  'problem': '', 'can_delete': False, 'checked_at': time.time()}
+        try:
+            chat = client.call('getChat', {'chat_id': channel})
+            result.update(chat_id=chat['id'], title=chat.get('title') or chat.get('username') or '',
+                          type=chat.get('type', ''))
+            member = client.call('getChatMember', {'chat_id': chat['id'], 'user_id': bot_id})
+        except TelegramAPIError as e:
+            result.update(problem=e.description, transient=e.transient)
+            return result
+            
+        status = member.get('status')
+        if status == 'creator':
+            result.update(ok=True, can_delete=True)
+        elif status == 'administrator':
+            if result['type'] == 'channel' and not member.get('can_post_messages'):
+                result['problem'] = "bot is an administrator without the 'Post messages' right"
+            else:
+                result['ok'] = True
+            result['can_delete'] = bool(member.get('can_delete_messages'))
+        elif result['type'] == 'channel':
+            result['problem'] = "bot is not an administrator of the channel"
+        elif status in ('left', 'kicked'):
+            result['problem'] = f"bot is not a member of the chat ({status})"
+        elif status == 'restricted' and not member.get('can_send_messages'):
+            result['problem'] = "bot is not allowed to send messages"
+        else:
+            result['ok'] = True
+        return result
+
+
+class ImageURLChecker:
+    """Check image URLs in parallel (HEAD, falling back to a one-byte range GET), caching results with a TTL.
+
+    A result has 'ok' and, for bad images, a 'problem'. Connection errors,
+    timeouts, server errors (5xx) and rate limits (429) are reported but not
+    cached, so a passing outage is retried.
+    """
+
+    def __init__(self, ttl=IMAGE_CHECK_TTL):
+        self.ttl = ttl
+        self.results = {}
+        self.session = None
+        self.lock = threading.Lock()
+
+    def cached(self, url):
+        """Return the unexpired result for a URL, or None"""
+        with self.lock:
+            result = self.results.get(url)
+        if result and time.time() - result['checked_at'] < self.ttl:
+            return result
+        return None
+
+    def check_url(self, url):
+        """Return the result for one URL, checking it on a shared keep-alive session if not cached"""
+        result = self.cached(url)
+        if result is None:
+            with self.lock:
+                if self.session is None:
+                    self.session = requests.Session()
+            result = self.check(self.session, url)
+            if not result.get('transient'):
+                with self.lock:
+                    self.results[url] = result
+        return result
+
+    def check_all(self, urls):
+        """Return a result per URL, checking URLs without a cached result in parallel"""
+        from concurrent.futures import ThreadPoolExecutor
+        results = {url: result for url in urls if (result := self.cached(url))}
+        missing = [url for url in urls if url not in results]
+        if missing:
+            workers = min(IMAGE_CHECK_WORKERS, len(missing))
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            with session, ThreadPoolExecutor(max_workers=workers) as pool:
+                for url, result in zip(missing, pool.map(lambda url: self.check(session, url), missing)):
+                    results[url] = result
+                    if not result.get('transient'):
+                        with self.lock:
+                            self.results[url] = result
+        return results
+
+    def check(self, session, url):
+        """Check that a URL serves an image Telegram will accept"""
+        result = {'ok': False, 'problem': '', 'checked_at': time.time()}
+        try:
+            response = session.head(url, allow_redirects=True, timeout=IMAGE_CHECK_TIMEOUT)
+            size = response.headers.get('Content-Length')
+            if response.status_code >= 400 or not response.headers.get('Content-Type'):
+                # Some servers don't answer HEAD properly; ask for the first byte instead
+                response = session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, 
+                                       allow_redirects=True, timeout=IMAGE_CHECK_TIMEOUT)
+                response.close()
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                size = total if total.isdigit() else response.headers.get('Content-Length')
+        except requests.exceptions.RequestException as e:
+            result.update(problem=f"unreachable ({type(e).__name__})", transient=True)
+            return result
+            
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if response.status_code >= 400:
+            result['problem'] = f"HTTP {response.status_code}"
+            if response.status_code >= 500 or response.status_code == 429:
+                result['transient'] = True
+        elif not content_type.startswith('image/'):
+            result['problem'] = f"not an image ({content_type or 'no content type'})"
+        elif size and size.isdigit() and int(size) > IMAGE_MAX_BYTES:
+            result['problem'] = f"image is {int(size) / 1024 / 1024:.1f} MB (limit {IMAGE_MAX_BYTES // 1024 // 1024} MB)"
+        else:
+            result['ok'] = True
+        return result
+
+
+class PipelineStage:
+    """One step of a Pipeline: fn(item) returns the item for the next stage, or None to drop it"""
+
+    def __init__(self, name, fn, workers=1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+
+
+_PIPELINE_END = object()
+
+
+class Pipeline:
+    """Run items through stages connected by bounded queues.
+
+    Each stage runs fn on its own worker threads, so later items are prepared
+    while earlier ones are still in a slower stage. A full queue blocks the
+    stage feeding it (backpressure), and items leave every stage in the order
+    they entered it. An exception in a stage stops the pipeline and is raised
+    from run().
+    """
+
+    def __init__(self, stages, queue_size=PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items):
+        """Yield the items that come out of the last stage.
+
+        Closing the generator (or an error) stops the pipeline and returns once
+        the stage calls still running have finished.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        def put(target, item):
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(source):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return _PIPELINE_END
+
+        def feed():
+            try:
+                for item in items:
+                    if not put(queues[0], item):
+                        return
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            put(queues[0], _PIPELINE_END)
+
+        def submitter(stage, source, inflight, pool):
+            # At most `workers` items in flight per stage
+            def run():
+                while (item := get(source)) is not _PIPELINE_END:
+                    try:
+                        future = pool.submit(stage.fn, item)
+                    except RuntimeError:
+                        # The pipeline was closed meanwhile
+                        return
+                    if not put(inflight, future):
+                        return
+                put(inflight, _PIPELINE_END)
+            return run
+
+        def emitter(inflight, target):
+            # Results are passed on in submission order
+            def run():
+                while (future := get(inflight)) is not _PIPELINE_END:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        stop.set()
+                        return
+                    if result is not None and not put(target, result):
+                        return
+                put(target, _PIPELINE_END)
+            return run
+
+        pools = []
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for stage, source, target in zip(self.stages, queues, queues[1:]):
+            pool = ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f"pipeline-{stage.name}")
+            inflight = queue.Queue(stage.workers)
+            pools.append(pool)
+            threads.append(threading.Thread(target=submitter(stage, source, inflight, pool), daemon=True))
+            threads.append(threading.Thread(target=emitter(inflight, target), daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while (item := get(queues[-1])) is not _PIPELINE_END:
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            # Queued items are dropped, but calls already running (e.g. a send) finish first
+            stop.set()
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            for pool in pools:
+                pool.shutdown(wait=True)
+
+
+def post_content_hash(parts):
+    """Hash the planned Bot API calls of a post (text, caption and photo)"""
+    payload = json.dumps([[method, data] for method, data in parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PostLedger:
+    """SQLite record of every post: message ids and rendered content per (product, channel).
+
+    The ledger lets the app edit posts in place when a product changes,
+    instead of posting it again. Access is serialized so the posting worker
+    and the UI thread can share one connection.
+    """
+
+    def __init__(self, path="post_ledger.db"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    product_key  TEXT NOT NULL,
+                    channel      TEXT NOT NULL,
+                    message_ids  TEXT NOT NULL,
+                    kind         TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    rendered_at  TEXT,
+                    posted_at    REAL NOT NULL,
+                    updated_at   REAL NOT NULL,
+                    photo        TEXT,
+                    PRIMARY KEY (product_key, channel)
+                )""")
+            # Ledgers written before photos were recorded get the column (NULL: photo not known)
+            columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(posts)")]
+            if 'photo' not in columns:
+                self.conn.execute("ALTER TABLE posts ADD COLUMN photo TEXT")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS digests (
+                    channel      TEXT NOT NULL,
+                    product_keys TEXT NOT NULL,
+                    message_ids  TEXT NOT NULL,
+                    posted_at    REAL NOT NULL
+                )""")
+            # A row is written before each posting call and removed once its outcome is known
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS send_intents (
+                    intent_key TEXT NOT NULL,
+                    channel    TEXT NOT NULL,
+                    part       INTEGER NOT NULL,
+                    method     TEXT NOT NULL,
+                    expected   INTEGER NOT NULL,
+                    after_id   INTEGER,
+                    created_at REAL NOT NULL,
+                    checks     INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (intent_key, channel, part)
+                )""")
+            columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(send_intents)")]
+            if 'checks' not in columns:
+                self.conn.execute("ALTER TABLE send_intents ADD COLUMN checks INTEGER NOT NULL DEFAULT 0")
+            # Parts of a multi-part post already sent, so a failed post resumes where it stopped
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sent_parts (
+                    intent_key   TEXT NOT NULL,
+                    channel      TEXT NOT NULL,
+                    part         INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    result       TEXT NOT NULL,
+                    PRIMARY KEY (intent_key, channel, part)
+                )""")
+
+    def record_post(self, product_key, channel, message_ids, kind, content_hash, rendered_at, photo=None):
+        """Store (or replace) the messages posted for a product in a channel"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO posts (product_key, channel, message_ids, kind, content_hash, rendered_at, "
+                "posted_at, updated_at, photo) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (product_key, channel, ','.join(str(i) for i in message_ids), kind,
+                 content_hash, rendered_at, now, now, photo))
+
+    def update_hash(self, product_key, channel, content_hash, photo=None):
+        """Record that a post now shows the content with this hash (and photo)"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE posts SET content_hash = ?, photo = ?, updated_at = ? WHERE product_key = ? AND channel = ?",
+                (content_hash, photo, time.time(), product_key, channel))
+
+    def record_digest(self, channel, product_keys, message_ids):
+        """Store the messages of a digest and the products it listed"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO digests VALUES (?, ?, ?, ?)",
+                              (channel, json.dumps(product_keys), ','.join(str(i) for i in message_ids), time.time()))
+
+    def last_digest_time(self, channel):
+        """Return when the last digest was posted to a channel (None if never)"""
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(posted_at) FROM digests WHERE channel = ?", (channel,)).fetchone()
+        return row[0]
+
+    def begin_send(self, intent_key, channel, part, method, expected, after_id):
+        """Record that a posting call is about to be made; returns the intent"""
+        intent = {'intent_key': intent_key, 'channel': channel, 'part': part, 'method': method,
+                  'expected': expected, 'after_id': after_id, 'created_at': time.time(), 'checks': 0}
+        with self.lock, self.conn:
+            self.conn.execute(f"INSERT OR REPLACE INTO send_intents ({', '.join(intent)}) "
+                              f"VALUES ({', '.join('?' * len(intent))})", tuple(intent.values()))
+        return intent
+
+    def open_intent(self, intent_key, channel, part):
+        """Return the intent of a posting call whose outcome isn't known, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM send_intents WHERE intent_key = ? AND channel = ? AND part = ?",
+                                    (intent_key, channel, part)).fetchone()
+        return dict(row) if row else None
+
+    def count_check(self, intent):
+        """Count an inconclusive check of an intent; returns how many there have been"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE send_intents SET checks = checks + 1 WHERE intent_key = ? AND channel = ? "
+                              "AND part = ?", (intent['intent_key'], intent['channel'], intent['part']))
+        intent['checks'] = intent.get('checks', 0) + 1
+        return intent['checks']
+
+    def open_intents(self, channel):
+        """Return the intents of every posting call in a channel whose outcome isn't known"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM send_intents WHERE channel = ? ORDER BY created_at",
+                                     (channel,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close_intent(self, intent):
+        """Forget an intent once its call is known to have posted or not"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM send_intents WHERE intent_key = ? AND channel = ? AND part = ?",
+                              (intent['intent_key'], intent['channel'], intent['part']))
+
+    def record_part(self, intent_key, channel, part, content_hash, result):
+        """Remember the result of one sent part of a multi-part post"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sent_parts VALUES (?, ?, ?, ?, ?)",
+                              (intent_key, channel, part, content_hash, json.dumps(result)))
+
+    def sent_parts(self, intent_key, channel, content_hash):
+        """Return {part: result} of the parts already sent of a post with this content"""
+        with self.lock:
+            rows = self.conn.execute("SELECT part, result FROM sent_parts WHERE intent_key = ? AND channel = ? "
+                                     "AND content_hash = ?", (intent_key, channel, content_hash)).fetchall()
+        return {row['part']: json.loads(row['result']) for row in rows}
+
+    def clear_parts(self, intent_key, channel):
+        """Forget the sent parts of a post once all of it is posted"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM sent_parts WHERE intent_key = ? AND channel = ?", (intent_key, channel))
+
+    def known_message_ids(self, channel):
+        """Return the ids of every post and digest message recorded for a channel"""
+        with self.lock:
+            rows = self.conn.execute("SELECT message_ids FROM posts WHERE channel = ? UNION ALL "
+                                     "SELECT message_ids FROM digests WHERE channel = ?", (channel, channel)).fetchall()
+        return {int(i) for row in rows for i in row[0].split(',') if i}
+
+    def all_posts(self):
+        """Return every ledger entry, message ids parsed into a list"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM posts").fetchall()
+        return [self._entry(row) for row in rows]
+
+    def delete_posts(self, keys):
+        """Forget posts given as (product_key, channel) pairs"""
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM posts WHERE product_key = ? AND channel = ?", keys)
+
+    @staticmethod
+    def _entry(row):
+        entry = dict(row)
+        entry['message_ids'] = [int(i) for i in entry['message_ids'].split(',') if i]
+        return entry
+
+    def posts_for(self, product_key):
+        """Return the ledger entries of a product, message ids parsed into a list"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM posts WHERE product_key = ?", (product_key,)).fetchall()
+        return [self._entry(row) for row in rows]
+
+
+class JobStore:
+    """Posting queue shared by several app instances through one SQLite file.
+
+    Each product is a job that a node claims with a time-limited lease and
+    renews with heartbeats; leases that expire (a node crashed or lost its
+    connection) are claimed by another node. Per-channel results are stored
+    as the node goes, so a re-assigned job only posts to the remaining
+    channels. Every change is fenced on the lease, so a node that lost its
+    job can't overwrite the new owner's progress.
+    """
+
+    def __init__(self, path, lease_seconds=JOB_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        # Autocommit mode with explicit IMMEDIATE transactions for claims
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    product_key    TEXT PRIMARY KEY,
+                    state          TEXT NOT NULL,
+                    owner          TEXT,
+                    lease_until    REAL,
+                    attempts       INTEGER NOT NULL DEFAULT 0,
+                    channel_status TEXT NOT NULL DEFAULT '',
+                    updated_at     REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, lease_until)")
+
+    def enqueue(self, product_keys):
+        """Add products to the queue; finished ones are ignored, failed ones are queued again"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    """INSERT INTO jobs (product_key, state, updated_at) VALUES (?, 'pending', ?)
+                       ON CONFLICT (product_key) DO UPDATE SET state = 'pending', updated_at = excluded.updated_at
+                       WHERE jobs.state IN ('failed', 'partial')""",
+                    ((key, now) for key in product_keys))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, node, limit=JOB_CLAIM_BATCH):
+        """Lease up to `limit` pending or expired jobs to a node; returns [{'product_key', 'channel_status'}]"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    """SELECT product_key, channel_status FROM jobs
+                       WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?)
+                       ORDER BY rowid LIMIT ?""", (now, limit)).fetchall()
+                self.conn.executemany(
+                    """UPDATE jobs SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1,
+                       updated_at = ? WHERE product_key = ?""",
+                    [(node, now + self.lease_seconds, now, row['product_key']) for row in rows])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def renew(self, node):
+        """Extend every lease a node holds (its heartbeat)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND state = 'leased' AND lease_until >= ?",
+                (now + self.lease_seconds, node, now))
+
+    def owns(self, node, product_key):
+        """Return True while the node's lease on a job is valid"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM jobs WHERE product_key = ? AND owner = ? AND state = 'leased' AND lease_until >= ?",
+                (product_key, node, time.time())).fetchone()
+        return row is not None
+
+    def record_channel(self, node, product_key, channel_status):
+        """Store per-channel progress of a leased job; False if the lease was lost"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                """UPDATE jobs SET channel_status = ?, updated_at = ?
+                   WHERE product_key = ? AND owner = ? AND state = 'leased' AND lease_until >= ?""",
+                (channel_status, now, product_key, node, now))
+        return cursor.rowcount == 1
+
+    def complete(self, node, product_key, state, channel_status):
+        """Finish a leased job as posted, partial or failed; False if the lease was lost"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                """UPDATE jobs SET state = ?, channel_status = ?, owner = NULL, lease_until = NULL, updated_at = ?
+                   WHERE product_key = ? AND owner = ? AND state = 'leased' AND lease_until >= ?""",
+                (state, channel_status, now, product_key, node, now))
+        return cursor.rowcount == 1
+
+    def release(self, node):
+        """Give back every job a node still holds, e.g. when posting is stopped"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET state = 'pending', owner = NULL, lease_until = NULL WHERE owner = ? AND state = 'leased'",
+                (node,))
+
+
+class LeaseHeartbeat:
+    """Background thread that renews a node's job leases until stopped"""
+
+    def __init__(self, store, node):
+        self.store = store
+        self.node = node
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+
+    def _run(self):
+        while not self.stopped.wait(self.store.lease_seconds / 3):
+            try:
+                self.store.renew(self.node)
+            except sqlite3.Error as e:
+                logging.error(f"Error renewing job leases: {e}")
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+class ChannelCircuitBreaker:
+    """Stop sending to a failing channel quickly and probe it again later.
+
+    closed    - sends go through; consecutive failures are counted
+    open      - sends are skipped until the cooldown expires
+    half_open - one probe send is let through; success closes, failure reopens
+                with a doubled cooldown
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=60.0, max_cooldown=1800.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+        self.cooldown = cooldown
+        self.last_error = ""
+
+    def allow(self):
+        """Return True if a send may be attempted now"""
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = 'half_open'
+        return self.state != 'open'
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.last_error = ""
+
+    def record_failure(self, error, channel_error=False):
+        """Count a failure; channel errors and failed probes open the breaker at once"""
+        self.failures += 1
+        self.last_error = str(error)
+        if channel_error or self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** self.trips))
+            self.trips += 1
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+
+class FilterExpressionError(ValueError):
+    """Raised for a product filter expression that can't be parsed or evaluated"""
+
+
+_FILTER_TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<column>\[[^\]]+\]|`[^`]+`)
+  | (?P<op>==|!=|<=|>=|=|<|>|\(|\)|,)
+  | (?P<word>[^\W\d]\w*)
+)''', re.VERBOSE)
+
+_FILTER_KEYWORDS = {'and', 'or', 'not', 'between', 'in', 'contains'}
+_FILTER_DATE_WORDS = {'today', 'yesterday', 'now'}
+
+
+def parse_filter_expression(text):
+    """Parse a product filter expression into a small AST.
+
+    Grammar (keywords are case-insensitive)::
+
+        expr       := term ('or' term)*
+        term       := factor ('and' factor)*
+        factor     := 'not' factor | '(' expr ')' | comparison
+        comparison := column ('==' | '!=' | '<' | '<=' | '>' | '>=') value
+                    | column 'between' value 'and' value
+                    | column 'in' '(' value (',' value)* ')'
+                    | column 'contains' value
+        column     := name | [Name With Spaces] | `Name With Spaces`
+        value      := number | "text" | 'text' | today | yesterday | now
+
+    Example: ``category == "Shoes" and [Sale Price] between 10 and 50``
+    """
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _FILTER_TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise FilterExpressionError(f"Unexpected input at: {text[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        elif kind == 'column':
+            value = value[1:-1]
+        elif kind == 'number':
+            value = float(value)
+        elif kind == 'op' and value == '=':
+            value = '=='
+        elif kind == 'word' and value.lower() in _FILTER_KEYWORDS | _FILTER_DATE_WORDS:
+            kind, value = 'keyword', value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+
+    index = 0
+
+    def peek(kind=None, value=None):
+        if index >= len(tokens):
+            return False
+        token_kind, token_value = tokens[index]
+        return (kind is None or token_kind == kind) and (value is None or token_value == value)
+
+    def take(kind=None, value=None):
+        nonlocal index
+        if not peek(kind, value):
+            found = tokens[index][1] if index < len(tokens) else "end of expression"
+            raise FilterExpressionError(f"Expected {value or kind}, found {found!r}")
+        index += 1
+        return tokens[index - 1][1]
+
+    def parse_value():
+        if peek('number') or peek('string'):
+            return take()
+        if peek('keyword') and tokens[index][1] in _FILTER_DATE_WORDS:
+            return ('date', take())
+        raise FilterExpressionError("Expected a number, quoted text or date keyword")
+
+    def parse_comparison():
+        if peek('word') or peek('column'):
+            column = take()
+        else:
+            raise FilterExpressionError("Expected a column name")
+        if peek('keyword', 'between'):
+            take()
+            low = parse_value()
+            take('keyword', 'and')
+            return ('between', column, low, parse_value())
+        if peek('keyword', 'in'):
+            take()
+            take('op', '(')
+            values = [parse_value()]
+            while peek('op', ','):
+                take()
+                values.append(parse_value())
+            take('op', ')')
+            return ('in', column, values)
+        if peek('keyword', 'contains'):
+            take()
+            return ('contains', column, parse_value())
+        operator = take('op')
+        if operator not in ('==', '!=', '<', '<=', '>', '>='):
+            raise FilterExpressionError(f"Unknown operator {operator!r}")
+        return (operator, column, parse_value())
+
+    def parse_factor():
+        if peek('keyword', 'not'):
+            take()
+            return ('not', parse_factor())
+        if peek('op', '('):
+            take()
+            node = parse_expr()
+            take('op', ')')
+            return node
+        return parse_comparison()
+
+    def parse_term():
+        node = parse_factor()
+        while peek('keyword', 'and'):
+            take()
+            node = ('and', node, parse_factor())
+        return node
+
+    def parse_expr():
+        node = parse_term()
+        while peek('keyword', 'or'):
+            take()
+            node = ('or', node, parse_term())
+        return node
+
+    if not tokens:
+        raise FilterExpressionError("Empty filter expression")
+    tree = parse_expr()
+    if index != len(tokens):
+        raise FilterExpressionError(f"Unexpected {tokens[index][1]!r}")
+    return tree
+
+
+class CatalogIndex:
+    """Per-catalog indexes that answer filter expressions without full scans.
+
+    Sorted indexes (numeric and date columns) answer range comparisons with a
+    binary search; hash indexes (text/categorical columns) answer equality
+    and 'in' lookups with a dict probe. Indexes are built on first use of a
+    column and kept for the lifetime of the catalog. Tracking columns change
+    during a session, so they are always scanned instead of indexed.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.size = len(df)
+        self._numeric = {}
+        self._dates = {}
+        self._hashed = {}
+
+    def query(self, expression):
+        """Return sorted row positions matching a filter expression"""
+        return self._evaluate(parse_filter_expression(expression))
+
+    def _column(self, name):
+        if name in self.df.columns:
+            return name
+        # Fall back to a case-insensitive match for hand-typed names
+        for col in self.df.columns:
+            if str(col).lower() == str(name).lower():
+                return col
+        raise FilterExpressionError(f"Unknown column: {name}")
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == 'and':
+            return self._combine(self._evaluate(node[1]), self._evaluate(node[2]), 'and')
+        if kind == 'or':
+            return self._combine(self._evaluate(node[1]), self._evaluate(node[2]), 'or')
+        if kind == 'not':
+            return self._complement(self._evaluate(node[1]))
+
+        column = self._column(node[1])
+        if column in TRACKING_COLUMNS:
+            return self._scan(kind, column, node[2:])
+        if kind == 'contains':
+            needle = str(node[2]).lower()
+            mask = self.df[column].astype(str).str.lower().str.contains(needle, regex=False)
+            return mask.to_numpy(dtype=bool).nonzero()[0]
+        if kind == 'in':
+            result = np.array([], dtype=int)
+            for value in node[2]:
+                result = self._combine(result, self._equal(column, value), 'or')
+            return result
+        if kind == 'between':
+            return self._range(column, node[2], '>=', node[3], '<=')
+        if kind == '==':
+            return self._equal(column, node[2])
+        if kind == '!=':
+            return self._complement(self._equal(column, node[2]))
+        if kind in ('>', '>='):
+            return self._range(column, node[2], kind, None, None)
+        return self._range(column, None, None, node[2], kind)
+
+    def _to_positions(self, positions):
+        """Sort unordered positions - via a bitmap when the result is large"""
+        if len(positions) * 8 < self.size:
+            return np.sort(positions)
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return mask.nonzero()[0]
+
+    def _combine(self, left, right, operator):
+        """Intersect or union two sorted position arrays"""
+        if (len(left) + len(right)) * 8 < self.size:
+            if operator == 'and':
+                return np.intersect1d(left, right, assume_unique=True)
+            return np.union1d(left, right)
+        mask = np.zeros(self.size, dtype=bool)
+        mask[left] = True
+        if operator == 'and':
+            other = np.zeros(self.size, dtype=bool)
+            other[right] = True
+            mask &= other
+        else:
+            mask[right] = True
+        return mask.nonzero()[0]
+
+    def _complement(self, positions):
+        mask = np.ones(self.size, dtype=bool)
+        mask[positions] = False
+        return mask.nonzero()[0]
+
+    def _scan(self, kind, column, args):
+        """Evaluate a comparison on a live tracking column with a vectorized scan"""
+        values = self.df[column].astype(str)
+        if kind == '==':
+            mask = values == str(args[0])
+        elif kind == '!=':
+            mask = values != str(args[0])
+        elif kind == 'in':
+            mask = values.isin([str(value) for value in args[0]])
+        elif kind == 'contains':
+            mask = values.str.contains(str(args[0]), regex=False)
+        else:
+            raise FilterExpressionError(f"'{kind}' is not supported on {column}")
+        return mask.to_numpy(dtype=bool).nonzero()[0]
+
+    def _equal(self, column, value):
+        if isinstance(value, str):
+            return self._hash_index(column).get(value.strip(), np.array([], dtype=int))
+        return self._range(column, value, '>=', value, '<=')
+
+    def _range(self, column, low, low_op, high, high_op):
+        """Binary-search a sorted index for low (op) value (op) high"""
+        bound = low if low is not None else high
+        is_date = isinstance(bound, tuple) or (isinstance(bound, str) and not self._is_number(bound))
+        keys, positions = self._date_index(column) if is_date else self._numeric_index(column)
+        start, stop = 0, len(keys)
+        if low is not None:
+            start = np.searchsorted(keys, self._key(low, is_date), side='left' if low_op == '>=' else 'right')
+        if high is not None:
+            stop = np.searchsorted(keys, self._key(high, is_date), side='right' if high_op == '<=' else 'left')
+        return self._to_positions(positions[start:max(start, stop)])
+
+    @staticmethod
+    def _is_number(text):
+        try:
+            float(text)
+            return True
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _key(value, is_date):
+        if not is_date:
+            return float(value)
+        if isinstance(value, tuple):
+            now = datetime.now()
+            midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            value = {'now': now, 'today': midnight, 'yesterday': midnight - timedelta(days=1)}[value[1]]
+        try:
+            return pd.Timestamp(value).value
+        except ValueError:
+            raise FilterExpressionError(f"Not a date: {value!r}")
+
+    def _numeric_index(self, column):
+        if column not in self._numeric:
+            values = pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            self._numeric[column] = self._sorted_index(values, np.isnan(values))
+        return self._numeric[column]
+
+    def _date_index(self, column):
+        if column not in self._dates:
+            dates = pd.to_datetime(self.df[column], errors='coerce')
+            missing = dates.isna().to_numpy()
+            # Compare in nanoseconds regardless of the column's datetime resolution
+            values = dates.to_numpy(dtype='datetime64[ns]').astype('int64')
+            self._dates[column] = self._sorted_index(values, missing)
+        return self._dates[column]
+
+    @staticmethod
+    def _sorted_index(values, missing):
+        positions = (~missing).nonzero()[0]
+        order = np.argsort(values[positions], kind='stable')
+        return values[positions][order], positions[order]
+
+    def _hash_index(self, column):
+        if column not in self._hashed:
+            keys = self.df[column].astype(str).str.strip().to_numpy()
+            self._hashed[column] = pd.Series(np.arange(self.size)).groupby(keys).indices
+        return self._hashed[column]
+
+
+class ThumbnailCache:
+    """Product image thumbnails for previews, fetched and decoded off the Tk thread.
+
+    Decoded images live in a bounded in-memory LRU and the downscaled files on
+    disk, so scrolling a large catalog never downloads or decodes an image
+    twice. The disk cache keeps the max_files most recently shown files.
+    Pillow is optional; without it only PNG and GIF images are shown.
+
+    Tk frees a PhotoImage once nothing references it, so a label showing one
+    must keep it (label.image = image) in case the LRU drops it.
+    """
+
+    def __init__(self, root, directory=THUMBNAIL_CACHE_DIR, size=THUMBNAIL_SIZE, max_items=THUMBNAIL_MEMORY_ITEMS,
+                 max_files=THUMBNAIL_DISK_ITEMS):
+        self.root = root
+        self.directory = directory
+        self.size = size
+        self.max_items = max_items
+        self.max_files = max_files
+        self.images = OrderedDict()    # url -> PhotoImage, or the problem text
+        self.waiting = {}              # url -> callbacks of a fetch in progress
+        self.pool = None
+        self.session = None
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        """Return the PhotoImage (or problem text) for a URL if it is in memory; Tk thread only"""
+        if url in self.images:
+            self.images.move_to_end(url)
+            return self.images[url]
+        return None
+
+    def request(self, url, callback=None):
+        """Call callback(PhotoImage or problem text) once the thumbnail is ready; Tk thread only"""
+        cached = self.get(url)
+        if cached is not None:
+            if callback:
+                callback(cached)
+            return
+        if url in self.waiting:
+            if callback:
+                self.waiting[url].append(callback)
+            return
+        self.waiting[url] = [callback] if callback else []
+        if self.pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnail')
+            self.pool.submit(self.prune)
+        self.pool.submit(self.load, url)
+
+    def load(self, url):
+        """Read the thumbnail file (fetching and shrinking the image if needed), then hand it to the Tk thread"""
+        data = problem = None
+        keep = True
+        try:
+            data = self.load_file(url)
+        except requests.exceptions.RequestException as e:
+            # Network errors are retried the next time the image is shown
+            problem, keep = f"unreachable ({type(e).__name__})", False
+        except Exception as e:
+            problem = str(e)
+        self.root.after(0, lambda: self.finish(url, data, problem, keep))
+
+    def finish(self, url, data, problem, keep):
+        """Decode a thumbnail into a PhotoImage and pass it to the waiting callbacks"""
+        result = problem
+        if data is not None:
+            try:
+                result = tk.PhotoImage(data=base64.b64encode(data))
+                factor = -(-max(result.width(), result.height()) // self.size)
+                if factor > 1:
+                    # Only happens without Pillow, where files are stored unshrunk
+                    result = result.subsample(factor)
+            except tk.TclError as e:
+                result = f"can't show image ({e})"
+        if keep:
+            self.images[url] = result
+            while len(self.images) > self.max_items:
+                self.images.popitem(last=False)
+        for callback in self.waiting.pop(url, []):
+            callback(result)
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.thumb')
+
+    def load_file(self, url):
+        """Return the thumbnail file's bytes, creating it from the image on first use"""
+        path = self.path(url)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Mark it recently used for prune()
+            os.utime(path)
+            return data
+        data = self.shrink(self.fetch(url))
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return data
+
+    def prune(self):
+        """Delete the least recently used thumbnail files beyond max_files, and stale temp files"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except FileNotFoundError:
+            return
+        # Temp files still being written by another worker are young; old ones were left by a crash
+        temp = [entry for entry in entries
+                if entry.name.endswith('.tmp') and time.time() - entry.stat().st_mtime > 60 * 60]
+        files = sorted((entry for entry in entries if entry.name.endswith('.thumb')),
+                       key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in temp + files[self.max_files:]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def fetch(self, url):
+        """Return the image's bytes from a URL or a local file"""
+        if re.match(r'https?://', url):
+            with self.lock:
+                if self.session is None:
+                    self.session = requests.Session()
+            with self.session.get(url, stream=True, timeout=IMAGE_CHECK_TIMEOUT) as response:
+                response.raise_for_status()
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > IMAGE_MAX_BYTES:
+                        raise ValueError(f"larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB")
+                return bytes(data)
+        if os.path.isfile(url):
+            with open(url, 'rb') as f:
+                return f.read()
+        raise ValueError("not an image URL or file")
+
+    def shrink(self, data):
+        """Return PNG bytes of the image scaled down to the thumbnail size"""
+        import io
+        try:
+            from PIL import Image
+        except ImportError:
+            if not data.startswith((b'\x89PNG', b'GIF8')):
+                raise ValueError("install Pillow to preview this image format")
+            return data
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((self.size, self.size))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            output = io.BytesIO()
+            image.save(output, 'PNG')
+            return output.getvalue()
+
+
+class CatalogGrid(ttk.Frame):
+    """Virtualized, sortable and filterable catalog table.
+
+    Only a fixed pool of Treeview items (as many as fit on screen) ever
+    exists; scrolling re-fills the pool from the DataFrame, so a catalog of
+    any size scrolls without creating one widget item per row.
+    """
+
+    ALL_COLUMNS = "(all columns)"
+
+    def __init__(self, parent, thumbnails=None, image_column=None):
+        super().__init__(parent)
+        self.thumbnails = thumbnails        # ThumbnailCache, or None for no image panel
+        self.image_column = image_column    # returns the name of the image column
+        self.prefetch_job = None
+        self.thumbnail_url = ""
+        self.df = None
+        self.columns = []
+        self.order = None          # DataFrame positions after filtering/sorting
+        self.offset = 0            # index into self.order of the first visible row
+        self.pool_size = 20
+        self.pool_positions = []   # DataFrame position shown by each pool item
+        self.sort_column = None
+        self.sort_ascending = True
+
+        # Filter bar
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_column_var = tk.StringVar(value=self.ALL_COLUMNS)
+        self.filter_column_combo = ttk.Combobox(filter_frame, textvariable=self.filter_column_var,
+                                                width=20, state='readonly')
+        self.filter_column_combo.pack(side=tk.LEFT, padx=(5, 5))
+        self.filter_text_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_text_var, width=30)
+        filter_entry.pack(side=tk.LEFT, padx=(0, 5))
+        filter_entry.bind('<Return>', lambda event: self.apply_filter())
+        ttk.Button(filter_frame, text="Apply", command=self.apply_filter).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(filter_frame, text="Clear", command=self.clear_filter).pack(side=tk.LEFT)
+
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.RIGHT)
+
+        # Table with our own vertical scrollbar (rows are virtual) and a native horizontal one
+        table_frame = ttk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(table_frame, show='headings', selectmode='browse')
+        self.vscroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.on_scroll)
+        hscroll = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hscroll.set)
+
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.vscroll.grid(row=0, column=1, sticky='ns')
+        hscroll.grid(row=1, column=0, sticky='ew')
+        table_frame.rowconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+
+        # Image of the selected row
+        if self.thumbnails:
+            self.thumbnail_label = ttk.Label(table_frame, text="", anchor=tk.N, justify=tk.CENTER,
+                                             width=THUMBNAIL_SIZE // 8, wraplength=THUMBNAIL_SIZE)
+            self.thumbnail_label.grid(row=0, column=2, sticky='ns', padx=(5, 0))
+            self.tree.bind('<<TreeviewSelect>>', lambda event: self.show_thumbnail())
+
+        self.tree.tag_configure('posted', foreground='#1a7f37')
+        self.tree.tag_configure('partial', foreground='#9a6700')
+        self.tree.tag_configure('failed', foreground='#cf222e')
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_rows(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_rows(3))
+        self.tree.bind('<Prior>', lambda event: self.scroll_rows(-self.pool_size))
+        self.tree.bind('<Next>', lambda event: self.scroll_rows(self.pool_size))
+        self.tree.bind('<Home>', lambda event: self.scroll_to(0))
+        self.tree.bind('<End>', lambda event: self.scroll_to(len(self.df) if self.df is not None else 0))
+
+    def set_data(self, df):
+        """Show a new catalog, keeping the current filter and sort when possible"""
+        self.df = df
+        # Status first so the posting state is visible without scrolling sideways
+        self.columns = (['posted_status'] if 'posted_status' in df.columns else []) + \
+                       [col for col in df.columns if col != 'posted_status']
+
+        self.tree.configure(columns=[str(i) for i in range(len(self.columns))])
+        if self.sort_column not in self.columns:
+            self.sort_column = None
+        for i, col in enumerate(self.columns):
+            arrow = (" ▲" if self.sort_ascending else " ▼") if col == self.sort_column else ""
+            self.tree.heading(str(i), text=col + arrow, command=lambda c=col: self.sort_by(c))
+            self.tree.column(str(i), width=90 if col == 'posted_status' else 140, stretch=False)
+
+        self.filter_column_combo.configure(values=[self.ALL_COLUMNS] + self.columns)
+        if self.filter_column_var.get() not in self.columns:
+            self.filter_column_var.set(self.ALL_COLUMNS)
+
+        self.pool_positions = []
+        self.tree.delete(*self.tree.get_children())
+        self.apply_filter(keep_offset=True)
+
+    def apply_filter(self, keep_offset=False):
+        """Filter rows by a case-insensitive substring in one or all columns"""
+        if self.df is None:
+            return
+        text = self.filter_text_var.get().strip().lower()
+        if text:
+            column = self.filter_column_var.get()
+            columns = self.columns if column == self.ALL_COLUMNS else [column]
+            mask = np.zeros(len(self.df), dtype=bool)
+            for col in columns:
+                mask |= self.df[col].astype(str).str.lower().str.contains(text, regex=False).to_numpy(dtype=bool)
+            self.order = mask.nonzero()[0]
+        else:
+            self.order = np.arange(len(self.df))
+
+        if self.sort_column is not None:
+            self.order = self._sorted(self.order)
+        if not keep_offset:
+            self.offset = 0
+        self.render()
+
+    def clear_filter(self):
+        """Remove the row filter"""
+        self.filter_text_var.set("")
+        self.apply_filter()
+
+    def sort_by(self, column):
+        """Sort by a column; clicking the same header again reverses the order"""
+        if self.df is None:
+            return
+        if self.sort_column == column:
+            self.sort_ascending = not self.sort_ascending
+        else:
+            self.sort_column, self.sort_ascending = column, True
+
+        for i, col in enumerate(self.columns):
+            arrow = (" ▲" if self.sort_ascending else " ▼") if col == column else ""
+            self.tree.heading(str(i), text=col + arrow)
+
+        self.order = self._sorted(self.order)
+        self.offset = 0
+        self.render()
+
+    def _sorted(self, positions):
+        """Return positions ordered by the current sort column (stable, blanks last)"""
+        values = self.df[self.sort_column].iloc[positions].reset_index(drop=True)
+        try:
+            ranked = values.sort_values(ascending=self.sort_ascending, kind='stable', na_position='last')
+        except TypeError:
+            # Mixed cell types (numbers and text) sort by their text
+            ranked = values.astype(str).sort_values(ascending=self.sort_ascending, kind='stable')
+        return positions[ranked.index.to_numpy()]
+
+    def on_resize(self, event):
+        """Resize the item pool to the number of rows that fit"""
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        pool_size = max(1, (event.height - 25) // int(row_height))
+        if pool_size != self.pool_size:
+            self.pool_size = pool_size
+            self.render()
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def on_scroll(self, *args):
+        """Handle the vertical scrollbar ('moveto' fraction or 'scroll' n units/pages)"""
+        if self.order is None:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.order)))
+        elif args[0] == 'scroll':
+            step = self.pool_size if args[2] == 'pages' else 1
+            self.scroll_rows(int(args[1]) * step)
+
+    def scroll_rows(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def scroll_to(self, offset):
+        if self.order is None:
+            return "break"
+        offset = max(0, min(offset, len(self.order) - self.pool_size))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return "break"
+
+    def render(self):
+        """Fill the item pool with the rows at the current offset"""
+        if self.df is None or self.order is None:
+            return
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - self.pool_size))
+        self.pool_positions = list(self.order[self.offset:self.offset + self.pool_size])
+        rows = self.df.iloc[self.pool_positions][self.columns]
+
+        items = list(self.tree.get_children())
+        for i, row in enumerate(rows.itertuples(index=False, name=None)):
+            values = ["" if pd.isna(value) else str(value)[:100] for value in row]
+            status = values[0] if self.columns and self.columns[0] == 'posted_status' else ''
+            tags = (status,) if status in ('posted', 'partial', 'failed') else ()
+            if i < len(items):
+                self.tree.item(items[i], values=values, tags=tags)
+            else:
+                self.tree.insert('', tk.END, iid=str(i), values=values, tags=tags)
+        if len(items) > len(self.pool_positions):
+            self.tree.delete(*items[len(self.pool_positions):])
+
+        if total:
+            self.vscroll.set(self.offset / total, min(1.0, (self.offset + self.pool_size) / total))
+        else:
+            self.vscroll.set(0, 1)
+        self.count_label.config(text=f"{total:,} of {len(self.df):,} rows")
+
+        if self.thumbnails:
+            self.show_thumbnail()
+            # Fetch the visible rows' images once scrolling pauses
+            if self.prefetch_job:
+                self.after_cancel(self.prefetch_job)
+            self.prefetch_job = self.after(THUMBNAIL_PREFETCH_DELAY, self.prefetch_thumbnails)
+
+    def image_url(self, position):
+        """Return the image cell of a DataFrame position, or an empty string"""
+        column = self.image_column() if self.image_column else None
+        if self.df is None or column not in self.df.columns:
+            return ""
+        return cell_text(self.df[column].iat[position])
+
+    def prefetch_thumbnails(self):
+        """Start loading the thumbnails of the visible rows"""
+        self.prefetch_job = None
+        for position in self.pool_positions:
+            url = self.image_url(position)
+            if url:
+                self.thumbnails.request(url)
+
+    def show_thumbnail(self):
+        """Show the selected row's image in the panel beside the table"""
+        position = self.selected_position()
+        url = self.image_url(position) if position is not None else ""
+        self.thumbnail_url = url
+        if not url:
+            self.thumbnail_label.config(image='', text="")
+            return
+
+        def show(image):
+            # A different row may have been selected meanwhile
+            if self.thumbnail_url != url:
+                return
+            if isinstance(image, str):
+                self.thumbnail_label.config(image='', text=f"No preview:\n{image}")
+            else:
+                self.thumbnail_label.config(image=image, text="")
+                self.thumbnail_label.image = image
+
+        self.thumbnail_label.config(image='', text="Loading image...")
+        self.thumbnails.request(url, show)
+
+    def selected_position(self):
+        """Return the DataFrame position of the selected row, or None"""
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        index = int(selection[0])
+        return self.pool_positions[index] if index < len(self.pool_positions) else None
+
+
 class TelegramProductPoster:
-    def __init__(self, root):
+    def __init__(self, root, timeline=None):
         self.root = root
+        self.timeline = timeline or StartupTimeline()
         self.root.title("Telegram Product Poster - YouTube Edition")
         self.root.geometry("900x750")
         self.root.configure(bg='#f0f0f0')
@@ -47,16 +2372,95 @@ class TelegramProductPoster:
         
         # Variables
         self.config_file = "config.json"
-        self.excel_file_path = tk.StringVar()
-        self.bot_token_var = tk.StringVar()
+        self.saved_config = {}
         self.posting_active = False
         self.products_df = None
+        self.catalog_index = None
+        self.catalog_layout = []
+        self.catalog_mtimes = {}
+        self.circuit_breakers = {}
+        self.channel_failures = {}
+        self.channel_preflight = ChannelPreflight()
+        self.image_checker = ImageURLChecker()
+        self.feed_cache = FeedCache()
+        self.feed_frames = {}
+        self.catalog_load = None
+        self.catalog_load_deferred = False
+        self.worker_running = False
+        self.digest_channels = {}
+        self.pipeline_stages = []
+        self.session_profiler = None
+        self.ledger = None
+        self.job_store = None
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.templates = {}
+        self.editing_template = DEFAULT_TEMPLATE_NAME
+        self.render_cache = RenderCache()
+        self.channel_message_ids = {}
+        self.thumbnails = ThumbnailCache(root)
+        self.log_buffer = deque(maxlen=1000)
+        self.create_variables()
         
         # Load existing configuration
         self.load_config()
+        self.timeline.mark("config loaded")
         
         # Create UI
         self.create_ui()
+        self.timeline.mark("ui constructed")
+        
+        # Measure first paint and time to interactive once the event loop runs
+        self.root.after_idle(self.on_first_paint)
+        
+        # Log lines from worker threads reach the logs tab through the main loop
+        self.root.after(LOG_UI_INTERVAL, self.drain_log_buffer)
+        
+    def create_variables(self):
+        """Create Tk variables up front so settings exist before their tab is built"""
+        self.excel_file_path = tk.StringVar()
+        self.excel_sheets_var = tk.StringVar()
+        self.bot_token_var = tk.StringVar()
+        self.include_image_var = tk.BooleanVar(value=False)
+        self.image_column_var = tk.StringVar(value="Image Url")
+        self.check_images_var = tk.BooleanVar(value=True)
+        self.bad_image_action_var = tk.StringVar(value="text")
+        self.posting_mode_var = tk.StringVar(value="unposted_only")
+        self.delay_var = tk.IntVar(value=30)
+        self.max_posts_var = tk.IntVar(value=10)
+        self.continuous_var = tk.BooleanVar(value=False)
+        self.job_store_var = tk.StringVar()
+        self.fanout_channel_var = tk.StringVar()
+        self.api_url_var = tk.StringVar()
+        self.api_local_var = tk.BooleanVar(value=False)
+        self.digest_size_var = tk.IntVar(value=10)
+        self.digest_order_var = tk.StringVar()
+        self.digest_header_var = tk.StringVar(value="🔥 Top {count} deals - {timestamp}")
+        self.filter_expr_var = tk.StringVar()
+        self.id_column_var = tk.StringVar()
+        self.sync_before_posting_var = tk.BooleanVar(value=False)
+        self.template_name_var = tk.StringVar(value=DEFAULT_TEMPLATE_NAME)
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_flame_var = tk.BooleanVar(value=False)
+        self.retention_days_var = tk.IntVar(value=0)
+        self.retention_removed_var = tk.BooleanVar(value=False)
+        self.retention_stock_column_var = tk.StringVar()
+        self.auto_split_var = tk.BooleanVar(value=False)
+        self.progress_var = tk.DoubleVar()
+        
+    def on_first_paint(self):
+        """Record first paint, then finish startup work that can wait for the window"""
+        self.timeline.mark("first paint")
+        self.root.after_idle(self.on_interactive)
+        
+    def on_interactive(self):
+        """Record time to interactive and warm up heavy imports in the background"""
+        self.timeline.mark("interactive")
+        logging.info(f"Startup timeline: {self.timeline.summary()}")
+        
+        # Import pandas/requests off the main thread so the first Excel load is quick
+        thread = threading.Thread(target=lambda: (pd._load(), requests._load()))
+        thread.daemon = True
+        thread.start()
         
     def setup_custom_styles(self):
         """Setup custom styles for the application"""
@@ -93,42 +2497,47 @@ class TelegramProductPoster:
         subtitle_label.pack()
         
         # Create notebook for tabs
-        notebook = ttk.Notebook(self.root)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-        
-        # Configuration Tab
-        config_frame = ttk.Frame(notebook)
-        notebook.add(config_frame, text="Bot Configuration")
-        self.create_config_tab(config_frame)
-        
-        # Excel Tab
-        excel_frame = ttk.Frame(notebook)
-        notebook.add(excel_frame, text="Products Excel")
-        self.create_excel_tab(excel_frame)
-        
-        # Message Customization Tab
-        message_frame = ttk.Frame(notebook)
-        notebook.add(message_frame, text="Message Template")
-        self.create_message_tab(message_frame)
-        
-        # Posting Tab
-        posting_frame = ttk.Frame(notebook)
-        notebook.add(posting_frame, text="Auto Posting")
-        self.create_posting_tab(posting_frame)
-        
-        # Logs Tab
-        logs_frame = ttk.Frame(notebook)
-        notebook.add(logs_frame, text="Logs Status")
-        self.create_logs_tab(logs_frame)
-        
-        # About Developer Tab
-        about_frame = ttk.Frame(notebook)
-        notebook.add(about_frame, text="About Developer")
-        self.create_about_tab(about_frame)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        
+        # Tabs are added empty and built the first time they are selected
+        self.tabs = {}
+        for name, title, builder in [
+            ('config', "Bot Configuration", self.create_config_tab),
+            ('excel', "Products Excel", self.create_excel_tab),
+            ('message', "Message Template", self.create_message_tab),
+            ('posting', "Auto Posting", self.create_posting_tab),
+            ('logs', "Logs Status", self.create_logs_tab),
+            ('about', "About Developer", self.create_about_tab),
+        ]:
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            self.tabs[name] = {'frame': frame, 'builder': builder, 'built': False}
+        
+        # The configuration tab is visible at startup, so build it right away
+        self.ensure_tab('config')
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Show welcome message after UI is created
         self.root.after(1000, self.show_welcome_message)
         
+    def ensure_tab(self, name):
+        """Build a notebook tab if it hasn't been built yet"""
+        tab = self.tabs[name]
+        if not tab['built']:
+            tab['built'] = True
+            started = time.perf_counter()
+            tab['builder'](tab['frame'])
+            logging.debug(f"Built '{name}' tab in {(time.perf_counter() - started) * 1000:.0f} ms")
+            
+    def on_tab_changed(self, event):
+        """Build the selected tab on first selection"""
+        selected = self.notebook.nametowidget(self.notebook.select())
+        for name, tab in self.tabs.items():
+            if tab['frame'] is selected:
+                self.ensure_tab(name)
+                break
+        
     def create_config_tab(self, parent):
         """Create configuration tab for Telegram bot settings"""
         main_frame = ttk.Frame(parent)
@@ -166,21 +2575,40 @@ class TelegramProductPoster:
         toggle_btn = ttk.Button(bot_frame, text="Show Token", command=toggle_token_visibility)
         toggle_btn.pack(anchor=tk.W, pady=(0, 15))
         
+        # Bot API server: empty for api.telegram.org, or a self-hosted telegram-bot-api
+        ttk.Label(bot_frame, text=f"Bot API server (optional - empty uses {TelegramBotClient.API_URL}):").pack(anchor=tk.W)
+        ttk.Entry(bot_frame, textvariable=self.api_url_var, width=60).pack(anchor=tk.W, pady=(0, 5))
+        ttk.Checkbutton(bot_frame, text="Server runs with --local on this computer (images on disk are passed by path)",
+                        variable=self.api_local_var).pack(anchor=tk.W, pady=(0, 15))
+        
         # Target Channels
-        ttk.Label(bot_frame, text="Target Channels (one per line, use @channel_username or chat_id):").pack(anchor=tk.W)
+        ttk.Label(bot_frame, text="Target Channels (one per line, use @channel_username or chat_id; "
+                                  "add '| template name' to use a named template):").pack(anchor=tk.W)
         self.channels_text = tk.Text(bot_frame, height=5, width=60)
         self.channels_text.pack(anchor=tk.W, pady=(0, 10))
         
+        # Fan-out: post once to this channel, then copy the post to the target channels
+        ttk.Label(bot_frame, text="Fan-out source channel (optional - posts go here first and are copied "
+                                  "to channels with the same template):").pack(anchor=tk.W)
+        ttk.Entry(bot_frame, textvariable=self.fanout_channel_var, width=40).pack(anchor=tk.W, pady=(0, 10))
+        
         # Test Bot Button
         test_btn = ttk.Button(bot_frame, text="Test Bot Connection", 
                              command=self.test_bot_connection)
         test_btn.pack(anchor=tk.W, pady=(0, 10))
         
+        check_btn = ttk.Button(bot_frame, text="Check Channels", 
+                              command=self.check_channels)
+        check_btn.pack(anchor=tk.W, pady=(0, 10))
+        
         # Save Configuration Button
         save_btn = ttk.Button(main_frame, text="Save Configuration", 
                              command=self.save_config, style='Accent.TButton')
         save_btn.pack(pady=20)
         
+        # Fill in saved channels
+        self.load_channels(self.saved_config.get('target_channels', []))
+        
     def create_excel_tab(self, parent):
         """Create Excel upload and preview tab"""
         main_frame = ttk.Frame(parent)
@@ -195,7 +2623,7 @@ class TelegramProductPoster:
                                 text="Upload an Excel file with product information.\n" +
                                      "The app will use your EXACT column headers as template placeholders.\n" +
                                      "Example: If your Excel has 'Product Desc' column, use {Product Desc} in templates.\n" +
-                                     "Tracking columns will be added automatically: 'posted_date', 'posted_status'",
+                                     "Tracking columns will be added automatically: 'posted_date', 'posted_status', 'channel_status'",
                                 justify=tk.LEFT, foreground='blue')
         instructions.pack(anchor=tk.W, pady=(0, 15))
         
@@ -213,13 +2641,45 @@ class TelegramProductPoster:
                                command=self.browse_excel_file)
         browse_btn.pack(side=tk.RIGHT, padx=(10, 0))
         
+        # Sheets and additional workbooks
+        sources_frame = ttk.LabelFrame(main_frame, text="Sheets and Extra Workbooks (optional)", padding=15)
+        sources_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        sheets_row = ttk.Frame(sources_frame)
+        sheets_row.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(sheets_row, text="Sheets:").pack(side=tk.LEFT)
+        ttk.Entry(sheets_row, textvariable=self.excel_sheets_var, width=30).pack(side=tk.LEFT, padx=(10, 10))
+        ttk.Label(sheets_row, text="blank = first sheet, * = all sheets, or names separated by commas",
+                 foreground='gray', font=('Arial', 9)).pack(side=tk.LEFT)
+        
+        ttk.Label(sources_frame, text="Extra workbooks (one per line: path | sheets):").pack(anchor=tk.W)
+        workbooks_row = ttk.Frame(sources_frame)
+        workbooks_row.pack(fill=tk.X, pady=(0, 5))
+        self.extra_sources_text = tk.Text(workbooks_row, height=3, width=60)
+        self.extra_sources_text.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(workbooks_row, text="Add Workbook", 
+                  command=self.add_extra_workbook).pack(side=tk.LEFT, padx=(10, 0), anchor=tk.N)
+        
+        ttk.Label(sources_frame, text="Header mapping (one per line: Source Header = Common Header):").pack(anchor=tk.W)
+        self.header_mapping_text = tk.Text(sources_frame, height=3, width=60)
+        self.header_mapping_text.pack(fill=tk.X)
+        
+        # Fill in saved sources and mapping
+        for source in self.saved_config.get('catalog_sources', []):
+            self.extra_sources_text.insert(tk.END, f"{source.get('path', '')} | {source.get('sheets', '')}\n")
+        for header, common in self.saved_config.get('header_mapping', {}).items():
+            self.header_mapping_text.insert(tk.END, f"{header} = {common}\n")
+        
         # Preview Frame
         preview_frame = ttk.LabelFrame(main_frame, text="Products Preview", padding=15)
         preview_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Preview text widget
-        self.preview_text = scrolledtext.ScrolledText(preview_frame, height=15, width=70)
-        self.preview_text.pack(fill=tk.BOTH, expand=True)
+        # Catalog summary and virtualized grid (renders only visible rows)
+        self.preview_summary_label = ttk.Label(preview_frame, text="No Excel file loaded", justify=tk.LEFT)
+        self.preview_summary_label.pack(anchor=tk.W, pady=(0, 5))
+        
+        self.catalog_grid = CatalogGrid(preview_frame, self.thumbnails, lambda: self.image_column_var.get().strip())
+        self.catalog_grid.pack(fill=tk.BOTH, expand=True)
         
         # Control buttons
         btn_frame = ttk.Frame(preview_frame)
@@ -230,9 +2690,17 @@ class TelegramProductPoster:
         preview_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         refresh_btn = ttk.Button(btn_frame, text="Refresh Data", 
-                                command=self.refresh_excel_data)
+                                command=self.start_catalog_load)
         refresh_btn.pack(side=tk.LEFT)
         
+        self.cancel_load_btn = ttk.Button(btn_frame, text="Cancel Loading", state=tk.DISABLED,
+                                         command=self.cancel_catalog_load)
+        self.cancel_load_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Show a catalog loaded before this tab was opened
+        if self.products_df is not None:
+            self.preview_excel_file()
+        
     def create_message_tab(self, parent):
         """Create message customization tab"""
         main_frame = ttk.Frame(parent)
@@ -242,6 +2710,20 @@ class TelegramProductPoster:
         template_frame = ttk.LabelFrame(main_frame, text="Message Template", padding=15)
         template_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
+        # Named templates - channels pick one with "@channel | name" on the configuration tab
+        selector_frame = ttk.Frame(template_frame)
+        selector_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(selector_frame, text="Template:").pack(side=tk.LEFT)
+        self.template_selector = ttk.Combobox(selector_frame, textvariable=self.template_name_var, 
+                                              state='readonly', width=20)
+        self.template_selector.pack(side=tk.LEFT, padx=(10, 10))
+        self.template_selector.bind('<<ComboboxSelected>>', self.on_template_selected)
+        ttk.Button(selector_frame, text="New Template", 
+                  command=self.add_named_template).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(selector_frame, text="Delete Template", 
+                  command=self.delete_named_template).pack(side=tk.LEFT)
+        
         ttk.Label(template_frame, text="Enter your custom message template:").pack(anchor=tk.W, pady=(0, 5))
         
         self.message_template = tk.Text(template_frame, height=10, width=70, wrap=tk.WORD)
@@ -270,7 +2752,6 @@ class TelegramProductPoster:
         image_row1 = ttk.Frame(image_frame)
         image_row1.pack(fill=tk.X, pady=(0, 10))
         
-        self.include_image_var = tk.BooleanVar(value=False)
         image_checkbox = ttk.Checkbutton(image_row1, text="📷 Include images in posts", 
                                         variable=self.include_image_var, 
                                         command=self.toggle_image_settings)
@@ -281,7 +2762,6 @@ class TelegramProductPoster:
         image_row2.pack(fill=tk.X, pady=(0, 5))
         
         ttk.Label(image_row2, text="Image column name in Excel:").pack(side=tk.LEFT)
-        self.image_column_var = tk.StringVar(value="Image Url")
         self.image_column_entry = ttk.Entry(image_row2, textvariable=self.image_column_var, width=25)
         self.image_column_entry.pack(side=tk.LEFT, padx=(10, 0))
         
@@ -292,8 +2772,17 @@ class TelegramProductPoster:
                               foreground='gray', font=('Arial', 9))
         image_help.pack(anchor=tk.W, pady=(5, 0))
         
-        # Initially disable image column entry if not checked
-        self.root.after(10, self.toggle_image_settings)
+        # Broken image URLs are found before posting instead of by failed sendPhoto calls
+        image_row3 = ttk.Frame(image_frame)
+        image_row3.pack(fill=tk.X, pady=(10, 0))
+        
+        ttk.Checkbutton(image_row3, text="Check image URLs before posting", 
+                       variable=self.check_images_var).pack(side=tk.LEFT)
+        ttk.Label(image_row3, text="Broken image:").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Radiobutton(image_row3, text="Post as text", variable=self.bad_image_action_var, 
+                       value="text").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Radiobutton(image_row3, text="Skip product", variable=self.bad_image_action_var, 
+                       value="skip").pack(side=tk.LEFT, padx=(10, 0))
         
         # Column Selection - now dynamic based on Excel file
         columns_frame = ttk.LabelFrame(main_frame, text="Available Excel Columns", padding=15)
@@ -321,6 +2810,14 @@ class TelegramProductPoster:
         help_template_btn = ttk.Button(btn_frame, text="Show Excel Columns", 
                                       command=self.show_column_helper)
         help_template_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Initially disable image column entry if not checked
+        self.toggle_image_settings()
+        
+        # Apply saved template, then columns of a catalog loaded before this tab was opened
+        self.load_message_settings(self.saved_config)
+        if self.products_df is not None:
+            self.update_column_options()
     
     def toggle_image_settings(self):
         """Enable/disable image column entry based on checkbox"""
@@ -338,7 +2835,7 @@ class TelegramProductPoster:
                 return
             
             # Get actual column names from Excel (exactly as they appear in the header row)
-            columns = [col for col in self.products_df.columns if col not in ['posted_date', 'posted_status']]
+            columns = [col for col in self.products_df.columns if col not in TRACKING_COLUMNS]
             
             # Create helper window
             helper_window = tk.Toplevel(self.root)
@@ -421,8 +2918,9 @@ Your Excel has {len(columns)} columns:"""
                 return
             
             # Get first product for preview
-            first_product = self.products_df.iloc[0]
-            preview_message = self.format_custom_message(first_product)
+            _, first_product = product_rows(self.products_df, [0])[0]
+            template = self.message_template.get(1.0, tk.END).strip()
+            preview_message = self.render_template(first_product, template)
             
             # Show preview in a new window
             preview_window = tk.Toplevel(self.root)
@@ -460,7 +2958,7 @@ Your Excel has {len(columns)} columns:"""
         """Reset message template to use actual Excel column headers"""
         if hasattr(self, 'products_df') and self.products_df is not None:
             # Use actual Excel headers to create a dynamic template
-            columns = [col for col in self.products_df.columns if col not in ['posted_date', 'posted_status']]
+            columns = [col for col in self.products_df.columns if col not in TRACKING_COLUMNS]
             
             if len(columns) >= 1:
                 # Create template using actual column headers
@@ -513,30 +3011,96 @@ Your Excel has {len(columns)} columns:"""
         self.message_template.delete(1.0, tk.END)
         self.message_template.insert(1.0, default_template)
 
-    def format_custom_message(self, product_row):
+    def on_template_selected(self, event=None):
+        """Keep the edited template and show the selected one"""
+        self.templates[self.editing_template] = self.message_template.get(1.0, tk.END).strip()
+        self.editing_template = self.template_name_var.get()
+        self.message_template.delete(1.0, tk.END)
+        self.message_template.insert(1.0, self.templates.get(self.editing_template, ''))
+        
+    def add_named_template(self):
+        """Add a named template, starting from a copy of the one being edited"""
+        name = simpledialog.askstring("New Template", "Template name (e.g. english, euro-channels):", 
+                                      parent=self.root)
+        name = (name or '').replace('|', '').strip()
+        if not name:
+            return
+        if name in self.get_template_names():
+            messagebox.showerror("Error", f"A template named '{name}' already exists.")
+            return
+        self.templates[name] = self.message_template.get(1.0, tk.END).strip()
+        self.update_template_selector()
+        self.template_name_var.set(name)
+        self.on_template_selected()
+        
+    def delete_named_template(self):
+        """Delete the selected named template (the default one is kept)"""
+        name = self.editing_template
+        if name == DEFAULT_TEMPLATE_NAME:
+            messagebox.showwarning("Warning", "The default template can't be deleted.")
+            return
+        if not messagebox.askyesno("Delete Template", f"Delete template '{name}'? "
+                                   f"Channels using it will fall back to the default template."):
+            return
+        self.templates.pop(name, None)
+        self.editing_template = DEFAULT_TEMPLATE_NAME
+        self.template_name_var.set(DEFAULT_TEMPLATE_NAME)
+        self.message_template.delete(1.0, tk.END)
+        self.message_template.insert(1.0, self.templates.get(DEFAULT_TEMPLATE_NAME, ''))
+        self.update_template_selector()
+        
+    def update_template_selector(self):
+        """Refresh the template choices shown on the message tab"""
+        if hasattr(self, 'template_selector'):
+            self.template_selector['values'] = self.get_template_names()
+            
+    def get_template_names(self):
+        """Return the default template name followed by the named templates"""
+        names = sorted(name for name in self.templates if name != DEFAULT_TEMPLATE_NAME)
+        return [DEFAULT_TEMPLATE_NAME] + names
+        
+    def get_template(self, name=DEFAULT_TEMPLATE_NAME):
+        """Return a template's text; unknown names fall back to the default template"""
+        if name not in self.templates and name != self.editing_template:
+            name = DEFAULT_TEMPLATE_NAME
+        if name == self.editing_template:
+            # The template being edited is live in the text box
+            return self.message_template.get(1.0, tk.END).strip()
+        return self.templates.get(name, '')
+        
+    def get_all_templates(self):
+        """Return every template by name, including unsaved edits of the selected one"""
+        templates = dict(self.templates)
+        if hasattr(self, 'message_template'):
+            templates[self.editing_template] = self.message_template.get(1.0, tk.END).strip()
+        return templates
+        
+    def render_template(self, product_row, template, timestamp=None):
+        """Render a template for a product, reusing an identical earlier render"""
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M')
+        # The timestamp and tracking columns only distinguish renders of templates that show them
+        tracked = tuple(product_row.get(column) for column in TRACKING_COLUMNS if '{' + column in template)
+        key = (template, row_digest(product_row), timestamp if '{timestamp}' in template else None, tracked)
+        return self.render_cache.get_or_render(
+            key, lambda: self.format_custom_message(product_row, timestamp, template))
+        
+    def format_custom_message(self, product_row, timestamp=None, template=None):
         """Format product information using custom template with original Excel headers"""
         try:
             # Get the template
-            template = self.message_template.get(1.0, tk.END).strip()
+            if template is None:
+                template = self.message_template.get(1.0, tk.END).strip()
             
             # Create a dictionary with all actual Excel column values
             values = {}
             
             # Use actual column headers from the Excel file
             if hasattr(self, 'products_df') and self.products_df is not None:
-                for col in self.products_df.columns:
-                    if col in product_row and pd.notna(product_row[col]):
-                        value = str(product_row[col]).strip()
-                        # Don't show empty values or just whitespace
-                        if value and value != 'nan' and value != 'NaN':
-                            values[col] = value
-                        else:
-                            values[col] = ""
-                    else:
-                        values[col] = ""  # Empty if no data
+                # Empty if no data (NaN or just whitespace)
+                values = {col: cell_text(value) for col, value in product_row.items()}
             
             # Add timestamp
-            values['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M')
+            values['timestamp'] = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M')
             
             # Add social media signature
             values['youtube_channel'] = "📺 YouTube: https://www.youtube.com/@techmouad"
@@ -600,8 +3164,7 @@ Your Excel has {len(columns)} columns:"""
         
         # Posting mode
         ttk.Label(settings_frame, text="Posting Mode:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        self.posting_mode_var = tk.StringVar(value="unposted_only")
-        
+
         mode_frame = ttk.Frame(settings_frame)
         mode_frame.grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
@@ -612,15 +3175,70 @@ Your Excel has {len(columns)} columns:"""
         
         # Delay between posts
         ttk.Label(settings_frame, text="Delay between posts (seconds):").grid(row=1, column=0, sticky=tk.W, pady=5)
-        self.delay_var = tk.IntVar(value=30)
         delay_spin = ttk.Spinbox(settings_frame, from_=5, to=300, textvariable=self.delay_var, width=10)
         delay_spin.grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
         # Maximum posts per session
         ttk.Label(settings_frame, text="Maximum posts per session:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        self.max_posts_var = tk.IntVar(value=10)
-        max_posts_spin = ttk.Spinbox(settings_frame, from_=1, to=100, textvariable=self.max_posts_var, width=10)
-        max_posts_spin.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        max_posts_frame = ttk.Frame(settings_frame)
+        max_posts_frame.grid(row=2, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        max_posts_spin = ttk.Spinbox(max_posts_frame, from_=1, to=1000000, textvariable=self.max_posts_var, width=10)
+        max_posts_spin.pack(side=tk.LEFT)
+        ttk.Checkbutton(max_posts_frame, text="Continuous (no limit, then keep watching the Excel file for new rows)", 
+                       variable=self.continuous_var).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Product filter expression (evaluated against indexed catalog columns)
+        ttk.Label(settings_frame, text="Product filter (optional):").grid(row=3, column=0, sticky=tk.W, pady=5)
+        filter_frame = ttk.Frame(settings_frame)
+        filter_frame.grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        ttk.Entry(filter_frame, textvariable=self.filter_expr_var, width=45).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Check Filter", 
+                  command=self.check_filter_expression).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(settings_frame, 
+                 text='e.g. category == "Shoes" and [Sale Price] between 10 and 50 and added >= yesterday',
+                 foreground='gray', font=('Arial', 9)).grid(row=4, column=1, sticky=tk.W, padx=(10, 0))
+        
+        # Long messages
+        ttk.Checkbutton(settings_frame, text="Auto-split messages over Telegram's length limits", 
+                       variable=self.auto_split_var).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Edit-in-place sync of already posted products
+        ttk.Label(settings_frame, text="Product ID column:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        id_frame = ttk.Frame(settings_frame)
+        id_frame.grid(row=6, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        ttk.Entry(id_frame, textvariable=self.id_column_var, width=20).pack(side=tk.LEFT)
+        ttk.Label(id_frame, text="blank = detect (id, sku, ...) or first column", 
+                 foreground='gray', font=('Arial', 9)).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Checkbutton(settings_frame, text="Update edited products in place before posting new ones", 
+                       variable=self.sync_before_posting_var).grid(row=7, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        profile_frame = ttk.Frame(settings_frame)
+        profile_frame.grid(row=8, column=0, columnspan=3, sticky=tk.W, pady=5)
+        ttk.Checkbutton(profile_frame, text="Profile sessions (report in 'profiles' folder)", 
+                       variable=self.profile_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(profile_frame, text="Flame graph", 
+                       variable=self.profile_flame_var).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Several computers can share the posting queue through one SQLite file
+        ttk.Label(settings_frame, text="Shared job store (optional):").grid(row=9, column=0, sticky=tk.W, pady=5)
+        job_store_frame = ttk.Frame(settings_frame)
+        job_store_frame.grid(row=9, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        ttk.Entry(job_store_frame, textvariable=self.job_store_var, width=40).pack(side=tk.LEFT)
+        ttk.Label(job_store_frame, text="SQLite file on shared storage; blank = this computer only", 
+                 foreground='gray', font=('Arial', 9)).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Digest channels ("@channel | template | digest 60") get several products per message
+        ttk.Label(settings_frame, text="Digests:").grid(row=10, column=0, sticky=tk.W, pady=5)
+        digest_frame = ttk.Frame(settings_frame)
+        digest_frame.grid(row=10, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        ttk.Spinbox(digest_frame, from_=2, to=100, textvariable=self.digest_size_var, width=5).pack(side=tk.LEFT)
+        ttk.Label(digest_frame, text="products, best first by:").pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Entry(digest_frame, textvariable=self.digest_order_var, width=20).pack(side=tk.LEFT)
+        ttk.Label(digest_frame, text="header:").pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Entry(digest_frame, textvariable=self.digest_header_var, width=30).pack(side=tk.LEFT)
+        ttk.Label(settings_frame, 
+                 text="e.g. order by 'discount_percentage desc'; header can use {count} and {timestamp}",
+                 foreground='gray', font=('Arial', 9)).grid(row=11, column=1, sticky=tk.W, padx=(10, 0))
         
         # Control buttons
         control_frame = ttk.Frame(main_frame)
@@ -639,7 +3257,32 @@ Your Excel has {len(columns)} columns:"""
         # Preview post button
         preview_post_btn = ttk.Button(control_frame, text="Preview Next Post", 
                                      command=self.preview_next_post)
-        preview_post_btn.pack(side=tk.LEFT)
+        preview_post_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Dry run button - validates the whole session offline
+        dry_run_btn = ttk.Button(control_frame, text="Dry Run (no sending)", 
+                                command=self.start_dry_run)
+        dry_run_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Sync button - edits posted messages whose product data changed
+        sync_btn = ttk.Button(control_frame, text="Sync Edited Posts", 
+                             command=self.start_sync)
+        sync_btn.pack(side=tk.LEFT)
+        
+        # Retention - delete posts that expired
+        retention_frame = ttk.LabelFrame(main_frame, text="Clean Up Old Posts", padding=15)
+        retention_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        ttk.Label(retention_frame, text="Delete posts older than (days, 0 = never):").grid(row=0, column=0, sticky=tk.W, pady=2)
+        ttk.Spinbox(retention_frame, from_=0, to=3650, textvariable=self.retention_days_var, 
+                   width=10).grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=2)
+        ttk.Label(retention_frame, text="Delete when stock column is 0 (blank = off):").grid(row=1, column=0, sticky=tk.W, pady=2)
+        ttk.Entry(retention_frame, textvariable=self.retention_stock_column_var, 
+                 width=20).grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=2)
+        ttk.Checkbutton(retention_frame, text="Delete posts of products removed from the Excel file", 
+                       variable=self.retention_removed_var).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=2)
+        ttk.Button(retention_frame, text="Delete Expired Posts", 
+                  command=self.start_cleanup).grid(row=0, column=2, rowspan=3, padx=(20, 0))
         
         # Status frame
         status_frame = ttk.LabelFrame(main_frame, text="Posting Status", padding=15)
@@ -651,7 +3294,6 @@ Your Excel has {len(columns)} columns:"""
         self.status_label.pack(anchor=tk.W, pady=(0, 10))
         
         # Progress bar
-        self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(status_frame, variable=self.progress_var, 
                                           maximum=100, length=400)
         self.progress_bar.pack(fill=tk.X, pady=(0, 10))
@@ -673,6 +3315,9 @@ Your Excel has {len(columns)} columns:"""
         self.action_label = ttk.Label(status_frame, text="", foreground='blue')
         self.action_label.pack(anchor=tk.W)
         
+        # Show statistics of a catalog loaded before this tab was opened
+        self.update_statistics()
+        
     def create_logs_tab(self, parent):
         """Create logs display tab"""
         main_frame = ttk.Frame(parent)
@@ -698,6 +3343,9 @@ Your Excel has {len(columns)} columns:"""
         export_btn = ttk.Button(btn_frame, text="Export Logs", command=self.export_logs)
         export_btn.pack(side=tk.LEFT)
         
+        # Show messages logged before this tab was opened
+        self.flush_log_buffer()
+        
     def create_about_tab(self, parent):
         """Create about developer tab with social media links"""
         main_frame = ttk.Frame(parent)
@@ -859,12 +3507,27 @@ Happy posting! 🚀"""
                     config = json.load(f)
                     self.bot_token_var.set(config.get('bot_token', ''))
                     self.excel_file_path.set(config.get('excel_file_path', ''))
+                    self.excel_sheets_var.set(config.get('excel_sheets', ''))
+                    self.filter_expr_var.set(config.get('filter_expression', ''))
+                    self.auto_split_var.set(config.get('auto_split_long_messages', False))
+                    self.id_column_var.set(config.get('id_column', ''))
+                    self.sync_before_posting_var.set(config.get('sync_edits_before_posting', False))
+                    self.retention_days_var.set(config.get('retention_max_age_days', 0))
+                    self.continuous_var.set(config.get('continuous_posting', False))
+                    self.job_store_var.set(config.get('job_store_path', ''))
+                    self.fanout_channel_var.set(config.get('fanout_channel', ''))
+                    self.api_url_var.set(config.get('api_url', ''))
+                    self.api_local_var.set(config.get('api_local_mode', False))
+                    self.digest_size_var.set(config.get('digest_size', 10))
+                    self.digest_order_var.set(config.get('digest_order', ''))
+                    self.digest_header_var.set(config.get('digest_header', "🔥 Top {count} deals - {timestamp}"))
+                    self.check_images_var.set(config.get('check_image_urls', True))
+                    self.bad_image_action_var.set(config.get('bad_image_action', 'text'))
+                    self.retention_removed_var.set(config.get('retention_delete_removed', False))
+                    self.retention_stock_column_var.set(config.get('retention_stock_column', ''))
                     
-                    # Load channels after UI is created
-                    self.root.after(100, lambda: self.load_channels(config.get('target_channels', [])))
-                    
-                    # Load message template and column settings
-                    self.root.after(200, lambda: self.load_message_settings(config))
+                    # Channels and message settings are applied when their tabs are built
+                    self.saved_config = config
                         
         except Exception as e:
             logging.error(f"Error loading config: {e}")
@@ -877,6 +3540,14 @@ Happy posting! 🚀"""
                 self.message_template.delete(1.0, tk.END)
                 self.message_template.insert(1.0, config['message_template'])
             
+            # Load named channel templates; the default one is edited first
+            if hasattr(self, 'message_template'):
+                self.templates = dict(config.get('channel_templates', {}))
+                self.templates[DEFAULT_TEMPLATE_NAME] = self.message_template.get(1.0, tk.END).strip()
+                self.editing_template = DEFAULT_TEMPLATE_NAME
+                self.template_name_var.set(DEFAULT_TEMPLATE_NAME)
+                self.update_template_selector()
+            
             # Load column settings
             if hasattr(self, 'column_vars') and config.get('column_settings'):
                 for col, value in config['column_settings'].items():
@@ -898,28 +3569,53 @@ Happy posting! 🚀"""
     def save_config(self):
         """Save configuration to file"""
         try:
-            # Get channels from text widget
-            channels_text = self.channels_text.get(1.0, tk.END).strip()
-            channels = [line.strip() for line in channels_text.split('\n') if line.strip()]
+            # Build the message tab so an unopened tab doesn't save an empty template
+            self.ensure_tab('message')
+            
+            # Get channel lines (with their template names) from text widget
+            channels = self.get_channel_lines()
             
-            # Get message template and column settings
-            template = ""
+            # Get message templates and column settings
+            templates = self.get_all_templates()
+            template = templates.pop(DEFAULT_TEMPLATE_NAME, "")
             column_settings = {}
-            if hasattr(self, 'message_template'):
-                template = self.message_template.get(1.0, tk.END).strip()
             if hasattr(self, 'column_vars'):
                 column_settings = {col: var.get() for col, var in self.column_vars.items()}
             
             config = {
                 'bot_token': self.bot_token_var.get(),
                 'excel_file_path': self.excel_file_path.get(),
+                'excel_sheets': self.excel_sheets_var.get().strip(),
+                'catalog_sources': self.get_extra_sources(),
+                'header_mapping': self.get_header_mapping(),
                 'target_channels': channels,
                 'message_template': template,
-                'column_settings': column_settings
+                'channel_templates': templates,
+                'column_settings': column_settings,
+                'filter_expression': self.filter_expr_var.get().strip(),
+                'auto_split_long_messages': self.auto_split_var.get(),
+                'id_column': self.id_column_var.get().strip(),
+                'sync_edits_before_posting': self.sync_before_posting_var.get(),
+                'continuous_posting': self.continuous_var.get(),
+                'job_store_path': self.job_store_var.get().strip(),
+                'fanout_channel': self.fanout_channel_var.get().strip(),
+                'api_url': self.api_url_var.get().strip(),
+                'api_local_mode': self.api_local_var.get(),
+                'digest_size': self.digest_size_var.get(),
+                'digest_order': self.digest_order_var.get().strip(),
+                'digest_header': self.digest_header_var.get(),
+                # Only set by editing config.json
+                'pipeline_workers': self.saved_config.get('pipeline_workers', {}),
+                'check_image_urls': self.check_images_var.get(),
+                'bad_image_action': self.bad_image_action_var.get(),
+                'retention_max_age_days': self.retention_days_var.get(),
+                'retention_delete_removed': self.retention_removed_var.get(),
+                'retention_stock_column': self.retention_stock_column_var.get().strip()
             }
             
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4, ensure_ascii=False)
+            self.saved_config = config
                 
             messagebox.showinfo("Success", "Configuration saved successfully!")
             logging.info("Configuration saved successfully")
@@ -936,85 +3632,342 @@ Happy posting! 🚀"""
         )
         
         if file_path:
+            if self.worker_running:
+                messagebox.showwarning("Warning", "Stop posting and wait for it to finish before choosing another Excel file.")
+                return
             self.excel_file_path.set(file_path)
             self.log_message(f"Excel file selected: {file_path}")
-            self.refresh_excel_data()
+            self.start_catalog_load()
             
     def refresh_excel_data(self):
-        """Refresh Excel data and update statistics - preserves EXACT original headers."""
+        """Reload the catalog while posting - preserves EXACT original headers and the message template.
+        
+        Reads on the calling (posting) thread and installs on the Tk thread,
+        waiting until the new catalog is in place; returns True if it was
+        installed. The UI uses start_catalog_load() instead.
+        """
         try:
-            file_path = self.excel_file_path.get()
-            if not file_path or not os.path.exists(file_path):
-                return
-
-            df = None
-            if file_path.lower().endswith('.xls'):
-                # Try xlrd first, then pyexcel, then raise error
-                try:
-                    df = pd.read_excel(file_path, header=0, engine='xlrd')
-                except Exception as e1:
-                    try:
-                        import pyexcel as pe
-                        records = pe.get_records(file_name=file_path)
-                        df = pd.DataFrame(list(records))
-                    except Exception as e2:
-                        self.log_message(f"Error reading .xls file: {e1} | {e2}")
-                        messagebox.showerror("Error", "Could not read .xls file. Please convert it to .xlsx or install the required engines (xlrd < 2.0.0, pyexcel, pyexcel-xls).\n\nError details: {} | {}".format(e1, e2))
-                        return
-            else:
-                try:
-                    df = pd.read_excel(file_path, header=0)
-                except Exception as e:
-                    self.log_message(f"Error reading Excel file: {e}")
-                    messagebox.showerror("Error", f"Could not read Excel file: {e}")
-                    return
-
-            if df is None or not isinstance(df, pd.DataFrame) or df.empty:
-                self.log_message("Error: Loaded DataFrame is empty or invalid.")
-                messagebox.showerror("Error", "Loaded Excel file is empty or invalid.")
-                return
+            catalog = self.load_catalog()
+        except Exception as e:
+            self.log_message(f"Error refreshing Excel data: {e}")
+            return False
+        if catalog is None:
+            return False
+        if threading.current_thread() is threading.main_thread():
+            self.install_catalog(catalog, reset_template=False)
+            return True
+            
+        installed = threading.Event()
+        
+        def install():
+            try:
+                self.install_catalog(catalog, reset_template=False)
+            finally:
+                installed.set()
+                
+        self.root.after(0, install)
+        # The Tk loop may be closing: stop waiting once posting is stopped or it takes too long
+        deadline = time.monotonic() + CATALOG_INSTALL_TIMEOUT
+        while not installed.wait(0.5):
+            if not self.posting_active:
+                return False
+            if time.monotonic() > deadline:
+                self.log_message("⚠️ The reloaded catalog wasn't put in place - continuing with the current one")
+                return False
+        return True
+                
+    def load_catalog(self, progress=None):
+        """Read and merge every catalog sheet without touching the loaded catalog.
+        
+        Returns the new catalog (for install_catalog) or None when no file is set.
+        `progress(rows)` is called while reading and may raise CatalogLoadCancelled.
+        Unreadable or empty catalogs raise ValueError.
+        """
+        file_path = self.excel_file_path.get().strip()
+        if not file_path or not (is_remote_source(file_path) or os.path.exists(file_path)):
+            return None
 
-            # PRESERVE EXACT ORIGINAL HEADERS - only strip whitespace, no renaming
-            df.columns = [str(col).strip() for col in df.columns]
-            df = df.dropna(axis=1, how='all')
+        # Every configured sheet of every workbook, parsed in parallel processes.
+        # Feeds whose content didn't change reuse the frame parsed last time.
+        jobs = self.get_catalog_jobs()
+        if not jobs:
+            return None
+        mtimes = self.get_catalog_mtimes({path for path, _ in jobs})
+        started = time.perf_counter()
+        parsed = {job: frame for job, (version, frame) in self.feed_frames.items() if mtimes.get(job[0]) == version}
+        try:
+            changed = [job for job in jobs if job not in parsed]
+            parsed.update(zip(changed, read_catalog_sheets(changed, progress) if changed else []))
+            frames = [parsed[job] for job in jobs]
+        except CatalogLoadCancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"Could not read Excel file: {e}") from e
 
-            # Log the actual headers we found
-            self.log_message(f"Found Excel headers: {list(df.columns)}")
+        # Union under the common header mapping, remembering each row's source
+        mapping = self.get_header_mapping()
+        layout = []
+        feed_frames = {}
+        for (path, sheet), frame in zip(jobs, frames):
+            url = self.feed_cache.urls.get(path)
+            if url:
+                feed_frames[(path, sheet)] = (mtimes.get(path), frame)
+            renames = {col: mapping[col] for col in frame.columns if mapping.get(col, col) != col}
+            frame = frame.rename(columns=renames)
+            layout.append({'path': path, 'sheet': sheet, 'renames': renames, 'columns': list(frame.columns)})
+            if url:
+                frame = self.apply_feed_status(frame, self.feed_cache.load_status(path))
+            if len(jobs) > 1:
+                frame['source_file'] = url or path
+                frame['source_sheet'] = str(sheet)
+            frames[len(layout) - 1] = frame
+        df = pd.concat(frames, ignore_index=True, sort=False) if len(frames) > 1 else frames[0]
+        if len(jobs) > 1:
+            self.log_message(f"Read {len(df)} rows from {len(jobs)} sheets ({len(changed)} parsed) in "
+                             f"{time.perf_counter() - started:.2f} seconds")
 
-            # ONLY add tracking columns if they don't exist - NO OTHER COLUMN MODIFICATIONS
-            if 'posted_date' not in df.columns:
-                df['posted_date'] = ''
-            if 'posted_status' not in df.columns:
-                df['posted_status'] = 'pending'
+        if df is None or not isinstance(df, pd.DataFrame) or df.empty:
+            raise ValueError("Loaded Excel file is empty or invalid.")
 
-            # Store DataFrame WITHOUT modifying the original file
-            self.products_df = df
+        # Log the actual headers we found
+        self.log_message(f"Found Excel headers: {list(df.columns)}")
 
-            # Update statistics
-            total = len(self.products_df)
-            posted = len(self.products_df[self.products_df['posted_status'] == 'posted'])
-            pending = total - posted
+        # ONLY add tracking columns if they don't exist - NO OTHER COLUMN MODIFICATIONS
+        if 'posted_date' not in df.columns:
+            df['posted_date'] = ''
+        if 'posted_status' not in df.columns:
+            df['posted_status'] = 'pending'
+        if 'channel_status' not in df.columns:
+            df['channel_status'] = ''
 
-            if hasattr(self, 'total_products_label'):
-                self.total_products_label.config(text=f"Total Products: {total}")
-                self.posted_products_label.config(text=f"Posted: {posted}")
-                self.pending_products_label.config(text=f"Pending: {pending}")
+        # Compact dtypes (categoricals, status enum, Arrow strings, downcast numbers)
+        memory_before = df.memory_usage(deep=True).sum()
+        df = compact_products_df(df)
+        memory_after = df.memory_usage(deep=True).sum()
+        logging.info(f"Catalog memory: {memory_before / 1e6:.1f} MB -> {memory_after / 1e6:.1f} MB")
+        return {'df': df, 'layout': layout, 'mtimes': mtimes, 'feed_frames': feed_frames}
+        
+    def install_catalog(self, catalog, reset_template=True):
+        """Swap in a catalog returned by load_catalog() and refresh the views (Tk thread only).
+        
+        Reloads during posting pass reset_template=False so the user's template is kept.
+        """
+        # Store DataFrame WITHOUT modifying the original file
+        self.products_df = catalog['df']
+        self.catalog_layout = catalog['layout']
+        self.catalog_mtimes = catalog['mtimes']
+        self.feed_frames = catalog['feed_frames']
+        self.catalog_index = None
 
-            # DO NOT save back to Excel file here - preserve original file
-            # Only save when actually posting products
+        # Update statistics and the catalog grid
+        self.update_statistics()
+        if hasattr(self, 'catalog_grid'):
+            self.preview_excel_file()
 
-            # Update the message template tab with new columns
-            self.update_column_options()
+        # DO NOT save back to Excel file here - preserve original file
+        # Only save when actually posting products
 
-        except Exception as e:
-            self.log_message(f"Error refreshing Excel data: {e}")
+        # Update the message template tab with new columns
+        self.update_column_options(reset_template)
+        
+    def start_catalog_load(self):
+        """Load the catalog on a background thread, showing progress until it is swapped in.
+        
+        While posting runs the load waits until it ends: the worker writes to
+        the rows of the catalog it started with and reloads it itself.
+        """
+        if self.worker_running:
+            if not self.catalog_load_deferred:
+                self.log_message("Posting is running - the catalog will be reloaded when it ends")
+            self.catalog_load_deferred = True
+            return
+        self.catalog_load_deferred = False
+        file_path = self.excel_file_path.get().strip()
+        if not file_path or not (is_remote_source(file_path) or os.path.exists(file_path)):
+            return
+        if self.catalog_load is not None:
+            # A newer load replaces one still running
+            self.catalog_load['cancel'].set()
+        load = {'cancel': threading.Event(), 'rows': 0, 'started': time.monotonic()}
+        self.catalog_load = load
+        
+        def progress(rows):
+            load['rows'] = rows
+            if load['cancel'].is_set():
+                raise CatalogLoadCancelled()
+                
+        def run():
+            catalog = error = None
+            try:
+                catalog = self.load_catalog(progress)
+            except CatalogLoadCancelled:
+                return
+            except Exception as e:
+                error = e
+            self.root.after(0, lambda: self.finish_catalog_load(load, catalog, error))
+            
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        if hasattr(self, 'cancel_load_btn'):
+            self.cancel_load_btn.config(state=tk.NORMAL)
+        self.show_catalog_load_progress(load)
+        
+    def show_catalog_load_progress(self, load):
+        """Show rows parsed and elapsed time of a running load, updating until it ends"""
+        if self.catalog_load is not load:
+            return
+        self.update_action(f"Loading catalog: {load['rows']:,} rows parsed, "
+                           f"{time.monotonic() - load['started']:.0f} seconds...")
+        self.root.after(LOG_UI_INTERVAL, lambda: self.show_catalog_load_progress(load))
+        
+    def cancel_catalog_load(self):
+        """Stop the running catalog load, keeping the catalog loaded before it"""
+        if self.catalog_load is None:
+            return
+        self.catalog_load['cancel'].set()
+        self.catalog_load = None
+        if hasattr(self, 'cancel_load_btn'):
+            self.cancel_load_btn.config(state=tk.DISABLED)
+        self.update_action("")
+        self.log_message("Catalog loading cancelled")
+        
+    def finish_catalog_load(self, load, catalog, error):
+        """Install a finished background load (on the main thread) unless it was cancelled"""
+        if self.catalog_load is not load:
+            return
+        self.catalog_load = None
+        if hasattr(self, 'cancel_load_btn'):
+            self.cancel_load_btn.config(state=tk.DISABLED)
+        self.update_action("")
+        if error is not None:
+            self.log_message(f"Error refreshing Excel data: {error}")
+            if isinstance(error, ValueError):
+                messagebox.showerror("Error", str(error))
+        elif self.worker_running:
+            # Posting started while this was loading
+            self.start_catalog_load()
+        elif catalog is not None:
+            self.install_catalog(catalog)
+            self.log_message(f"Loaded {len(catalog['df']):,} products in "
+                             f"{time.monotonic() - load['started']:.1f} seconds")
+    
+    def add_extra_workbook(self):
+        """Browse for an extra workbook and add it to the sources list"""
+        file_path = filedialog.askopenfilename(
+            title="Select Excel File",
+            filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.extra_sources_text.insert(tk.END, f"{file_path} | *\n")
+            
+    def get_extra_sources(self):
+        """Return extra workbooks as [{'path', 'sheets'}] from the Excel tab or saved config"""
+        if not hasattr(self, 'extra_sources_text'):
+            return self.saved_config.get('catalog_sources', [])
+        sources = []
+        for line in self.extra_sources_text.get(1.0, tk.END).splitlines():
+            path, _, sheets = line.partition('|')
+            if path.strip():
+                sources.append({'path': path.strip(), 'sheets': sheets.strip()})
+        return sources
+        
+    def get_header_mapping(self):
+        """Return the source header -> common header mapping"""
+        if not hasattr(self, 'header_mapping_text'):
+            return self.saved_config.get('header_mapping', {})
+        mapping = {}
+        for line in self.header_mapping_text.get(1.0, tk.END).splitlines():
+            header, _, common = line.partition('=')
+            if header.strip() and common.strip():
+                mapping[header.strip()] = common.strip()
+        return mapping
+        
+    def get_catalog_jobs(self):
+        """Return (path, sheet) pairs for the selected file and every extra workbook.
+        
+        Feed URLs are replaced by the path of their downloaded copy.
+        """
+        sources = [{'path': self.excel_file_path.get(), 'sheets': self.excel_sheets_var.get()}]
+        sources += self.get_extra_sources()
+        
+        # Remote feeds are fetched (conditionally, in parallel) and read from their local copy
+        urls = [source['path'].strip() for source in sources if is_remote_source(source['path'])]
+        fetched = self.feed_cache.fetch_all(urls) if urls else {}
+        for url, result in fetched.items():
+            if result['error']:
+                copy = "using the last downloaded copy" if os.path.exists(result['path']) else "skipping it"
+                self.log_message(f"⚠️ Could not fetch {url} ({result['error']}) - {copy}")
+            else:
+                logging.info(f"Feed {url}: {'changed' if result['changed'] else 'unchanged'}")
+        
+        jobs = []
+        for source in sources:
+            path, spec = source['path'].strip(), (source.get('sheets') or '').strip()
+            if path in fetched:
+                path = fetched[path]['path']
+            if not os.path.exists(path):
+                self.log_message(f"Skipping missing workbook: {path}")
+                continue
+            if spec == '*':
+                sheets = list_sheet_names(path) or [0]
+            elif spec:
+                sheets = [name.strip() for name in spec.split(',') if name.strip()]
+            else:
+                # First sheet, by name when possible so it can be written back in place
+                sheets = list_sheet_names(path)[:1] or [0]
+            jobs.extend((path, sheet) for sheet in sheets)
+        return jobs
+        
+    def save_products_df(self):
+        """Write posting status back to each source sheet under its original headers"""
+        df = self.products_df
+        multi_source = len(self.catalog_layout) > 1
+        workbooks = {}
+        feed_status = {}
+        for source in self.catalog_layout:
+            url = self.feed_cache.urls.get(source['path'])
+            if multi_source:
+                rows = df[(df['source_file'] == (url or source['path'])) & (df['source_sheet'] == str(source['sheet']))]
+            else:
+                rows = df
+            if url:
+                # Feeds are read-only - their rows' status goes to a file beside the copy
+                posted = rows[rows['posted_status'] != 'pending']
+                keys = self.product_keys()[posted.index]
+                status = feed_status.setdefault(source['path'], {})
+                status.update(zip(keys, posted[TRACKING_COLUMNS].fillna('').astype(str).to_dict('records')))
+                continue
+            columns = source['columns'] + [col for col in TRACKING_COLUMNS if col not in source['columns']]
+            original_headers = {common: header for header, common in source['renames'].items()}
+            workbooks.setdefault(source['path'], {})[source['sheet']] = rows[columns].rename(columns=original_headers)
+            
+        for path, sheets in workbooks.items():
+            write_catalog_sheets(path, sheets)
+        for path, status in feed_status.items():
+            status.pop("", None)
+            self.feed_cache.save_status(path, status)
+        # Our own writes aren't changes to watch for
+        self.catalog_mtimes = self.get_catalog_mtimes()
+            
+    def update_statistics(self):
+        """Update total/posted/pending labels from the loaded catalog"""
+        if self.products_df is None or not hasattr(self, 'total_products_label'):
+            return
+        total = len(self.products_df)
+        posted = int((self.products_df['posted_status'] == 'posted').sum())
+        pending = total - posted
+        
+        self.total_products_label.config(text=f"Total Products: {total}")
+        self.posted_products_label.config(text=f"Posted: {posted}")
+        self.pending_products_label.config(text=f"Pending: {pending}")
     
-    def update_column_options(self):
+    def update_column_options(self, reset_template=True):
         """Update available columns display when Excel file is loaded"""
         try:
             if hasattr(self, 'columns_display') and self.products_df is not None:
                 # Get all column names (exact headers from Excel)
-                available_columns = [col for col in self.products_df.columns if col not in ['posted_date', 'posted_status']]
+                available_columns = [col for col in self.products_df.columns if col not in TRACKING_COLUMNS]
                 
                 # Create display text with placeholders using exact Excel headers
                 placeholder_text = f"Available placeholders from your Excel file ({len(available_columns)} columns):\n\n"
@@ -1030,51 +3983,38 @@ Happy posting! 🚀"""
                 self.columns_display.config(state=tk.DISABLED)
                 
                 # Auto-generate a template using actual Excel headers
-                self.reset_message_template()
+                if reset_template:
+                    self.reset_message_template()
                 
         except Exception as e:
             logging.error(f"Error updating column options: {e}")
             
     def preview_excel_file(self):
         """Preview the selected Excel file"""
-        file_path = self.excel_file_path.get()
+        file_path = self.excel_file_path.get().strip()
         
-        if not file_path or not os.path.exists(file_path):
+        if not file_path or not (is_remote_source(file_path) or os.path.exists(file_path)):
             messagebox.showerror("Error", "Please select a valid Excel file first.")
             return
             
         try:
             if self.products_df is None:
-                self.refresh_excel_data()
+                # The preview is shown once the background load finishes
+                if self.catalog_load is None:
+                    self.start_catalog_load()
+                return
                 
-            # Clear previous preview
-            self.preview_text.delete(1.0, tk.END)
-            
-            # Display file info
-            self.preview_text.insert(tk.END, f"File: {os.path.basename(file_path)}\n")
-            self.preview_text.insert(tk.END, f"Total Products: {len(self.products_df)}\n")
-            self.preview_text.insert(tk.END, f"Columns: {', '.join(self.products_df.columns)}\n\n")
+            # Show posting statistics
+            posted_count = int((self.products_df['posted_status'] == 'posted').sum())
+            pending_count = len(self.products_df) - posted_count
             
             # No required columns check - accept any Excel structure
-            self.preview_text.insert(tk.END, f"✅ Excel file loaded successfully with {len(self.products_df.columns)} columns\n\n")
-                
-            # Display first few products
-            self.preview_text.insert(tk.END, "First 5 products:\n")
-            self.preview_text.insert(tk.END, "=" * 50 + "\n")
-            
-            for i, row in self.products_df.head(5).iterrows():
-                self.preview_text.insert(tk.END, f"\nProduct {i+1}:\n")
-                for col in self.products_df.columns:
-                    value = str(row[col])[:100]  # Limit display length
-                    self.preview_text.insert(tk.END, f"  {col}: {value}\n")
-                    
-            # Show posting statistics
-            posted_count = len(self.products_df[self.products_df['posted_status'] == 'posted'])
-            pending_count = len(self.products_df[self.products_df['posted_status'] != 'posted'])
+            self.preview_summary_label.config(
+                text=f"✅ {os.path.basename(file_path)}: {len(self.products_df):,} products, "
+                     f"{len(self.products_df.columns)} columns | Posted: {posted_count:,} | Pending: {pending_count:,}")
             
-            self.preview_text.insert(tk.END, f"\n\nPosting Status:\n")
-            self.preview_text.insert(tk.END, f"Posted: {posted_count}\n")
-            self.preview_text.insert(tk.END, f"Pending: {pending_count}\n")
+            # Grid pulls only the visible rows from the DataFrame
+            self.catalog_grid.set_data(self.products_df)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read Excel file: {e}")
@@ -1089,22 +4029,20 @@ Happy posting! 🚀"""
             return
             
         def test_connection():
+            client = self.bot_client()
             try:
                 # Test bot token
-                url = f"https://api.telegram.org/bot{bot_token}/getMe"
-                response = requests.get(url, timeout=10)
+                bot_name = client.call('getMe', timeout=10)['username']
+                messagebox.showinfo("Success", f"Bot connection successful!\nBot: @{bot_name}\nServer: {client.api_url}")
+                logging.info(f"Bot connection test successful: @{bot_name} via {client.api_url}")
                 
-                if response.status_code == 200:
-                    bot_info = response.json()
-                    if bot_info['ok']:
-                        bot_name = bot_info['result']['username']
-                        messagebox.showinfo("Success", f"Bot connection successful!\nBot: @{bot_name}")
-                        logging.info(f"Bot connection test successful: @{bot_name}")
-                    else:
-                        messagebox.showerror("Error", "Invalid bot token")
+            except TelegramAPIError as e:
+                if e.error_code in (401, 404):
+                    messagebox.showerror("Error", f"Invalid bot token ({e.description})")
                 else:
-                    messagebox.showerror("Error", f"Failed to connect: {response.status_code}")
-                    
+                    messagebox.showerror("Error", f"Failed to connect to {client.api_url}: {e.description}")
+                logging.error(f"Bot connection test failed: {e.description}")
+                
             except Exception as e:
                 messagebox.showerror("Connection Error", f"Failed to test bot connection: {e}")
                 logging.error(f"Bot connection test failed: {e}")
@@ -1114,24 +4052,79 @@ Happy posting! 🚀"""
         thread.daemon = True
         thread.start()
         
+    def check_channels(self):
+        """Check every target channel now (bypassing the cache) and show the results"""
+        bot_token = self.bot_token_var.get().strip()
+        channels = self.get_target_channels()
+        if not bot_token or not channels:
+            messagebox.showerror("Error", "Please enter bot token and at least one target channel.")
+            return
+        source = self.fanout_channel_var.get().strip()
+        if source and source not in channels:
+            channels.append(source)
+            
+        def run():
+            try:
+                results = self.channel_preflight.check_all(self.bot_client(), channels, refresh=True)
+            except TelegramAPIError as e:
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to check channels: {e.description}"))
+                return
+            lines = []
+            for channel, result in results.items():
+                if result['ok']:
+                    rights = "" if result['can_delete'] else " - can't delete old posts"
+                    lines.append(f"✅ {channel} → {result['title']} ({result['chat_id']}){rights}")
+                else:
+                    lines.append(f"❌ {channel}: {result['problem']}")
+            self.log_message("Channel check: " + " | ".join(lines))
+            self.root.after(0, lambda: messagebox.showinfo("Channel Check", "\n".join(lines)))
+            
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        
+    def preflight_channels(self, channels):
+        """Check channels (and the fan-out source) before a session; returns {channel: problem} for unusable ones"""
+        source = self.fanout_channel_var.get().strip()
+        if source and source not in channels:
+            channels = channels + [source]
+        try:
+            results = self.channel_preflight.check_all(self.bot_client(), channels)
+        except TelegramAPIError as e:
+            self.log_message(f"⚠️ Channel check skipped: {e.description}")
+            return {}
+        blocked = {}
+        for channel, result in results.items():
+            if not result['ok'] and not result.get('transient'):
+                blocked[channel] = result['problem']
+                self.log_message(f"❌ {channel} can't be used this session: {result['problem']}")
+        return blocked
+        
+    def bot_client(self):
+        """Return a Bot API client for the configured bot and Bot API server"""
+        return TelegramBotClient(self.bot_token_var.get().strip(), api_url=self.api_url_var.get().strip() or None,
+                                 local=self.api_local_var.get())
+        
+    def resolve_chat_id(self, channel):
+        """Return the numeric chat id of a checked channel (the channel as entered otherwise)"""
+        result = self.channel_preflight.cached(self.bot_client(), channel)
+        return result['chat_id'] if result and result['ok'] else channel
+        
     def preview_next_post(self):
         """Preview the next post that will be sent"""
         try:
+            self.ensure_tab('message')
             if self.products_df is None:
                 messagebox.showwarning("Warning", "Please load an Excel file first.")
                 return
                 
             # Get next unposted product
-            if self.posting_mode_var.get() == "unposted_only":
-                unposted = self.products_df[self.products_df['posted_status'] != 'posted']
-            else:
-                unposted = self.products_df
-                
-            if unposted.empty:
+            positions = self.eligible_positions()
+            if len(positions) == 0:
                 messagebox.showinfo("Info", "No products available for posting.")
                 return
                 
-            next_product = unposted.iloc[0]
+            _, next_product = product_rows(self.products_df, positions[:1])[0]
             post_text = self.format_product_message(next_product)
             
             # Show preview in a new window
@@ -1141,6 +4134,25 @@ Happy posting! 🚀"""
             
             ttk.Label(preview_window, text="Next Post Preview:", font=('Arial', 12, 'bold')).pack(pady=10)
             
+            # Product image, loaded in the background
+            image_column = self.image_column_var.get().strip()
+            image_url = cell_text(next_product.get(image_column)) if self.include_image_var.get() else ""
+            if image_url:
+                image_label = ttk.Label(preview_window, text="Loading image...")
+                image_label.pack()
+                
+                def show_image(image):
+                    if not image_label.winfo_exists():
+                        return
+                    if isinstance(image, str):
+                        image_label.config(text=f"No image preview: {image}")
+                    else:
+                        image_label.config(image=image, text="")
+                        image_label.image = image
+                        
+                self.thumbnails.request(image_url, show_image)
+                preview_window.geometry("500x560")
+                
             preview_text = scrolledtext.ScrolledText(preview_window, height=15, width=60)
             preview_text.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
             preview_text.insert(1.0, post_text)
@@ -1151,32 +4163,69 @@ Happy posting! 🚀"""
         except Exception as e:
             messagebox.showerror("Error", f"Failed to preview post: {e}")
             
-    def format_product_message(self, product_row):
-        """Format product information into a Telegram message"""
+    def get_catalog_index(self):
+        """Return the index of the loaded catalog, creating it on first use"""
+        if self.catalog_index is None or self.catalog_index.df is not self.products_df:
+            self.catalog_index = CatalogIndex(self.products_df)
+        return self.catalog_index
+        
+    def eligible_positions(self):
+        """Return row positions eligible for posting without copying the catalog"""
+        if self.posting_mode_var.get() == "unposted_only":
+            positions = (self.products_df['posted_status'] != 'posted').to_numpy().nonzero()[0]
+        else:
+            positions = np.arange(len(self.products_df))
+            
+        expression = self.filter_expr_var.get().strip()
+        if expression:
+            selected = self.get_catalog_index().query(expression)
+            positions = np.intersect1d(positions, selected, assume_unique=True)
+        return positions
+        
+    def check_filter_expression(self):
+        """Show how many products the current filter selects"""
+        if self.products_df is None:
+            messagebox.showwarning("Warning", "Please load an Excel file first.")
+            return
+        try:
+            started = time.perf_counter()
+            count = len(self.eligible_positions())
+            elapsed = (time.perf_counter() - started) * 1000
+            messagebox.showinfo("Filter", f"{count:,} of {len(self.products_df):,} products selected "
+                                          f"({elapsed:.0f} ms)")
+        except FilterExpressionError as e:
+            messagebox.showerror("Invalid Filter", str(e))
+        
+    def format_product_message(self, product_row, timestamp=None, channel=None):
+        """Format product information into a Telegram message for a channel's template.
+        
+        `timestamp` fills {timestamp}; pass the original one to re-render a posted message.
+        """
         try:
             # Use custom template if available
             if hasattr(self, 'message_template'):
-                return self.format_custom_message(product_row)
+                template = self.get_template(self.get_channel_templates().get(channel, DEFAULT_TEMPLATE_NAME))
+                return self.render_template(product_row, template, timestamp)
             
             # Fallback to default format using first available columns
             message_parts = []
             
             # Get available columns (excluding tracking columns)
-            available_cols = [col for col in product_row.index if col not in ['posted_date', 'posted_status']]
+            available_cols = [col for col in product_row.index if col not in TRACKING_COLUMNS]
             
             # Use first column as product identifier
-            if available_cols and pd.notna(product_row[available_cols[0]]):
+            if available_cols and cell_text(product_row[available_cols[0]]):
                 identifier = str(product_row[available_cols[0]])
                 message_parts.append(f"�️ {identifier}")
             
             # Add other columns that have data
             for col in available_cols[1:4]:  # Show next 3 columns with data
-                if pd.notna(product_row[col]) and str(product_row[col]).strip():
+                if cell_text(product_row[col]):
                     value = str(product_row[col])
                     message_parts.append(f"\n� {col}: {value}")
             
             # Add timestamp
-            message_parts.append(f"\n\n📅 Posted: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+            message_parts.append(f"\n\n📅 Posted: {timestamp or datetime.now().strftime('%Y-%m-%d %H:%M')}")
             
             return ''.join(message_parts)
             
@@ -1191,15 +4240,43 @@ Happy posting! 🚀"""
         if not self.validate_config():
             return
             
+        # The worker renders with the message template, so make sure it exists
+        self.ensure_tab('message')
+        
         self.posting_active = True
+        self.worker_running = True
         self.start_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
         
         # Start posting in separate thread
-        thread = threading.Thread(target=self.posting_worker)
+        thread = threading.Thread(target=self.profiled('posting', self.posting_worker))
         thread.daemon = True
         thread.start()
         
+    def profiled(self, name, target):
+        """Wrap a worker thread target with the session profiler when profiling is switched on"""
+        if not self.profile_var.get():
+            return target
+        flame_graph = self.profile_flame_var.get()
+        
+        def run():
+            profiler = SessionProfiler(name, flame_graph)
+            if not profiler.start():
+                self.log_message(f"⚠️ Another session is already being profiled; running {name} without profiling")
+                target()
+                return
+            self.session_profiler = profiler
+            try:
+                target()
+            finally:
+                profiler.stop()
+                self.session_profiler = None
+                try:
+                    self.log_message(f"📊 Profile report saved: {profiler.write_report()}")
+                except Exception as e:
+                    logging.error(f"Error writing profile report: {e}")
+        return run
+        
     def stop_posting(self):
         """Stop the auto posting process"""
         self.posting_active = False
@@ -1218,92 +4295,243 @@ Happy posting! 🚀"""
             messagebox.showerror("Error", "Please enter at least one target channel.")
             return False
             
-        if not self.excel_file_path.get() or not os.path.exists(self.excel_file_path.get()):
+        self.ensure_tab('message')
+        unknown = sorted(set(self.get_channel_templates().values()) - set(self.get_template_names()))
+        if unknown:
+            messagebox.showerror("Error", f"Unknown message template: {', '.join(unknown)}. "
+                                          f"Add it on the Message Template tab.")
+            return False
+            
+        file_path = self.excel_file_path.get().strip()
+        if not file_path or not (is_remote_source(file_path) or os.path.exists(file_path)):
             messagebox.showerror("Error", "Please select a valid Excel file.")
             return False
             
+        api_url = self.api_url_var.get().strip()
+        if api_url and not re.match(r'https?://', api_url):
+            messagebox.showerror("Error", "The Bot API server must be an http:// or https:// address.")
+            return False
+            
         if self.products_df is None:
             messagebox.showerror("Error", "Please load the Excel file first.")
             return False
             
         return True
         
+    def get_channel_lines(self):
+        """Return the target channel lines entered on the configuration tab"""
+        channels_text = self.channels_text.get(1.0, tk.END).strip()
+        return [line.strip() for line in channels_text.split('\n') if line.strip()]
+        
+    def get_target_channels(self):
+        """Return the target channels entered on the configuration tab"""
+        return [parse_channel_line(line)[0] for line in self.get_channel_lines()]
+        
+    def get_channel_templates(self):
+        """Return the template name used by each target channel"""
+        return dict(parse_channel_line(line)[:2] for line in self.get_channel_lines())
+        
+    def get_digest_channels(self):
+        """Return {channel: minutes between digests} for the channels that get digests"""
+        lines = map(parse_channel_line, self.get_channel_lines())
+        return {channel: minutes for channel, _, minutes in lines if minutes is not None}
+        
+    def select_session_products(self):
+        """Return the rows a posting session would post, capped at max posts per session"""
+        positions = self.eligible_positions()
+        # Limit posts per session - only the selected rows are materialized
+        max_posts = min(len(positions), self.max_posts_var.get())
+        return self.products_df.iloc[positions[:max_posts]]
+        
+    def describe_product(self, product, index):
+        """Return a short product identifier (first column value) for logs and reports"""
+        columns = product.index
+        first_col = columns[0] if len(columns) > 0 else 'Unknown'
+        return str(product.get(first_col, f'Product {index}'))
+        
+    def prepare_post(self, message, product_row):
+        """Plan the Bot API calls for a product and validate them offline"""
+        image_column = self.image_column_var.get().strip()
+        photo = None
+        problems = []
+        if self.include_image_var.get() and image_column:
+            if image_column not in product_row:
+                problems.append(('warning', f"image column '{image_column}' not found - sending text"))
+            elif not cell_text(product_row[image_column]):
+                problems.append(('warning', "image cell is empty - sending text"))
+            else:
+                photo = product_row[image_column]
+                # Only results of an earlier check are used here - never a network call
+                checked = self.image_checker.cached(str(photo).strip())
+                if checked and not checked['ok']:
+                    if self.bad_image_action_var.get() == 'skip':
+                        problems.append(('error', f"image URL {checked['problem']} - product skipped"))
+                    else:
+                        problems.append(('warning', f"image URL {checked['problem']} - sending text"))
+                        photo = None
+        parts, plan_problems = plan_telegram_post(message, photo, self.auto_split_var.get())
+        return parts, problems + plan_problems
+        
+    def check_product_images(self, products):
+        """Check the image URLs of the products about to be posted; returns the number of bad ones"""
+        image_column = self.image_column_var.get().strip()
+        if image_column not in products.columns:
+            return 0
+        cells = products[image_column].dropna().astype(str).str.strip()
+        # Telegram file ids and other non-URL values aren't checked
+        urls = list(cells[cells.str.match(r'https?://')].unique())
+        if not urls:
+            return 0
+        started = time.perf_counter()
+        results = self.image_checker.check_all(urls)
+        bad = [(url, result['problem']) for url, result in results.items() if not result['ok']]
+        for url, problem in bad[:20]:
+            self.log_message(f"⚠️ Image {url[:80]}: {problem}")
+        self.log_message(f"Checked {len(urls)} image URLs in {time.perf_counter() - started:.1f} seconds, "
+                         f"{len(bad)} broken")
+        return len(bad)
+        
+    def start_dry_run(self):
+        """Render and validate the next session for every channel without sending"""
+        if self.products_df is None:
+            messagebox.showwarning("Warning", "Please load an Excel file first.")
+            return
+        self.ensure_tab('message')
+        digest_channels = self.get_digest_channels()
+        channels = [channel for channel in self.get_target_channels() if channel not in digest_channels]
+        if not channels:
+            messagebox.showerror("Error", "Please enter at least one target channel (digest channels aren't checked).")
+            return
+        try:
+            products = self.select_session_products()
+        except FilterExpressionError as e:
+            messagebox.showerror("Invalid Filter", str(e))
+            return
+            
+        def run():
+            report = self.dry_run_report(products, channels)
+            self.root.after(0, lambda: self.show_dry_run_report(report))
+            
+        self.update_action(f"Dry run: checking {len(products)} products...")
+        thread = threading.Thread(target=self.profiled('dry-run', run))
+        thread.daemon = True
+        thread.start()
+        
+    def dry_run_report(self, products, channels):
+        """Validate every product for every channel and collect the results"""
+        started = time.perf_counter()
+        report = {'products': len(products), 'channels': len(channels), 'ok': 0,
+                  'failing': 0, 'warnings': 0, 'api_calls': 0, 'lines': []}
+        for index, product in product_rows(products):
+            identifier = self.describe_product(product, index)[:60]
+            failing = False
+            for channel in channels:
+                message = self.format_product_message(product, channel=channel)
+                parts, problems = self.prepare_post(message, product)
+                for severity, text in problems:
+                    report['lines'].append(f"{'❌' if severity == 'error' else '⚠️'} {identifier} → {channel}: {text}")
+                    report['warnings'] += severity == 'warning'
+                if any(severity == 'error' for severity, _ in problems):
+                    failing = True
+                else:
+                    report['api_calls'] += len(parts)
+            report['failing' if failing else 'ok'] += 1
+        report['elapsed'] = time.perf_counter() - started
+        return report
+        
+    def show_dry_run_report(self, report):
+        """Show the dry run report in a new window"""
+        self.update_action("")
+        summary = (f"Checked {report['products']} products × {report['channels']} channels "
+                   f"in {report['elapsed']:.2f} seconds\n"
+                   f"✅ Ready: {report['ok']}   ❌ Would fail: {report['failing']}   "
+                   f"⚠️ Warnings: {report['warnings']}\n"
+                   f"API calls the live session would make: {report['api_calls']}\n\n")
+        self.log_message(summary.strip().replace('\n', ' | '))
+        
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Dry Run Report")
+        report_window.geometry("700x500")
+        
+        report_text = scrolledtext.ScrolledText(report_window, height=20, width=80)
+        report_text.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        report_text.insert(1.0, summary + ('\n'.join(report['lines']) or "No problems found."))
+        
+        ttk.Button(report_window, text="Close", 
+                  command=report_window.destroy).pack(pady=10)
+        
     def posting_worker(self):
         """Main posting worker function"""
         try:
             self.update_status("Starting product posting...")
             self.update_progress(0)
             
-            # Get target channels
-            channels_text = self.channels_text.get(1.0, tk.END).strip()
-            channels = [line.strip() for line in channels_text.split('\n') if line.strip()]
+            # Get target channels - digest channels get several products per message instead
+            channels = self.get_target_channels()
+            self.digest_channels = self.get_digest_channels()
+            continuous = self.continuous_var.get()
             
-            # Get products to post
+            # Get products to post - only their row positions, rows are read chunk by chunk
             if not isinstance(self.products_df, pd.DataFrame) or self.products_df.empty:
                 self.update_status("No valid products loaded. Please check your Excel file.")
                 return
-            if self.posting_mode_var.get() == "unposted_only":
-                products_to_post = self.products_df[self.products_df['posted_status'] != 'posted']
-            else:
-                products_to_post = self.products_df.copy()
-            if products_to_post.empty:
+            try:
+                eligible = self.eligible_positions()
+            except FilterExpressionError as e:
+                self.update_status(f"Invalid product filter: {e}")
+                return
+            positions = eligible if continuous else eligible[:self.max_posts_var.get()]
+            if len(positions) == 0 and not continuous and not self.job_store_var.get().strip() \
+                    and not self.digest_channels:
                 self.update_status("No products to post")
                 return
-                
-            # Limit posts per session
-            max_posts = min(len(products_to_post), self.max_posts_var.get())
-            products_to_post = products_to_post.head(max_posts)
             
-            self.log_message(f"Starting to post {len(products_to_post)} products to {len(channels)} channels")
+            # Catch misconfigured channels in one parallel pass, not one failure per product
+            self.update_action("Checking channels...")
+            blocked = self.preflight_channels(channels)
+            if all(channel in blocked for channel in channels):
+                self.update_status("No target channel can be posted to - see the logs")
+                return
             
-            # Post products
-            posted_count = 0
+            # Bring already posted products up to date first
+            if self.sync_before_posting_var.get():
+                self.update_action("Updating edited posts...")
+                self.sync_edits()
             
-            for i, (index, product) in enumerate(products_to_post.iterrows()):
-                if not self.posting_active:
-                    break
-                    
-                # Ensure product is a Series (row), not a scalar
-                if not isinstance(product, pd.Series):
-                    self.log_message(f"Warning: Skipping row {index} as it is not a valid product record.")
-                    continue
-                    
-                # Get product identifier from first column for logging
-                first_col = self.products_df.columns[0] if len(self.products_df.columns) > 0 else 'Unknown'
-                product_identifier = str(product.get(first_col, f'Product {index}'))
-                self.update_action(f"Posting: {product_identifier[:50]}...")
-                # Format message
-                message = self.format_product_message(product)
-                # Post to all channels
-                success = True
-                for channel in channels:
-                    if not self.posting_active:
-                        break
-                    if self.send_message_to_channel(channel, message, product):
-                        self.log_message(f"✅ Posted '{product_identifier}' to {channel}")
-                    else:
-                        self.log_message(f"❌ Failed to post '{product_identifier}' to {channel}")
-                        success = False
-                # Update status in Excel
-                if success:
-                    self.products_df.loc[index, 'posted_status'] = 'posted'
-                    self.products_df.loc[index, 'posted_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    posted_count += 1
-                else:
-                    self.products_df.loc[index, 'posted_status'] = 'failed'
-                # Update progress
-                progress = ((i + 1) / len(products_to_post)) * 100
-                self.update_progress(progress)
-                # Delay between posts
-                if i < len(products_to_post) - 1 and self.posting_active:
-                    delay = self.delay_var.get()
-                    self.update_action(f"Waiting {delay} seconds...")
-                    time.sleep(delay)
+            # Digests are posted first when due, then checked again as the session goes on
+            pending = {}
+            if self.digest_channels and self.job_store_var.get().strip():
+                self.log_message("⚠️ Digests aren't posted with a shared job store - "
+                                 "each computer would post them")
+                self.digest_channels = {}
+            self.post_due_digests(blocked, pending)
+            channels = [channel for channel in channels if channel not in self.digest_channels]
+            
+            if not channels:
+                posted_count = 0
+                if continuous:
+                    self.log_message("Continuous posting: digests only, watching the Excel file for new rows")
+                    self.watch_for_digests(blocked, pending)
+            elif self.job_store_var.get().strip():
+                self.log_message(f"Posting from the shared job store {self.job_store_var.get().strip()} "
+                                 f"as {self.node_id}")
+            elif continuous:
+                self.log_message(f"Continuous posting: {len(positions)} products waiting, "
+                                 f"then watching the Excel file for new rows")
+            else:
+                self.log_message(f"Starting to post {len(positions)} products to {len(channels)} channels")
+            
+            # Post products - through the shared queue when several computers post together
+            if channels and self.job_store_var.get().strip():
+                posted_count, _ = self.post_claimed_products(eligible, channels, blocked, continuous, pending)
+            elif channels:
+                posted_count, _ = self.post_products(positions, channels, blocked, continuous, pending)
                     
             # Save updated Excel
-            self.products_df.to_excel(self.excel_file_path.get(), index=False)
+            self.sync_catalog_file(pending)
             self.refresh_excel_data()
             
+            self.log_message(f"Render cache: {self.render_cache.hits} reused, {self.render_cache.misses} rendered")
             self.update_status(f"Posting completed! Posted {posted_count} products.")
             self.update_progress(100)
             
@@ -1311,70 +4539,1064 @@ Happy posting! 🚀"""
             self.log_message(f"Error in posting worker: {e}")
             self.update_status(f"Error: {e}")
         finally:
-            self.posting_active = False
-            self.start_btn.config(state=tk.NORMAL)
-            self.stop_btn.config(state=tk.DISABLED)
+            self.finish_worker()
             
-    def send_message_to_channel(self, channel, message, product_row):
-        """Send message to a Telegram channel"""
+    def finish_worker(self):
+        """Reset the Start/Stop controls when a worker ends, then run a catalog load asked for meanwhile"""
+        self.posting_active = False
+        self.worker_running = False
+        self.start_btn.config(state=tk.NORMAL)
+        self.stop_btn.config(state=tk.DISABLED)
+        if self.catalog_load_deferred:
+            self.root.after(0, self.start_catalog_load)
+            
+    def post_products(self, positions, channels, blocked, continuous, pending):
+        """Post the products at `positions` (and, in continuous mode, new ones); returns (posted, done).
+        
+        Each chunk runs through the posting pipeline, so the next products are
+        rendered and their images checked while the current ones are sent.
+        """
+        posted_count = done = 0
+        pacing = {'last_post': None, 'lock': threading.Lock()}
+        attempted = set()
+        
+        on_wait = lambda: self.post_due_digests(blocked, pending)
+        for chunk in self.iter_product_chunks(positions, attempted, continuous, on_wait):
+            pipeline = self.build_posting_pipeline(channels, blocked, pacing)
+            jobs = []
+            # Products stop reaching the send stage once posting is stopped
+            for job in pipeline.run({'index': index, 'product': product} for index, product in product_rows(chunk)):
+                jobs.append(job)
+                done += 1
+                if not continuous:
+                    self.update_progress(done / len(positions) * 100)
+                    
+            # Fan-out copies of the whole chunk go out with one copyMessages call per channel
+            self.copy_fanout_batch(jobs, channels)
+            for job in jobs:
+                status = job['status']
+                posted_count += status['posted_status'] == 'posted'
+                
+                # Remember the status by product so it survives a reload of the file
+                key = self.product_key(job['product'])
+                if key:
+                    pending[key] = status
+                if status['posted_status'] != 'posted' or self.posting_mode_var.get() != "unposted_only":
+                    # Rows without a key are remembered by their position instead
+                    attempted.add(key or int(self.products_df.index.get_loc(job['index'])))
+            if continuous:
+                self.update_status(f"Continuous posting: {posted_count} of {done} products posted")
+                
+            # Save as we go, so a long-running session never holds much unsaved status
+            if continuous and self.posting_active:
+                blocked = self.preflight_channels(channels + list(self.digest_channels))
+                self.post_due_digests(blocked, pending)
+                self.sync_catalog_file(pending)
+        return posted_count, done
+        
+    def build_posting_pipeline(self, channels, blocked, pacing):
+        """Build the render -> media -> send pipeline, with any registered custom stages.
+        
+        Items are dicts with 'index' and 'product'; the send stage adds 'status'
+        and the fan-out 'copies' left for copy_fanout_batch.
+        Thread counts come from PIPELINE_WORKERS and the 'pipeline_workers' config;
+        sending always uses one thread.
+        """
+        workers = dict(PIPELINE_WORKERS, **self.saved_config.get('pipeline_workers', {}))
+        if workers.pop('send', 1) != 1:
+            self.log_message("⚠️ pipeline_workers: 'send' always uses one thread - ignoring the setting")
+        # Read once here - the stages run on worker threads
+        channel_templates = self.get_channel_templates()
+        source = self.fanout_channel_var.get().strip()
+        templates = {channel: self.get_template(channel_templates.get(channel, DEFAULT_TEMPLATE_NAME))
+                     for channel in channels + ([source] if source else []) if channel not in blocked} \
+            if hasattr(self, 'message_template') else {}
+        image_column = self.image_column_var.get().strip()
+        check_images = self.include_image_var.get() and self.check_images_var.get() and image_column
+        delay = self.delay_var.get()
+        
+        def render(job):
+            # The send stage posts these messages as rendered here, with their {timestamp}
+            job['rendered_at'] = datetime.now().strftime('%Y-%m-%d %H:%M')
+            job['messages'] = {channel: self.render_template(job['product'], template, job['rendered_at'])
+                               for channel, template in templates.items()}
+            return job
+            
+        def media(job):
+            # Broken image URLs are found with quick checks, not failed sendPhoto calls
+            url = cell_text(job['product'].get(image_column)) if check_images and self.posting_active else ""
+            if re.match(r'https?://', url):
+                result = self.image_checker.check_url(url)
+                if not result['ok']:
+                    self.log_message(f"⚠️ Image {url[:80]}: {result['problem']}")
+            return job
+            
+        def send(job):
+            # Delay between posts (time spent waiting for new rows counts too)
+            with pacing['lock']:
+                if pacing['last_post'] is not None:
+                    remaining = delay - (time.monotonic() - pacing['last_post'])
+                    if remaining > 0:
+                        self.update_action(f"Waiting {remaining:.0f} seconds...")
+                        self.wait_while_active(remaining)
+                if not self.posting_active:
+                    return None
+                job['copies'] = []
+                job['status'] = self.post_product(job['index'], job['product'], channels, blocked,
+                                                  rendered=(job.get('rendered_at'), job.get('messages', {})),
+                                                  copies=job['copies'])
+                pacing['last_post'] = time.monotonic()
+            return job
+            
+        stages = [PipelineStage('render', render, workers['render']),
+                  PipelineStage('media', media, workers['media']),
+                  PipelineStage('send', send)]
+        for before, stage in self.pipeline_stages:
+            position = next((i for i, existing in enumerate(stages) if existing.name == before), len(stages))
+            stages.insert(position, stage)
+        profiler = self.session_profiler
+        if profiler:
+            # Stages run on pool threads, which the session's own profile doesn't see
+            stages = [PipelineStage(stage.name, profiler.wrap(stage.fn), stage.workers) for stage in stages]
+        return Pipeline(stages)
+        
+    def add_pipeline_stage(self, stage, before='send'):
+        """Plug a custom PipelineStage into posting, before the named stage (e.g. a filter or enrich step)"""
+        self.pipeline_stages.append((before, stage))
+        
+    def post_claimed_products(self, eligible, channels, blocked, continuous, pending):
+        """Post products claimed from the shared job store; returns (posted, done).
+        
+        Every node queues the products it considers eligible and the store hands
+        each one to a single node, so each (product, channel) is posted once
+        across all nodes however many of them run.
+        """
+        store = self.get_job_store()
+        node = self.node_id
+        df, key_array = self.products_df, self.product_keys().to_numpy()
+        store.enqueue(key for key in key_array[eligible] if key)
+        limit = None if continuous else self.max_posts_var.get()
+        posted_count = done = 0
+        last_post = None
+        
+        heartbeat = LeaseHeartbeat(store, node)
+        heartbeat.start()
         try:
-            bot_token = self.bot_token_var.get().strip()
+            while self.posting_active and (limit is None or done < limit):
+                jobs = store.claim(node, JOB_CLAIM_BATCH if limit is None else min(JOB_CLAIM_BATCH, limit - done))
+                if not jobs:
+                    if not continuous:
+                        break
+                    # Other nodes may still give jobs back, and new rows may be added to the file
+                    self.update_action("Waiting for new jobs...")
+                    self.wait_while_active(CATALOG_WATCH_INTERVAL)
+                    if self.posting_active and self.catalog_changed_on_disk():
+                        self.log_message("Excel file changed - queueing new products")
+                        # Read here, installed on the Tk thread - the template is kept
+                        if self.refresh_excel_data():
+                            key_array = self.product_keys().to_numpy()
+                            store.enqueue(key for key in key_array[self.eligible_positions()] if key)
+                    continue
+                    
+                if self.products_df is not df:
+                    df, key_array = self.products_df, self.product_keys().to_numpy()
+                rows = {job['product_key']: np.flatnonzero(key_array == job['product_key']) for job in jobs}
+                if self.include_image_var.get() and self.check_images_var.get():
+                    self.check_product_images(df.iloc[np.concatenate(list(rows.values()))])
+                for job in jobs:
+                    if not self.posting_active:
+                        break
+                    key = job['product_key']
+                    matches = rows[key]
+                    if len(matches) == 0:
+                        self.log_message(f"⚠️ Product '{key}' from the job store isn't in this computer's catalog")
+                        store.complete(node, key, 'failed', job['channel_status'])
+                        continue
+                        
+                    # Delay between posts
+                    if last_post is not None:
+                        remaining = self.delay_var.get() - (time.monotonic() - last_post)
+                        if remaining > 0:
+                            self.update_action(f"Waiting {remaining:.0f} seconds...")
+                            self.wait_while_active(remaining)
+                        if not self.posting_active:
+                            break
+                            
+                    index, product = product_rows(df, matches[:1])[0]
+                    # Channels an earlier owner of the job already posted to are skipped
+                    if self.posting_mode_var.get() == "unposted_only":
+                        channel_status = parse_channel_status(product.get('channel_status', ''))
+                    else:
+                        channel_status = {}
+                    channel_status.update(parse_channel_status(job['channel_status']))
+                    status = self.post_product(
+                        index, product, channels, blocked, channel_status=channel_status,
+                        claim_check=lambda: store.owns(node, key),
+                        on_channel=lambda statuses: store.record_channel(node, key, format_channel_status(statuses)))
+                    last_post = time.monotonic()
+                    if status is None:
+                        continue
+                    store.complete(node, key, status['posted_status'], status['channel_status'])
+                    pending[key] = status
+                    done += 1
+                    posted_count += status['posted_status'] == 'posted'
+                    self.update_status(f"Shared queue: this computer posted {posted_count} of {done} products")
+                    
+                if continuous and self.posting_active:
+                    self.sync_catalog_file(pending)
+                    blocked = self.preflight_channels(channels)
+        finally:
+            heartbeat.stop()
+            store.release(node)
+        return posted_count, done
+        
+    def get_job_store(self):
+        """Return the shared job store, opening it on first use or when its path changes"""
+        path = self.job_store_var.get().strip()
+        if self.job_store is None or self.job_store.path != path:
+            self.job_store = JobStore(path)
+        return self.job_store
+        
+    def post_product(self, index, product, channels, blocked, channel_status=None, claim_check=None, on_channel=None,
+                     rendered=None, copies=None):
+        """Post one product to every channel and update its row; returns the new tracking values.
+        
+        With the shared job store, `claim_check` is asked before every send and
+        posting stops (returning None) once another node took over the job;
+        `on_channel` receives the channel statuses after every send. `rendered`
+        is (rendered_at, {channel: message}) from the pipeline's render stage;
+        channels without a message there are rendered here. With a `copies`
+        list, fan-out copies are appended to it as (channel, source ids,
+        message, rendered_at) for copy_fanout_batch instead of being made here.
+        """
+        # Get product identifier from first column for logging
+        product_identifier = self.describe_product(product, index)
+        self.update_action(f"Posting: {product_identifier[:50]}...")
+        # The timestamp is kept so the post can be re-rendered for edits
+        rendered_at, messages = rendered if rendered and rendered[0] else (datetime.now().strftime('%Y-%m-%d %H:%M'), {})
+        # Channels that already have this product are skipped when resuming
+        if channel_status is None and self.posting_mode_var.get() == "unposted_only":
+            channel_status = parse_channel_status(product.get('channel_status', ''))
+        elif channel_status is None:
+            channel_status = {}
             
-            # Check if images should be included and if there's an image URL
-            image_column = self.image_column_var.get().strip()
-            include_image = self.include_image_var.get()
-            
-            if (include_image and image_column and 
-                image_column in product_row and 
-                pd.notna(product_row[image_column]) and 
-                str(product_row[image_column]).strip()):
-                # Send as photo with caption
-                url = f"https://api.telegram.org/bot{bot_token}/sendPhoto"
-                data = {
-                    'chat_id': channel,
-                    'photo': product_row[image_column],
-                    'caption': message
-                }
+        # Fan-out: post once to the source channel; channels with its template get copies
+        source = self.fanout_channel_var.get().strip()
+        source_ids = None
+        templates = self.get_channel_templates()
+        waiting = [channel for channel in channels if channel_status.get(channel) != 'posted' and channel not in blocked]
+        if source and source not in blocked and any(channel != source for channel in waiting) and self.posting_active:
+            if claim_check and not claim_check():
+                self.log_message(f"⚠️ Another computer took over '{product_identifier}' - not posting it here")
+                return None
+            message = messages.get(source) or \
+                self.format_product_message(product, timestamp=rendered_at, channel=source)
+            reuse = source not in channels or channel_status.get(source) == 'posted'
+            source_ids = self.post_fanout_source(source, product, message, rendered_at, reuse)
+            if source_ids and source in channels and channel_status.get(source) != 'posted':
+                channel_status[source] = 'posted'
+                self.log_message(f"✅ Posted '{product_identifier}' to {source}")
+                if on_channel:
+                    on_channel(channel_status)
+                    
+        # Post to all channels
+        for channel in channels:
+            if not self.posting_active:
+                break
+            if channel_status.get(channel) == 'posted':
+                continue
+            if channel in blocked:
+                channel_status[channel] = f"failed ({blocked[channel]})"
+                continue
+            if claim_check and not claim_check():
+                self.log_message(f"⚠️ Another computer took over '{product_identifier}' - not posting it here")
+                return None
+            # Channels sharing a template reuse one render through the cache
+            message = messages.get(channel) or \
+                self.format_product_message(product, timestamp=rendered_at, channel=channel)
+            if source_ids and templates.get(channel, DEFAULT_TEMPLATE_NAME) == templates.get(source, DEFAULT_TEMPLATE_NAME):
+                if copies is not None:
+                    copies.append((channel, source_ids, message, rendered_at))
+                    continue
+                sent = self.copy_messages_to_channel(channel, source, source_ids, self.product_key(product) or None)
             else:
-                # Send as text message if no image or image disabled
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                data = {
-                    'chat_id': channel,
-                    'text': message
-                }
+                sent = self.send_message_to_channel(channel, message, product)
+            if sent:
+                channel_status[channel] = 'posted'
+                self.record_sent_post(product, channel, message, sent, rendered_at)
+                self.log_message(f"✅ Posted '{product_identifier}' to {channel}")
+            else:
+                channel_status[channel] = self.channel_failures.get(channel, 'failed')
+                self.log_message(f"❌ Failed to post '{product_identifier}' to {channel}")
+            if on_channel:
+                on_channel(channel_status)
+                
+        return self.update_product_status(index, channels, channel_status)
+        
+    def update_product_status(self, index, channels, channel_status):
+        """Write a product's tracking values from its channel statuses; returns them"""
+        delivered = sum(1 for channel in channels if channel_status.get(channel) == 'posted')
+        status = {'channel_status': format_channel_status(channel_status)}
+        if delivered == len(channels):
+            status['posted_status'] = 'posted'
+            status['posted_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        elif delivered:
+            status['posted_status'] = 'partial'
+            status['posted_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            status['posted_status'] = 'failed'
+        for column, value in status.items():
+            self.products_df.loc[index, column] = value
+        return status
+        
+    def copy_fanout_batch(self, jobs, channels):
+        """Make the fan-out copies post_product left in the jobs' 'copies', one copyMessages call per channel.
+        
+        Each channel gets the source messages of every product in the batch
+        at once (split per COPY_BATCH_SIZE); the new messages are matched back
+        to their products in order for the ledger and the channel statuses.
+        """
+        source = self.fanout_channel_var.get().strip()
+        for channel in channels:
+            entries = [(job, source_ids, message, rendered_at) for job in jobs
+                       for target, source_ids, message, rendered_at in job.get('copies', ()) if target == channel]
+            if not entries or not self.posting_active:
+                continue
+            # copyMessages wants increasing ids; a reused source post can be older than the rest
+            order = sorted((message_id, n) for n, entry in enumerate(entries) for message_id in entry[1])
+            message_ids = [message_id for message_id, _ in order]
+            intent_key = "copy:" + hashlib.sha256(f"{source}:{message_ids}".encode('utf-8')).hexdigest()
+            sent = self.copy_messages_to_channel(channel, source, message_ids, intent_key)
+            copied = {}
+            if sent is not None and len(sent) == len(message_ids):
+                for (_, n), new in zip(order, sent):
+                    copied.setdefault(n, []).append(new)
+            elif sent is not None:
+                # Telegram skips messages it can't copy, so the rest can't be matched to products
+                self.log_message(f"⚠️ {channel}: {len(sent)} of {len(message_ids)} messages copied - "
+                                 f"these posts won't be edited or cleaned up later")
+            for n, (job, source_ids, message, rendered_at) in enumerate(entries):
+                product = job['product']
+                product_identifier = self.describe_product(product, job['index'])
+                channel_status = parse_channel_status(job['status']['channel_status'])
+                if sent is None:
+                    channel_status[channel] = self.channel_failures.get(channel, 'failed')
+                    self.log_message(f"❌ Failed to post '{product_identifier}' to {channel}")
+                else:
+                    channel_status[channel] = 'posted'
+                    if n in copied:
+                        self.record_sent_post(product, channel, message, copied[n], rendered_at)
+                    self.log_message(f"✅ Posted '{product_identifier}' to {channel}")
+                job['status'] = self.update_product_status(job['index'], channels, channel_status)
+                
+    def post_fanout_source(self, source, product, message, rendered_at, reuse):
+        """Return the message ids of a product's post in the fan-out source channel, posting it if needed.
+        
+        With `reuse`, an earlier post with the same content is used again.
+        Returns None when the source can't be posted to.
+        """
+        key = self.product_key(product)
+        if reuse and key:
+            parts, _ = self.prepare_post(message, product)
+            for entry in self.get_ledger().posts_for(key):
+                if entry['channel'] == source and entry['content_hash'] == post_content_hash(parts):
+                    return entry['message_ids']
+        sent = self.send_message_to_channel(source, message, product)
+        if not sent:
+            self.log_message(f"⚠️ Fan-out source {source} {self.channel_failures.get(source, 'failed')} - "
+                             f"posting to each channel directly")
+            return None
+        self.record_sent_post(product, source, message, sent, rendered_at)
+        return [message['message_id'] for message in sent if message]
+        
+    def iter_product_chunks(self, positions, attempted, continuous, on_wait=None):
+        """Yield the products to post as small DataFrame chunks, read lazily from the catalog.
+        
+        In continuous mode the eligible rows are selected again after each pass
+        (skipping products already attempted in this run). When none are left,
+        the Excel file is watched for new rows until posting is stopped, calling
+        `on_wait` after every check.
+        """
+        while self.posting_active:
+            df = self.products_df
+            for start in range(0, len(positions), STREAM_CHUNK_SIZE):
+                # A reload replaces the catalog, so the remaining positions are stale
+                if not self.posting_active or self.products_df is not df:
+                    break
+                yield df.iloc[positions[start:start + STREAM_CHUNK_SIZE]]
+            if not continuous:
+                return
+                
+            positions = self.next_stream_positions(attempted)
+            while self.posting_active and len(positions) == 0:
+                self.update_action("Waiting for new products in the Excel file...")
+                self.wait_while_active(CATALOG_WATCH_INTERVAL)
+                if self.posting_active and self.catalog_changed_on_disk():
+                    self.log_message("Excel file changed - loading new products")
+                    if self.refresh_excel_data():
+                        positions = self.next_stream_positions(attempted)
+                if on_wait and self.posting_active:
+                    on_wait()
+                    
+    def watch_for_digests(self, blocked, pending):
+        """Post due digests until posting is stopped, reloading the Excel file when it changes"""
+        while self.posting_active:
+            self.update_action("Waiting for the next digest...")
+            self.wait_while_active(CATALOG_WATCH_INTERVAL)
+            if self.posting_active and self.catalog_changed_on_disk():
+                self.log_message("Excel file changed - loading new products")
+                self.refresh_excel_data()
+            if self.posting_active:
+                self.post_due_digests(blocked, pending)
+                self.sync_catalog_file(pending)
+                
+    def post_due_digests(self, blocked, pending):
+        """Post a digest to each digest channel whose interval has passed; returns the number posted"""
+        posted = 0
+        ledger = self.get_ledger()
+        for channel, minutes in self.digest_channels.items():
+            if not self.posting_active:
+                break
+            if channel in blocked:
+                continue
+            last = ledger.last_digest_time(channel)
+            if last is not None and time.time() - last < minutes * 60:
+                continue
+            posted += self.post_digest(channel, pending)
+        return posted
+        
+    def select_digest_products(self, channel):
+        """Return the row positions of a channel's next digest: filtered products not in a digest yet, best first"""
+        df = self.products_df
+        listed = df['channel_status'].astype(str).str.contains(rf"(?:^|; ){re.escape(channel)}: posted(?:;|$)")
+        positions = np.flatnonzero(~listed.to_numpy())
+        expression = self.filter_expr_var.get().strip()
+        if expression:
+            positions = np.intersect1d(positions, self.get_catalog_index().query(expression), assume_unique=True)
             
-            response = requests.post(url, data=data, timeout=30)
+        order = self.digest_order_var.get().strip()
+        column, _, direction = order.rpartition(' ')
+        if direction.lower() not in ('asc', 'desc'):
+            column, direction = order, 'asc'
+        if column and column not in df.columns:
+            self.log_message(f"⚠️ Digest order column '{column}' not found - using catalog order")
+        elif column and len(positions):
+            values = df[column].iloc[positions].reset_index(drop=True)
+            # "$25" or "30%" sort as numbers; columns without numbers sort as text
+            numbers = pd.to_numeric(values.astype(str).str.replace(r'[^\d.\-]', '', regex=True), errors='coerce')
+            keys = numbers if numbers.notna().any() else values.astype(str)
+            ranked = keys.sort_values(ascending=direction.lower() == 'asc', na_position='last', kind='stable').index
+            positions = positions[ranked.to_numpy()]
+        return positions[:max(1, self.digest_size_var.get())]
+        
+    def post_digest(self, channel, pending):
+        """Post the next digest to a channel, split into several messages when too long; returns True if sent"""
+        positions = self.select_digest_products(channel)
+        if len(positions) == 0:
+            return False
+        rendered_at = datetime.now().strftime('%Y-%m-%d %H:%M')
+        rows = product_rows(self.products_df, positions)
+        entries = [self.format_product_message(product, timestamp=rendered_at, channel=channel) for _, product in rows]
+        header = self.digest_header_var.get().replace('{count}', str(len(rows))).replace('{timestamp}', rendered_at)
+        messages = pack_digest(header, entries)
+        # Keyed by the listed products, so a digest that timed out is found again next time
+        listed = json.dumps([self.product_key(product) for _, product in rows])
+        intent_key = f"digest:{hashlib.sha256(listed.encode('utf-8')).hexdigest()}"
+        sent = self.deliver_to_channel(channel, [('sendMessage', {'text': text}) for text in messages], intent_key)
+        if not sent:
+            self.log_message(f"❌ Failed to post a digest to {channel}: {self.channel_failures.get(channel, 'failed')}")
+            return False
             
-            if response.status_code == 200 and response.json().get('ok'):
-                return True
-            else:
-                if response.status_code == 200:
-                    error_msg = response.json().get('description', 'Unknown error')
+        # The listed products count as posted to this channel
+        channels = self.get_target_channels()
+        keys = []
+        for index, product in rows:
+            statuses = parse_channel_status(product.get('channel_status', ''))
+            statuses[channel] = 'posted'
+            status = {'channel_status': format_channel_status(statuses)}
+            if all(statuses.get(target) == 'posted' for target in channels):
+                status['posted_status'] = 'posted'
+                status['posted_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            for column, value in status.items():
+                self.products_df.loc[index, column] = value
+            key = self.product_key(product)
+            if key:
+                pending.setdefault(key, {}).update(status)
+                keys.append(key)
+        self.get_ledger().record_digest(channel, keys, [message['message_id'] for message in sent if message])
+        self.log_message(f"✅ Posted a digest of {len(rows)} products to {channel} in {len(messages)} message(s)")
+        return True
+        
+    def next_stream_positions(self, attempted):
+        """Return eligible row positions, leaving out products attempted in this run.
+        
+        `attempted` holds product keys, and row positions for rows without a key.
+        """
+        positions = self.eligible_positions()
+        if attempted and len(positions):
+            keys = self.product_keys().to_numpy()[positions]
+            rows = [item for item in attempted if not isinstance(item, str)]
+            skip = np.isin(keys, [item for item in attempted if isinstance(item, str)]) | np.isin(positions, rows)
+            positions = positions[~skip]
+        return positions
+        
+    def get_catalog_mtimes(self, paths=None, poll_feeds=False):
+        """Return the modification time of each catalog workbook (the content version of feeds).
+        
+        With poll_feeds, feeds not checked within FEED_POLL_INTERVAL are re-fetched first.
+        """
+        if paths is None:
+            paths = {source['path'] for source in self.catalog_layout}
+        feeds = [self.feed_cache.urls[path] for path in paths if path in self.feed_cache.urls]
+        if poll_feeds and feeds:
+            self.feed_cache.fetch_all(feeds, max_age=FEED_POLL_INTERVAL)
+        mtimes = {}
+        for path in paths:
+            if path in self.feed_cache.urls:
+                mtimes[path] = self.feed_cache.version(path)
+                continue
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+        
+    def catalog_changed_on_disk(self):
+        """Return True when a catalog workbook changed since it was loaded or saved by the app"""
+        return bool(self.catalog_layout) and self.get_catalog_mtimes(poll_feeds=True) != self.catalog_mtimes
+        
+    def sync_catalog_file(self, pending):
+        """Save posting status, first reloading the catalog when the file was edited meanwhile.
+        
+        `pending` maps product keys to their new tracking values; it is cleared once saved.
+        """
+        if self.catalog_changed_on_disk():
+            # Don't overwrite rows added or edited by someone else - merge our status into them
+            self.log_message("Excel file changed while posting - merging posting status into it")
+            self.refresh_excel_data()
+            if self.catalog_changed_on_disk():
+                self.log_message("⚠️ Could not reload the Excel file - keeping posting status until the next save")
+                return
+            keys = self.product_keys()
+            for index, key in keys[keys.isin(list(pending))].items():
+                for column, value in pending[key].items():
+                    self.products_df.loc[index, column] = value
+        if pending:
+            self.save_products_df()
+        pending.clear()
+        
+    def send_message_to_channel(self, channel, message, product_row):
+        """Send message to a Telegram channel, retrying transient failures.
+        
+        Returns the list of sent Telegram messages (more than one when a long
+        post is split) or None. The reason for a failure is kept in
+        self.channel_failures for the product's channel_status.
+        """
+        try:
+            # Photo with caption or text message, validated offline first so a post
+            # Telegram would reject never spends an API call or a rate-limit slot
+            parts, problems = self.prepare_post(message, product_row)
+        except Exception as e:
+            self.channel_failures[channel] = f"failed ({e})"
+            logging.error(f"Error preparing message for {channel}: {e}")
+            return None
+        errors = [text for severity, text in problems if severity == 'error']
+        if errors:
+            self.channel_failures[channel] = f"failed (preflight: {errors[0]})"
+            self.log_message(f"Preflight failed for {channel}: {'; '.join(errors)}")
+            return None
+        return self.deliver_to_channel(channel, parts, self.product_key(product_row) or None)
+        
+    def copy_messages_to_channel(self, channel, source, message_ids, intent_key=None):
+        """Copy messages of the fan-out source channel into a channel (one copyMessages call per 100).
+        
+        Returns the list of new messages ({'message_id'}) or None, like send_message_to_channel.
+        """
+        from_chat_id = self.resolve_chat_id(source)
+        calls = [('copyMessages', {'from_chat_id': from_chat_id,
+                                   'message_ids': json.dumps(message_ids[start:start + COPY_BATCH_SIZE])})
+                 for start in range(0, len(message_ids), COPY_BATCH_SIZE)]
+        sent = self.deliver_to_channel(channel, calls, intent_key)
+        return None if sent is None else [message for batch in sent for message in batch]
+        
+    def deliver_to_channel(self, channel, calls, intent_key=None):
+        """Make a post's Bot API calls in a channel, retrying transient failures; returns their results or None.
+        
+        With an `intent_key` (the product key) each call is made through send_once,
+        so a call that may already have posted is never simply repeated (except
+        with a shared job store, where other computers post with the same bot
+        and a lost post can't be told apart from theirs). The
+        parts of a multi-part post are recorded as they are sent, so a post
+        that failed part-way resumes from its first missing part; without a
+        key the parts already sent are deleted instead.
+        """
+        breaker = self.circuit_breakers.setdefault(channel, ChannelCircuitBreaker())
+        if not breaker.allow():
+            self.channel_failures[channel] = f"skipped (circuit open: {breaker.last_error})"
+            return None
+            
+        exactly_once = intent_key and not self.job_store_var.get().strip()
+        multipart = len(calls) > 1
+        content_hash = post_content_hash(calls)
+        done = self.get_ledger().sent_parts(intent_key, channel, content_hash) if intent_key and multipart else {}
+        if done:
+            self.log_message(f"Resuming the post to {channel} after {len(done)} of {len(calls)} parts")
+        sent = []
+        try:
+            client = self.bot_client()
+            for part, (method, data) in enumerate(calls):
+                if part in done:
+                    sent.append(done[part])
+                    continue
+                data = dict(data, chat_id=self.resolve_chat_id(channel))
+                if exactly_once:
+                    sent.append(self.send_once(client, method, data, channel, intent_key, part))
                 else:
-                    try:
-                        error_detail = response.json().get('description', f'HTTP {response.status_code}')
-                    except:
-                        error_detail = f'HTTP {response.status_code}'
-                    error_msg = error_detail
-                logging.error(f"Failed to send message to {channel}: {error_msg}")
-                self.log_message(f"Telegram API Error for {channel}: {error_msg}")
-                return False
+                    sent.append(self.call_with_retry(client, method, data, channel))
+                if intent_key and multipart:
+                    self.get_ledger().record_part(intent_key, channel, part, content_hash, sent[-1])
+            if intent_key and multipart:
+                self.get_ledger().clear_parts(intent_key, channel)
+            breaker.record_success()
+            self.channel_failures.pop(channel, None)
+            return sent
                 
+        except TelegramAPIError as e:
+            if not intent_key and sent:
+                self.delete_sent_parts(client, channel, sent)
+            # A product's own bad request (photo URL, caption length) says nothing about the channel
+            if e.transient or e.channel_error:
+                breaker.record_failure(e, channel_error=e.channel_error)
+            if e.unknown and exactly_once:
+                # Not retried as a failure: it is checked for before posting there again
+                self.channel_failures[channel] = f"unknown ({e.description})"
+                self.log_message(f"⚠️ Not sure whether the post reached {channel} ({e.description}) - "
+                                 f"it will be looked for before posting there again")
+                return None
+            self.channel_failures[channel] = f"failed ({e.description})"
+            logging.error(f"Failed to send message to {channel}: {e.description}")
+            self.log_message(f"Telegram API Error for {channel}: {e.description}")
+            if breaker.state == 'open':
+                self.log_message(f"⚠️ Pausing {channel} for {breaker.cooldown:.0f} seconds (circuit open)")
+            return None
+            
         except Exception as e:
+            if not intent_key and sent:
+                self.delete_sent_parts(client, channel, sent)
+            self.channel_failures[channel] = f"failed ({e})"
             logging.error(f"Error sending message to {channel}: {e}")
+            return None
+            
+    def delete_sent_parts(self, client, channel, sent):
+        """Delete the parts of a post that failed part-way, so sending it again doesn't repeat them"""
+        message_ids = [message['message_id'] for result in sent
+                       for message in (result if isinstance(result, list) else [result]) if message]
+        try:
+            client.call('deleteMessages', {'chat_id': self.resolve_chat_id(channel),
+                                           'message_ids': json.dumps(message_ids)})
+        except Exception as e:
+            self.log_message(f"⚠️ Couldn't delete the {len(message_ids)} part(s) already posted to {channel}: {e}")
+            
+    def get_ledger(self):
+        """Return the post ledger, opening it on first use"""
+        if self.ledger is None:
+            self.ledger = PostLedger()
+        return self.ledger
+        
+    def get_id_column(self, columns=None):
+        """Return the column that identifies a product across catalog reloads"""
+        columns = self.products_df.columns.tolist() if columns is None else list(columns)
+        columns = [col for col in columns if col not in TRACKING_COLUMNS]
+        configured = self.id_column_var.get().strip()
+        if configured in columns:
+            return configured
+        for col in columns:
+            if re.sub(r'[\s_-]', '', str(col).lower()) in ('id', 'productid', 'sku', 'itemid', 'asin'):
+                return col
+        return columns[0] if columns else None
+        
+    def apply_feed_status(self, frame, status):
+        """Restore the saved tracking columns of a feed's rows (matched by product key)"""
+        column = self.get_id_column(frame.columns)
+        if not status or column is None:
+            return frame
+        keys = frame[column].astype(str).str.strip().where(frame[column].notna(), "")
+        for col in TRACKING_COLUMNS:
+            saved = keys.map(lambda key: status.get(key, {}).get(col))
+            current = frame[col] if col in frame.columns else ('pending' if col == 'posted_status' else '')
+            frame[col] = saved.where(saved.notna(), current)
+        return frame
+        
+    def product_key(self, product):
+        """Return a stable key for a product (value of its ID column)"""
+        column = self.get_id_column(product.index)
+        value = product.get(column) if column else None
+        return "" if value is None or pd.isna(value) else str(value).strip()
+        
+    def product_keys(self):
+        """Return the key of every catalog row, as product_key() computes it"""
+        column = self.products_df[self.get_id_column()]
+        return column.astype(str).str.strip().where(column.notna(), "")
+        
+    def record_sent_post(self, product, channel, message, sent, rendered_at):
+        """Remember the message ids and content of a post so it can be edited later"""
+        try:
+            key = self.product_key(product)
+            if not key:
+                return
+            parts, _ = self.prepare_post(message, product)
+            kind = 'photo' if parts[0][0] == 'sendPhoto' else 'text'
+            photo = str(parts[0][1]['photo']) if kind == 'photo' else None
+            message_ids = [message['message_id'] for message in sent if message]
+            self.get_ledger().record_post(key, channel, message_ids, kind, post_content_hash(parts), rendered_at, photo)
+        except Exception as e:
+            logging.error(f"Error recording post of {channel} in ledger: {e}")
+            
+    def worker_busy(self):
+        """Warn and return True while posting or another background task runs"""
+        if self.worker_running:
+            messagebox.showwarning("Warning", "Posting or another task is running - "
+                                              "stop it and wait for it to finish first.")
+        return self.worker_running
+        
+    def run_background_task(self, name, task):
+        """Run a Bot API task in a worker thread, sharing the Start/Stop controls with posting"""
+        # One worker at a time: its end resets the shared posting state
+        if self.worker_busy():
+            return
+            
+        def run():
+            try:
+                self.update_status(f"{name}...")
+                self.update_status(f"{name} completed! {task()}")
+            except Exception as e:
+                self.log_message(f"Error in {name.lower()}: {e}")
+                self.update_status(f"Error: {e}")
+            finally:
+                self.finish_worker()
+                
+        self.posting_active = True
+        self.worker_running = True
+        self.start_btn.config(state=tk.DISABLED)
+        self.stop_btn.config(state=tk.NORMAL)
+        thread = threading.Thread(target=self.profiled(re.sub(r'\W+', '-', name.lower()), run))
+        thread.daemon = True
+        thread.start()
+        
+    def start_sync(self):
+        """Start editing posted messages whose product data changed"""
+        if self.worker_busy() or not self.validate_config():
+            return
+        self.ensure_tab('message')
+        self.run_background_task("Updating edited posts", lambda: f"Updated {self.sync_edits()} posts.")
+        
+    def start_cleanup(self):
+        """Find expired posts and delete them after confirmation"""
+        if self.worker_busy() or not self.validate_config():
+            return
+        expired = self.find_expired_posts()
+        if not expired:
+            messagebox.showinfo("Clean Up", "No expired posts found.")
+            return
+        messages = sum(len(entry['message_ids']) for entry in expired)
+        reasons = {}
+        for entry in expired:
+            reasons[entry['reason']] = reasons.get(entry['reason'], 0) + 1
+        summary = "\n".join(f"• {reason}: {count}" for reason, count in reasons.items())
+        if messagebox.askyesno("Clean Up", f"Delete {messages} messages of {len(expired)} expired posts?\n\n{summary}"):
+            self.run_background_task("Deleting expired posts", 
+                                     lambda: f"Deleted {self.delete_expired_posts(expired)} messages.")
+        
+    def find_expired_posts(self):
+        """Return ledger entries that match a retention rule, each with a 'reason'"""
+        entries = self.get_ledger().all_posts()
+        max_age_days = self.retention_days_var.get()
+        stock_column = self.retention_stock_column_var.get().strip()
+        
+        catalog_keys = None
+        sold_out = set()
+        if self.products_df is not None and self.get_id_column():
+            keys = self.products_df[self.get_id_column()].astype(str).str.strip()
+            catalog_keys = set(keys)
+            if stock_column in self.products_df.columns:
+                stock = pd.to_numeric(self.products_df[stock_column], errors='coerce')
+                sold_out = set(keys[(stock <= 0).to_numpy(dtype=bool)])
+                
+        expired = []
+        now = time.time()
+        for entry in entries:
+            if max_age_days and now - entry['posted_at'] > max_age_days * 86400:
+                entry['reason'] = f"older than {max_age_days} days"
+            elif self.retention_removed_var.get() and catalog_keys is not None and entry['product_key'] not in catalog_keys:
+                entry['reason'] = "removed from the Excel file"
+            elif entry['product_key'] in sold_out:
+                entry['reason'] = f"{stock_column} is 0"
+            else:
+                continue
+            expired.append(entry)
+        return expired
+        
+    def delete_expired_posts(self, expired):
+        """Delete expired posts with batched deleteMessages calls; returns messages deleted"""
+        client = self.bot_client()
+        ledger = self.get_ledger()
+        by_channel = {}
+        for entry in expired:
+            by_channel.setdefault(entry['channel'], []).append(entry)
+            
+        deleted = 0
+        for channel, entries in by_channel.items():
+            # Posts with no recorded message ids are just forgotten
+            ledger.delete_posts([(entry['product_key'], channel) for entry in entries if not entry['message_ids']])
+            # A post with more ids than one call takes is split over several calls
+            pieces = [(n, entry['message_ids'][start:start + DELETE_BATCH_SIZE])
+                      for n, entry in enumerate(entries)
+                      for start in range(0, len(entry['message_ids']), DELETE_BATCH_SIZE)]
+            remaining = Counter(n for n, _ in pieces)
+            failed = set()
+            while pieces:
+                if not self.posting_active:
+                    return deleted
+                # Fill each call with up to DELETE_BATCH_SIZE message ids (posts may have several)
+                batch, message_ids = [], []
+                while pieces and len(message_ids) + len(pieces[0][1]) <= DELETE_BATCH_SIZE:
+                    n, ids = pieces.pop(0)
+                    batch.append(n)
+                    message_ids.extend(ids)
+                try:
+                    self.call_with_retry(client, 'deleteMessages', 
+                                         {'chat_id': self.resolve_chat_id(channel), 
+                                          'message_ids': json.dumps(message_ids)}, channel)
+                except TelegramAPIError as e:
+                    failed.update(batch)
+                    self.log_message(f"❌ Failed to delete {len(message_ids)} messages in {channel}: {e.description}")
+                    continue
+                remaining.subtract(batch)
+                # A post is forgotten once all of its messages are deleted
+                ledger.delete_posts([(entries[n]['product_key'], channel) for n in dict.fromkeys(batch)
+                                     if remaining[n] == 0 and n not in failed])
+                deleted += len(message_ids)
+                self.log_message(f"🗑️ Deleted {len(message_ids)} expired messages in {channel}")
+                # Stay well inside the per-chat rate limit between batches
+                self.wait_while_active(1)
+        return deleted
+        
+    def sync_edits(self):
+        """Edit posted messages whose re-rendered content changed; returns the number edited.
+        
+        Each post is re-rendered with its original {timestamp}, so only real
+        product changes (price, text, image) produce a different hash.
+        """
+        ledger = self.get_ledger()
+        client = self.bot_client()
+        posted = self.products_df[self.products_df['posted_status'].isin(['posted', 'partial'])]
+        edited = 0
+        
+        for index, product in product_rows(posted):
+            if not self.posting_active:
+                break
+            key = self.product_key(product)
+            for entry in ledger.posts_for(key) if key else []:
+                channel = entry['channel']
+                message = self.format_product_message(product, timestamp=entry['rendered_at'], channel=channel)
+                parts, problems = self.prepare_post(message, product)
+                content_hash = post_content_hash(parts)
+                if content_hash == entry['content_hash']:
+                    continue
+                    
+                identifier = self.describe_product(product, index)
+                kind = 'photo' if parts[0][0] == 'sendPhoto' else 'text'
+                if any(severity == 'error' for severity, _ in problems):
+                    self.log_message(f"⚠️ Not updating '{identifier}' in {channel}: new content fails preflight")
+                    continue
+                if kind != entry['kind'] or len(parts) != len(entry['message_ids']):
+                    self.log_message(f"⚠️ Can't update '{identifier}' in {channel} in place "
+                                     f"(message layout changed) - repost it to refresh")
+                    continue
+                    
+                photo = str(parts[0][1]['photo']) if kind == 'photo' else None
+                try:
+                    for message_id, (method, data) in zip(entry['message_ids'], parts):
+                        self.edit_message(client, channel, message_id, method, data, entry['photo'])
+                    ledger.update_hash(key, channel, content_hash, photo)
+                    edited += 1
+                    self.log_message(f"✏️ Updated '{identifier}' in {channel}")
+                except TelegramAPIError as e:
+                    self.log_message(f"❌ Failed to update '{identifier}' in {channel}: {e.description}")
+        return edited
+        
+    def edit_message(self, client, channel, message_id, method, data, photo=None):
+        """Edit one posted message to match a planned sendPhoto/sendMessage call.
+        
+        `photo` is the photo the message shows now (None if not known); while
+        it stays the same only the caption is edited, so Telegram doesn't
+        fetch the photo again.
+        """
+        target = {'chat_id': self.resolve_chat_id(channel), 'message_id': message_id}
+        if method == 'sendMessage':
+            edit_method, edit_data = 'editMessageText', dict(target, text=data['text'])
+        elif photo is not None and str(data['photo']) == photo:
+            edit_method, edit_data = 'editMessageCaption', dict(target, caption=data['caption'])
+        else:
+            # editMessageMedia replaces the photo and caption together
+            media = {'type': 'photo', 'media': str(data['photo']), 'caption': data['caption']}
+            edit_method, edit_data = 'editMessageMedia', dict(target, media=json.dumps(media))
+        try:
+            self.call_with_retry(client, edit_method, edit_data, channel)
+        except TelegramAPIError as e:
+            # Already showing this content - nothing to change
+            if 'message is not modified' not in e.description.lower():
+                raise
+                
+    def call_with_retry(self, client, method, data, channel, intent=None):
+        """Call the Bot API, retrying transient errors with exponential backoff and jitter.
+        
+        For a posting call with an `intent`, a call that may have posted is only
+        repeated once reconcile_send found that it didn't.
+        """
+        for attempt in range(1, SEND_MAX_ATTEMPTS + 1):
+            try:
+                return client.call(method, data)
+            except TelegramAPIError as e:
+                if not e.transient or attempt == SEND_MAX_ATTEMPTS or not self.posting_active:
+                    raise
+                if e.retry_after:
+                    # Flood control tells us exactly how long to wait
+                    delay = float(e.retry_after)
+                else:
+                    delay = random.uniform(0, min(SEND_BACKOFF_MAX, SEND_BACKOFF_BASE * 2 ** (attempt - 1)))
+                self.log_message(f"⏳ {channel}: {e.description} - retry {attempt}/{SEND_MAX_ATTEMPTS - 1} "
+                                 f"in {delay:.1f} seconds")
+                self.wait_while_active(delay)
+                if e.unknown and intent is not None:
+                    found = self.reconcile_send(client, channel, intent)
+                    if found:
+                        self.log_message(f"✅ {channel}: the timed-out post did arrive - not sending it again")
+                        return found
+                    if found is None:
+                        raise
+                        
+    def send_once(self, client, method, data, channel, intent_key, part):
+        """Make a posting call so it posts at most once, even across timeouts and restarts.
+        
+        An intent is stored before the call and removed once the outcome is
+        known. A call left unknown (timed out, or the app stopped) is looked for
+        with reconcile_send before anything is sent again. One that still can't
+        be told apart after RECONCILE_MAX_CHECKS sessions is sent again, with a
+        warning, rather than blocking the product in that channel for good.
+        """
+        ledger = self.get_ledger()
+        intent = ledger.open_intent(intent_key, channel, part)
+        if intent:
+            found = self.reconcile_send(client, channel, intent)
+            if found is None:
+                checks = ledger.count_check(intent)
+                if checks < RECONCILE_MAX_CHECKS:
+                    raise TelegramAPIError("an earlier post could not be confirmed yet", unknown=True)
+                self.log_message(f"⚠️ {channel}: still can't tell whether an earlier post arrived after "
+                                 f"{checks} checks - posting it again, check the channel for a duplicate")
+                ledger.close_intent(intent)
+            elif found:
+                self.log_message(f"✅ {channel}: found the earlier post that timed out - not sending it again")
+                ledger.close_intent(intent)
+                return found
+                
+        expected = len(json.loads(data['message_ids'])) if method == 'copyMessages' else 1
+        known = self.get_channel_message_ids(channel)
+        intent = ledger.begin_send(intent_key, channel, part, method, expected, max(known, default=None))
+        try:
+            result = self.call_with_retry(client, method, data, channel, intent)
+        except TelegramAPIError as e:
+            if not e.unknown:
+                ledger.close_intent(intent)
+            raise
+        ledger.close_intent(intent)
+        known.update(message['message_id'] for message in (result if isinstance(result, list) else [result]))
+        return result
+        
+    def get_channel_message_ids(self, channel):
+        """Return the set of message ids known to be posted by the app in a channel"""
+        if channel not in self.channel_message_ids:
+            self.channel_message_ids[channel] = self.get_ledger().known_message_ids(channel)
+        return self.channel_message_ids[channel]
+        
+    def reconcile_send(self, client, channel, intent):
+        """Look for the messages of a posting call whose outcome is unknown.
+        
+        Channel message ids are sequential, so the post can only be one of the
+        ids right after the last message known before the call (or, if none
+        was known, right before the first one known now). Each unknown id is
+        probed with editMessageReplyMarkup without buttons: for a message of
+        this bot without buttons - every post of this app - Telegram answers
+        "message is not modified" and changes nothing.
+        
+        The probe can't read a message, so a match is only trusted when the
+        whole window holds exactly the call's messages, in a row, and no other
+        open call could have posted them.
+        
+        Returns the call's result rebuilt from the ids found, False when
+        nothing was posted, or None when it can't be told (yet).
+        """
+        known = self.get_channel_message_ids(channel)
+        candidates = self.reconcile_window(intent, known)
+        if candidates is None:
+            return None
+            
+        chat_id = self.resolve_chat_id(channel)
+        found = []
+        for message_id in candidates:
+            if message_id in known:
+                continue
+            try:
+                client.call('editMessageReplyMarkup', {'chat_id': chat_id, 'message_id': message_id})
+            except TelegramAPIError as e:
+                if 'not modified' in e.description.lower():
+                    found.append(message_id)
+                elif e.transient:
+                    return None
+                # Otherwise there's no message, or it isn't the bot's
+        if not found:
             return False
+        if found != list(range(found[0], found[0] + intent['expected'])):
+            self.log_message(f"⚠️ {channel}: {len(found)} unknown message(s) where the timed-out post "
+                             f"should be - not matching them, check the channel")
+            return None
+        for other in self.get_ledger().open_intents(channel):
+            if (other['intent_key'], other['part']) == (intent['intent_key'], intent['part']):
+                continue
+            window = self.reconcile_window(other, known)
+            if window is None or any(message_id in window for message_id in found):
+                self.log_message(f"⚠️ {channel}: another timed-out post may be the one found - "
+                                 f"not matching it, check the channel")
+                return None
+        known.update(found)
+        if intent['method'] == 'copyMessages':
+            return [{'message_id': message_id} for message_id in found]
+        return {'message_id': found[0]}
+        
+    def reconcile_window(self, intent, known):
+        """Return the message ids a posting call's messages can have, or None if that can't be told"""
+        size = intent['expected'] + RECONCILE_PROBES
+        if intent['after_id'] is not None:
+            return range(intent['after_id'] + 1, intent['after_id'] + 1 + size)
+        if known:
+            return range(max(1, min(known) - size), min(known))
+        return None
+        
+    def wait_while_active(self, seconds):
+        """Sleep for up to `seconds`, returning early if posting is stopped"""
+        deadline = time.monotonic() + seconds
+        while self.posting_active:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(0.5, remaining))
             
-    def send_image_to_channel(self, channel, image_url, bot_token):
+    def send_image_to_channel(self, channel, image_url):
         """Send image to Telegram channel"""
         try:
-            url = f"https://api.telegram.org/bot{bot_token}/sendPhoto"
-            data = {
-                'chat_id': channel,
-                'photo': image_url
-            }
-            
-            response = requests.post(url, data=data, timeout=30)
-            return response.status_code == 200 and response.json().get('ok')
+            self.bot_client().call('sendPhoto', {'chat_id': channel, 'photo': image_url})
+            return True
             
         except Exception as e:
             logging.error(f"Error sending image to {channel}: {e}")
@@ -1399,25 +5621,32 @@ Happy posting! 🚀"""
             self.root.update_idletasks()
         
     def log_message(self, message):
-        """Add message to logs"""
+        """Add message to logs (safe to call from worker threads)"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
         
-        # Add to logs display
-        if hasattr(self, 'logs_text'):
-            self.logs_text.insert(tk.END, log_entry)
+        # The logs display is updated from the buffer on the main thread
+        self.log_buffer.append(f"[{timestamp}] {message}\n")
+        logging.info(message)
+        
+    def flush_log_buffer(self):
+        """Move buffered log lines into the logs tab in one batch"""
+        if hasattr(self, 'logs_text') and self.log_buffer:
+            entries = []
+            while self.log_buffer:
+                entries.append(self.log_buffer.popleft())
+            self.logs_text.insert(tk.END, ''.join(entries))
             self.logs_text.see(tk.END)
-            self.root.update_idletasks()
-        
-        # Also log to file - remove emojis for compatibility
-        clean_message = message.encode('ascii', errors='ignore').decode('ascii')
-        logging.info(clean_message)
+            
+    def drain_log_buffer(self):
+        """Flush the log buffer periodically on the main thread"""
+        self.flush_log_buffer()
+        self.root.after(LOG_UI_INTERVAL, self.drain_log_buffer)
         
     def refresh_logs(self):
         """Refresh logs display"""
         try:
-            if os.path.exists('telegram_product_poster.log'):
-                with open('telegram_product_poster.log', 'r', encoding='utf-8') as f:
+            if os.path.exists(LOG_FILE):
+                with open(LOG_FILE, 'r', encoding='utf-8') as f:
                     content = f.read()
                     self.logs_text.delete(1.0, tk.END)
                     self.logs_text.insert(1.0, content)
@@ -1448,7 +5677,19 @@ Happy posting! 🚀"""
             messagebox.showerror("Error", f"Failed to export logs: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Post products from Excel to Telegram channels")
+    parser.add_argument('--profile', action='store_true', 
+                        help="profile posting sessions (reports are written to the profiles folder)")
+    parser.add_argument('--flame-graph', action='store_true', 
+                        help="with --profile, also export folded stacks for a flame graph")
+    args = parser.parse_args()
+    
+    timeline = StartupTimeline()
+    timeline.mark("imports")
+    setup_logging()
+    timeline.mark("logging")
     root = tk.Tk()
+    timeline.mark("tk initialized")
     
     # Set theme
     style = ttk.Style()
@@ -1464,7 +5705,9 @@ def main():
     except:
         pass
     
-    app = TelegramProductPoster(root)
+    app = TelegramProductPoster(root, timeline)
+    app.profile_var.set(args.profile or args.flame_graph)
+    app.profile_flame_var.set(args.flame_graph)
     
     # Add disclaimer
     def show_disclaimer():
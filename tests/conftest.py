@@ -0,0 +1,30 @@
+import collections
+
+import pytest
+
+import telegram_product_poster as tpp
+
+
+class Var:
+    """Stands in for a Tk variable"""
+
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+@pytest.fixture
+def poster(tmp_path):
+    """A TelegramProductPoster with the posting state but no window"""
+    poster = object.__new__(tpp.TelegramProductPoster)
+    poster.job_store_var = Var()
+    poster.channel_message_ids = {}
+    poster.circuit_breakers = {}
+    poster.channel_failures = {}
+    poster.posting_active = True
+    poster.ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    poster.log_buffer = collections.deque()
+    poster.resolve_chat_id = lambda channel: channel
+    return poster
@@ -0,0 +1,88 @@
+import telegram_product_poster as tpp
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.cooldown
+
+
+def test_opens_after_consecutive_failures():
+    breaker = tpp.ChannelCircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.record_failure("Bad Gateway")
+        assert breaker.allow()
+    breaker.record_failure("Bad Gateway")
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.last_error == "Bad Gateway"
+
+
+def test_success_resets_the_count():
+    breaker = tpp.ChannelCircuitBreaker(failure_threshold=2)
+    breaker.record_failure("timeout")
+    breaker.record_success()
+    breaker.record_failure("timeout")
+    assert breaker.state == 'closed'
+
+
+def test_channel_error_opens_at_once():
+    breaker = tpp.ChannelCircuitBreaker()
+    breaker.record_failure("Forbidden: bot was kicked", channel_error=True)
+    assert breaker.state == 'open'
+
+
+def test_half_open_probe():
+    breaker = tpp.ChannelCircuitBreaker(failure_threshold=1, cooldown=60, max_cooldown=150)
+    breaker.record_failure("down")
+    expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+
+    # A failed probe reopens with a doubled cooldown, capped at max_cooldown
+    breaker.record_failure("down")
+    assert breaker.state == 'open' and breaker.cooldown == 120
+    expire(breaker)
+    breaker.allow()
+    breaker.record_failure("down")
+    assert breaker.cooldown == 150
+
+    expire(breaker)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.trips == 0 and breaker.last_error == ""
+
+
+def test_api_error_classification():
+    assert tpp.TelegramAPIError("timeout").transient
+    assert tpp.TelegramAPIError("Too Many Requests", error_code=429, retry_after=5).transient
+    assert tpp.TelegramAPIError("Bad Gateway", error_code=502).transient
+    kicked = tpp.TelegramAPIError("Forbidden: bot was kicked from the channel chat", error_code=403)
+    assert not kicked.transient and kicked.channel_error
+    bad = tpp.TelegramAPIError("Bad Request: message text is empty", error_code=400)
+    assert not bad.transient and not bad.channel_error
+
+
+def test_bad_token_is_not_a_channel_error():
+    assert not tpp.TelegramAPIError("Unauthorized", error_code=401).channel_error
+
+
+class RejectingBot:
+    def __init__(self, description, error_code):
+        self.error = tpp.TelegramAPIError(description, error_code=error_code)
+
+    def call(self, method, data=None, files=None, timeout=None):
+        raise self.error
+
+
+def test_product_errors_leave_the_breaker_closed(poster):
+    poster.bot_client = lambda: RejectingBot("Bad Request: wrong file identifier/HTTP URL specified", 400)
+    for _ in range(5):
+        assert poster.deliver_to_channel('@a', [('sendPhoto', {'photo': 'x', 'caption': 'y'})]) is None
+    assert poster.circuit_breakers['@a'].state == 'closed'
+
+
+def test_channel_errors_open_the_breaker(poster):
+    poster.bot_client = lambda: RejectingBot("Bad Request: chat not found", 400)
+    poster.deliver_to_channel('@a', [('sendMessage', {'text': 'hi'})])
+    assert poster.circuit_breakers['@a'].state == 'open'
+    assert poster.deliver_to_channel('@a', [('sendMessage', {'text': 'hi'})]) is None
+    assert poster.channel_failures['@a'].startswith("skipped (circuit open")
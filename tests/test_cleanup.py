@@ -0,0 +1,52 @@
+import json
+
+import telegram_product_poster as tpp
+
+
+class DeleteBot:
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.calls = []
+
+    def call(self, method, data=None, files=None, timeout=None):
+        assert method == 'deleteMessages'
+        self.calls.append(json.loads(data['message_ids']))
+        if len(self.calls) == self.fail_on_call:
+            raise tpp.TelegramAPIError("Bad Request: message can't be deleted", error_code=400)
+        return True
+
+
+def expire(poster, posts):
+    for key, message_ids in posts.items():
+        poster.ledger.record_post(key, '@a', message_ids, 'text', 'h', 1.0)
+    return poster.ledger.all_posts()
+
+
+def test_posts_are_packed_into_batches(poster):
+    bot = DeleteBot()
+    poster.bot_client = lambda: bot
+    poster.wait_while_active = lambda seconds: None
+    expired = expire(poster, {f'p{i}': [i * 10 + 1, i * 10 + 2] for i in range(60)})
+    assert poster.delete_expired_posts(expired) == 120
+    assert [len(ids) for ids in bot.calls] == [100, 20]
+    assert poster.ledger.all_posts() == []
+
+
+def test_large_post_is_split_across_calls(poster):
+    bot = DeleteBot()
+    poster.bot_client = lambda: bot
+    poster.wait_while_active = lambda seconds: None
+    expired = expire(poster, {'big': list(range(1, 251)), 'small': [300], 'none': []})
+    assert poster.delete_expired_posts(expired) == 251
+    assert sorted(i for ids in bot.calls for i in ids) == list(range(1, 251)) + [300]
+    assert all(len(ids) <= tpp.DELETE_BATCH_SIZE for ids in bot.calls)
+    assert poster.ledger.all_posts() == []
+
+
+def test_post_with_a_failed_part_is_kept(poster):
+    bot = DeleteBot(fail_on_call=2)
+    poster.bot_client = lambda: bot
+    poster.wait_while_active = lambda seconds: None
+    expired = expire(poster, {'big': list(range(1, 151))})
+    assert poster.delete_expired_posts(expired) == 100
+    assert [entry['product_key'] for entry in poster.ledger.all_posts()] == ['big']
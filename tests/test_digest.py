@@ -0,0 +1,26 @@
+import telegram_product_poster as tpp
+
+
+def test_entries_share_a_message():
+    assert tpp.pack_digest("Today's deals", ["A - $1", "B - $2"]) == ["Today's deals\n\nA - $1\n\nB - $2"]
+
+
+def test_blank_entries_and_header_are_skipped():
+    assert tpp.pack_digest("  ", ["", "A", "  "]) == ["A"]
+
+
+def test_entries_are_kept_whole_across_messages():
+    entries = [f"Product {i}: " + "x" * 20 for i in range(5)]
+    messages = tpp.pack_digest("Deals", entries, limit=70)
+    assert all(tpp.telegram_length(message) <= 70 for message in messages)
+    assert messages[0].startswith("Deals\n\n")
+    packed = [entry for message in messages for entry in message.split("\n\n")]
+    assert packed == ["Deals"] + entries
+
+
+def test_long_entry_is_split():
+    entry = "word " * 40
+    messages = tpp.pack_digest("Deals", ["short", entry.strip(), "after"], limit=50)
+    assert all(tpp.telegram_length(message) <= 50 for message in messages)
+    assert messages[0] == "Deals\n\nshort"
+    assert " ".join(messages[1:]).split() == entry.split() + ["after"]
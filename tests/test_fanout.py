@@ -0,0 +1,82 @@
+import json
+
+import pandas as pd
+import pytest
+
+import telegram_product_poster as tpp
+from conftest import Var
+
+
+class FakeBot:
+    """Copies every message it is asked to, as message 5000 + the source id"""
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.calls = []
+
+    def call(self, method, data=None, files=None, timeout=None):
+        assert method == 'copyMessages'
+        message_ids = json.loads(data['message_ids'])
+        self.calls.append((data['chat_id'], message_ids))
+        return [{'message_id': 5000 + message_id} for message_id in message_ids if message_id not in self.skip]
+
+
+@pytest.fixture
+def fanout(poster):
+    poster.fanout_channel_var = Var('@src')
+    poster.id_column_var = Var('id')
+    poster.include_image_var = Var(False)
+    poster.image_column_var = Var('')
+    poster.auto_split_var = Var(False)
+    poster.products_df = pd.DataFrame({'id': ['p0', 'p1', 'p2'], 'name': ['A', 'B', 'C']})
+    return poster
+
+
+def jobs_for(poster, source_ids, channels=('@a', '@b')):
+    """Jobs as the send stage leaves them: posted to the source, copies still to make"""
+    jobs = []
+    for (index, product), ids in zip(tpp.product_rows(poster.products_df), source_ids):
+        status = poster.update_product_status(index, ['@src', *channels], {'@src': 'posted'})
+        copies = [(channel, ids, f"{product['name']} post", '2024-01-01 10:00') for channel in channels]
+        jobs.append({'index': index, 'product': product, 'status': status, 'copies': copies})
+    return jobs
+
+
+def test_one_copy_call_per_channel(fanout):
+    bot = FakeBot()
+    fanout.bot_client = lambda: bot
+    jobs = jobs_for(fanout, [[11], [12, 13], [14]])
+    fanout.copy_fanout_batch(jobs, ['@src', '@a', '@b'])
+
+    assert bot.calls == [('@a', [11, 12, 13, 14]), ('@b', [11, 12, 13, 14])]
+    assert fanout.products_df['posted_status'].tolist() == ['posted'] * 3
+    assert jobs[1]['status']['channel_status'] == '@src: posted; @a: posted; @b: posted'
+    assert [entry['message_ids'] for entry in fanout.ledger.posts_for('p1')] == [[5012, 5013], [5012, 5013]]
+
+
+def test_reused_older_source_posts_are_sorted(fanout):
+    bot = FakeBot()
+    fanout.bot_client = lambda: bot
+    fanout.copy_fanout_batch(jobs_for(fanout, [[20], [3], [21]], channels=('@a',)), ['@src', '@a'])
+    assert bot.calls == [('@a', [3, 20, 21])]
+    assert fanout.ledger.posts_for('p1')[0]['message_ids'] == [5003]
+    assert fanout.ledger.posts_for('p2')[0]['message_ids'] == [5021]
+
+
+def test_skipped_copies_are_not_matched_to_products(fanout):
+    fanout.bot_client = lambda: FakeBot(skip={12})
+    fanout.copy_fanout_batch(jobs_for(fanout, [[11], [12], [13]], channels=('@a',)), ['@src', '@a'])
+    assert fanout.products_df['posted_status'].tolist() == ['posted'] * 3
+    assert fanout.ledger.all_posts() == []
+
+
+def test_failed_copy_leaves_the_products_partial(fanout):
+    class Down(FakeBot):
+        def call(self, method, data=None, files=None, timeout=None):
+            raise tpp.TelegramAPIError("Forbidden: bot is not a member of the channel chat", error_code=403)
+
+    fanout.bot_client = lambda: Down()
+    jobs = jobs_for(fanout, [[11], [12], [13]], channels=('@a',))
+    fanout.copy_fanout_batch(jobs, ['@src', '@a'])
+    assert fanout.products_df['posted_status'].tolist() == ['partial'] * 3
+    assert jobs[0]['status']['channel_status'].startswith('@src: posted; @a: failed')
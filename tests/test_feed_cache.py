@@ -0,0 +1,117 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pandas as pd
+import pytest
+
+import telegram_product_poster as tpp
+from conftest import Var
+
+
+class Feed:
+    """A catalog feed served over HTTP with an ETag"""
+
+    def __init__(self):
+        self.body = b"id,name\n1,Shoe\n"
+        self.etag = '"v1"'
+        self.status = 200
+        self.requests = []
+
+
+@pytest.fixture
+def feed():
+    feed = Feed()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            feed.requests.append(dict(self.headers))
+            if feed.status != 200:
+                self.send_response(feed.status)
+                self.end_headers()
+            elif self.headers.get('If-None-Match') == feed.etag:
+                self.send_response(304)
+                self.end_headers()
+            else:
+                self.send_response(200)
+                self.send_header('ETag', feed.etag)
+                self.send_header('Content-Length', str(len(feed.body)))
+                self.end_headers()
+                self.wfile.write(feed.body)
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    feed.url = f"http://127.0.0.1:{server.server_port}/catalog.csv"
+    yield feed
+    server.shutdown()
+    server.server_close()
+
+
+def test_conditional_fetch(tmp_path, feed):
+    cache = tpp.FeedCache(str(tmp_path))
+    result = cache.fetch_all([feed.url])[feed.url]
+    assert result['changed'] and result['error'] is None
+    assert result['path'].endswith('.csv')
+    with open(result['path'], 'rb') as f:
+        assert f.read() == feed.body
+    version = cache.version(result['path'])
+
+    # Unchanged: the server answers 304 to the saved ETag
+    result = cache.fetch_all([feed.url])[feed.url]
+    assert not result['changed']
+    assert feed.requests[-1]['If-None-Match'] == '"v1"'
+
+    # A new ETag with the same content doesn't count as a change
+    feed.etag = '"v2"'
+    assert not cache.fetch_all([feed.url])[feed.url]['changed']
+    assert cache.version(result['path']) == version
+
+    feed.body, feed.etag = b"id,name\n1,Shoe\n2,Hat\n", '"v3"'
+    assert cache.fetch_all([feed.url])[feed.url]['changed']
+    assert cache.version(result['path']) != version
+
+
+def test_recently_checked_feed_is_not_requested(tmp_path, feed):
+    cache = tpp.FeedCache(str(tmp_path))
+    cache.fetch_all([feed.url])
+    cache.fetch_all([feed.url], max_age=60)
+    assert len(feed.requests) == 1
+
+
+def test_failed_fetch_keeps_the_copy(tmp_path, feed):
+    cache = tpp.FeedCache(str(tmp_path))
+    path = cache.fetch_all([feed.url])[feed.url]['path']
+    feed.status = 500
+    result = cache.fetch_all([feed.url])[feed.url]
+    assert result['error'] and not result['changed']
+    with open(path, 'rb') as f:
+        assert f.read() == feed.body
+    assert not os.path.exists(path + '.part')
+
+
+def test_status_round_trip(tmp_path):
+    cache = tpp.FeedCache(str(tmp_path))
+    path = cache.local_path("https://example.com/feed?format=xml")
+    assert path.endswith('.xlsx')
+    assert cache.load_status(path) == {}
+    cache.save_status(path, {'p1': {'posted_status': 'posted'}})
+    assert cache.load_status(path) == {'p1': {'posted_status': 'posted'}}
+
+
+def test_saved_feed_status_has_no_nan(poster, tmp_path):
+    poster.feed_cache = tpp.FeedCache(str(tmp_path))
+    path = poster.feed_cache.local_path("https://example.com/feed.csv")
+    poster.feed_cache.urls[path] = "https://example.com/feed.csv"
+    poster.catalog_layout = [{'path': path, 'sheet': 0}]
+    poster.id_column_var = Var('id')
+    poster.get_catalog_mtimes = lambda: {}
+    poster.products_df = pd.DataFrame({'id': ['1', '2'], 'posted_date': ['2024-01-01', None],
+                                       'posted_status': ['posted', 'failed'], 'channel_status': [None, None]})
+    poster.save_products_df()
+    assert poster.feed_cache.load_status(path) == {
+        '1': {'posted_date': '2024-01-01', 'posted_status': 'posted', 'channel_status': ''},
+        '2': {'posted_date': '', 'posted_status': 'failed', 'channel_status': ''}}
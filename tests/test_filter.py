@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import telegram_product_poster as tpp
+
+
+def test_precedence_and_keywords():
+    tree = tpp.parse_filter_expression('a == 1 OR b > 2 and not c != "x"')
+    assert tree == ('or', ('==', 'a', 1.0), ('and', ('>', 'b', 2.0), ('not', ('!=', 'c', 'x'))))
+
+
+def test_between_in_contains_and_quoted_columns():
+    assert tpp.parse_filter_expression('[Sale Price] between 10 and 50') == ('between', 'Sale Price', 10.0, 50.0)
+    assert tpp.parse_filter_expression("`brand` in ('A', \"B\\\"s\")") == ('in', 'brand', ['A', 'B"s'])
+    assert tpp.parse_filter_expression('name contains "red"') == ('contains', 'name', 'red')
+    assert tpp.parse_filter_expression('added >= yesterday') == ('>=', 'added', ('date', 'yesterday'))
+    assert tpp.parse_filter_expression('price = -3.5') == ('==', 'price', -3.5)
+
+
+def test_parentheses():
+    tree = tpp.parse_filter_expression('(a == 1 or a == 2) and b == 3')
+    assert tree == ('and', ('or', ('==', 'a', 1.0), ('==', 'a', 2.0)), ('==', 'b', 3.0))
+
+
+@pytest.mark.parametrize('text', ['', 'price >', 'price ~ 3', '(a == 1', 'a == 1 b', 'a between 1 or 2', '== 3'])
+def test_invalid_expressions(text):
+    with pytest.raises(tpp.FilterExpressionError):
+        tpp.parse_filter_expression(text)
+
+
+@pytest.fixture
+def index():
+    df = pd.DataFrame({
+        'name': ['Red shoe', 'Blue shoe', 'Red hat', 'Scarf', 'Belt'],
+        'category': ['Shoes', 'Shoes', 'Hats', 'Scarves', None],
+        'price': [30, '55', 12.5, None, 50],
+        'added': ['2024-01-01', '2024-02-01', 'not a date', '2024-03-01', '2024-01-15'],
+        'posted_status': ['posted', 'pending', 'pending', 'failed', 'pending'],
+    })
+    return tpp.CatalogIndex(df)
+
+
+@pytest.mark.parametrize('expression, positions', [
+    ('category == "Shoes"', [0, 1]),
+    ('Category != "Shoes"', [2, 3, 4]),
+    ('price between 12.5 and 50', [0, 2, 4]),
+    ('price > 30 or category in ("Hats", "Scarves")', [1, 2, 3, 4]),
+    ('name contains "RED" and not price >= 30', [2]),
+    ('added < "2024-02-01"', [0, 4]),
+    ('posted_status == "pending"', [1, 2, 4]),
+    ('posted_status in ("posted", "failed")', [0, 3]),
+])
+def test_catalog_index_queries(index, expression, positions):
+    assert index.query(expression).tolist() == positions
+
+
+def test_catalog_index_errors(index):
+    with pytest.raises(tpp.FilterExpressionError):
+        index.query('colour == "red"')
+    with pytest.raises(tpp.FilterExpressionError):
+        index.query('posted_status > "a"')
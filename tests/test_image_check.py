@@ -0,0 +1,47 @@
+import telegram_product_poster as tpp
+
+
+class Response:
+    def __init__(self, status_code, content_type='image/jpeg'):
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type, 'Content-Length': '100'}
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def head(self, url, **kwargs):
+        self.calls += 1
+        return Response(self.status_code)
+
+    def get(self, url, **kwargs):
+        return Response(self.status_code)
+
+
+def test_results_are_cached():
+    checker = tpp.ImageURLChecker()
+    checker.session = FakeSession(200)
+    assert checker.check_url('http://x/a.jpg')['ok']
+    assert checker.check_url('http://x/a.jpg')['ok']
+    assert checker.session.calls == 1
+
+
+def test_missing_image_is_cached():
+    checker = tpp.ImageURLChecker()
+    checker.session = FakeSession(404)
+    assert checker.check_url('http://x/a.jpg')['problem'] == "HTTP 404"
+    assert checker.cached('http://x/a.jpg')
+
+
+def test_server_errors_and_rate_limits_are_not_cached():
+    for status in (429, 502, 503):
+        checker = tpp.ImageURLChecker()
+        checker.session = FakeSession(status)
+        result = checker.check_url('http://x/a.jpg')
+        assert not result['ok'] and result['transient']
+        assert checker.cached('http://x/a.jpg') is None
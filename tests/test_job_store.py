@@ -0,0 +1,77 @@
+import threading
+
+import telegram_product_poster as tpp
+
+
+def keys(jobs):
+    return [job['product_key'] for job in jobs]
+
+
+def test_claim_in_batches(tmp_path):
+    store = tpp.JobStore(str(tmp_path / 'jobs.db'))
+    store.enqueue(['p1', 'p2', 'p3'])
+    assert keys(store.claim('a', limit=2)) == ['p1', 'p2']
+    assert keys(store.claim('b', limit=2)) == ['p3']
+    assert store.claim('c') == []
+    assert store.owns('a', 'p1') and not store.owns('b', 'p1')
+
+
+def test_finished_jobs_are_not_queued_again(tmp_path):
+    store = tpp.JobStore(str(tmp_path / 'jobs.db'))
+    store.enqueue(['p1', 'p2', 'p3'])
+    store.claim('a')
+    assert store.complete('a', 'p1', 'posted', '@x: posted')
+    assert store.complete('a', 'p2', 'partial', '@x: posted; @y: failed')
+    assert store.complete('a', 'p3', 'failed', '@x: failed')
+    store.enqueue(['p1', 'p2', 'p3'])
+    jobs = store.claim('b')
+    assert keys(jobs) == ['p2', 'p3']
+    assert jobs[0]['channel_status'] == '@x: posted; @y: failed'
+
+
+def test_expired_lease_is_taken_over_and_fenced(tmp_path):
+    store = tpp.JobStore(str(tmp_path / 'jobs.db'), lease_seconds=-1)
+    store.enqueue(['p1'])
+    store.claim('a')
+    assert not store.owns('a', 'p1')
+    assert not store.record_channel('a', 'p1', '@x: posted')
+
+    store.lease_seconds = 60
+    assert keys(store.claim('b')) == ['p1']
+    assert not store.complete('a', 'p1', 'posted', '@x: posted')
+    assert store.record_channel('b', 'p1', '@x: posted')
+    assert store.complete('b', 'p1', 'posted', '@x: posted')
+
+
+def test_renew_and_release(tmp_path):
+    store = tpp.JobStore(str(tmp_path / 'jobs.db'), lease_seconds=60)
+    store.enqueue(['p1', 'p2'])
+    store.claim('a')
+    store.renew('a')
+    assert store.owns('a', 'p2')
+    store.release('a')
+    assert not store.owns('a', 'p1')
+    assert keys(store.claim('b')) == ['p1', 'p2']
+
+
+def test_nodes_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    tpp.JobStore(path).enqueue([f'p{i}' for i in range(200)])
+    claimed = {}
+
+    def node(name):
+        store = tpp.JobStore(path)
+        claimed[name] = []
+        while True:
+            jobs = store.claim(name, limit=3)
+            if not jobs:
+                break
+            claimed[name].extend(keys(jobs))
+
+    threads = [threading.Thread(target=node, args=(f'n{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    everything = [key for jobs in claimed.values() for key in jobs]
+    assert sorted(everything) == sorted(f'p{i}' for i in range(200))
@@ -0,0 +1,114 @@
+import json
+import sqlite3
+
+import telegram_product_poster as tpp
+
+
+def test_record_and_replace_posts(tmp_path):
+    ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    ledger.record_post('p1', '@a', [11, 12], 'photo', 'h1', 100.0)
+    ledger.record_post('p1', '@b', [5], 'text', 'h1', 100.0)
+    ledger.record_post('p1', '@a', [13], 'text', 'h2', 200.0)
+    entries = {entry['channel']: entry for entry in ledger.posts_for('p1')}
+    assert entries['@a']['message_ids'] == [13]
+    assert entries['@a']['content_hash'] == 'h2' and entries['@a']['kind'] == 'text'
+    assert entries['@b']['message_ids'] == [5]
+    assert ledger.posts_for('p2') == []
+
+
+def test_update_hash_and_delete(tmp_path):
+    ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    ledger.record_post('p1', '@a', [1], 'text', 'old', 1.0)
+    ledger.record_post('p2', '@a', [2], 'text', 'old', 1.0)
+    ledger.update_hash('p1', '@a', 'new')
+    assert ledger.posts_for('p1')[0]['content_hash'] == 'new'
+    ledger.delete_posts([('p1', '@a')])
+    assert [entry['product_key'] for entry in ledger.all_posts()] == ['p2']
+
+
+def test_digests_and_known_message_ids(tmp_path):
+    ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    assert ledger.last_digest_time('@a') is None
+    ledger.record_post('p1', '@a', [1, 2], 'text', 'h', 1.0)
+    ledger.record_post('p1', '@b', [9], 'text', 'h', 1.0)
+    ledger.record_digest('@a', ['p1', 'p2'], [3])
+    assert ledger.known_message_ids('@a') == {1, 2, 3}
+    assert ledger.last_digest_time('@a') is not None
+
+
+def test_send_intents(tmp_path):
+    ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    intent = ledger.begin_send('p1', '@a', 0, 'sendMessage', 1, 10)
+    assert ledger.open_intent('p1', '@a', 0) == intent
+    assert ledger.open_intent('p1', '@a', 1) is None
+    ledger.begin_send('p2', '@a', 0, 'copyMessages', 3, None)
+    assert [open_['intent_key'] for open_ in ledger.open_intents('@a')] == ['p1', 'p2']
+    ledger.close_intent(intent)
+    assert ledger.open_intent('p1', '@a', 0) is None
+
+
+def test_sent_parts(tmp_path):
+    ledger = tpp.PostLedger(str(tmp_path / 'ledger.db'))
+    ledger.record_part('p1', '@a', 0, 'h', {'message_id': 7})
+    ledger.record_part('p1', '@a', 1, 'h', [{'message_id': 8}])
+    assert ledger.sent_parts('p1', '@a', 'h') == {0: {'message_id': 7}, 1: [{'message_id': 8}]}
+    assert ledger.sent_parts('p1', '@a', 'other') == {}
+    ledger.clear_parts('p1', '@a')
+    assert ledger.sent_parts('p1', '@a', 'h') == {}
+
+
+def test_ledger_survives_reopening(tmp_path):
+    path = str(tmp_path / 'ledger.db')
+    tpp.PostLedger(path).record_post('p1', '@a', [1], 'text', 'h', 1.0)
+    assert tpp.PostLedger(path).posts_for('p1')[0]['message_ids'] == [1]
+
+
+def test_content_hash_follows_the_calls():
+    parts = [('sendPhoto', {'photo': 'a.jpg', 'caption': 'Hi'})]
+    assert tpp.post_content_hash(parts) == tpp.post_content_hash([('sendPhoto', {'caption': 'Hi', 'photo': 'a.jpg'})])
+    assert tpp.post_content_hash(parts) != tpp.post_content_hash([('sendPhoto', {'photo': 'a.jpg', 'caption': 'Hey'})])
+
+
+def test_photo_is_recorded_and_old_ledgers_are_upgraded(tmp_path):
+    path = str(tmp_path / 'ledger.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE posts (product_key TEXT NOT NULL, channel TEXT NOT NULL, message_ids TEXT NOT NULL, "
+                 "kind TEXT NOT NULL, content_hash TEXT NOT NULL, rendered_at TEXT, posted_at REAL NOT NULL, "
+                 "updated_at REAL NOT NULL, PRIMARY KEY (product_key, channel))")
+    conn.execute("INSERT INTO posts VALUES ('p0', '@a', '1', 'photo', 'h', NULL, 1, 1)")
+    conn.commit()
+    conn.close()
+
+    ledger = tpp.PostLedger(path)
+    assert ledger.posts_for('p0')[0]['photo'] is None
+    ledger.record_post('p1', '@a', [2], 'photo', 'h', 1.0, 'https://x/a.jpg')
+    assert ledger.posts_for('p1')[0]['photo'] == 'https://x/a.jpg'
+    ledger.update_hash('p1', '@a', 'h2', 'https://x/b.jpg')
+    assert ledger.posts_for('p1')[0]['photo'] == 'https://x/b.jpg'
+
+
+class EditBot:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, method, data=None, files=None, timeout=None):
+        self.calls.append((method, data))
+        return True
+
+
+def test_caption_only_edit_keeps_the_photo(poster):
+    bot = EditBot()
+    data = {'photo': 'https://x/a.jpg', 'caption': 'Now $5'}
+    poster.edit_message(bot, '@a', 7, 'sendPhoto', data, 'https://x/a.jpg')
+    assert bot.calls == [('editMessageCaption', {'chat_id': '@a', 'message_id': 7, 'caption': 'Now $5'})]
+
+
+def test_changed_or_unknown_photo_is_replaced(poster):
+    bot = EditBot()
+    data = {'photo': 'https://x/b.jpg', 'caption': 'Now $5'}
+    poster.edit_message(bot, '@a', 7, 'sendPhoto', data, 'https://x/a.jpg')
+    poster.edit_message(bot, '@a', 7, 'sendPhoto', data)
+    assert [method for method, _ in bot.calls] == ['editMessageMedia', 'editMessageMedia']
+    assert json.loads(bot.calls[0][1]['media'])['media'] == 'https://x/b.jpg'
+    poster.edit_message(bot, '@a', 8, 'sendMessage', {'text': 'hi'})
+    assert bot.calls[-1][0] == 'editMessageText'
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+
+import pytest
+
+import telegram_product_poster as tpp
+
+
+def test_order_is_kept_across_workers():
+    def render(item):
+        time.sleep(random.uniform(0, 0.01))
+        return item * 10
+
+    pipeline = tpp.Pipeline([tpp.PipelineStage('render', render, workers=4),
+                             tpp.PipelineStage('send', lambda item: item + 1)])
+    assert list(pipeline.run(range(30))) == [i * 10 + 1 for i in range(30)]
+
+
+def test_none_drops_an_item():
+    pipeline = tpp.Pipeline([tpp.PipelineStage('render', lambda item: item if item % 2 else None)])
+    assert list(pipeline.run(range(6))) == [1, 3, 5]
+
+
+def test_stage_workers_run_in_parallel():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def media(item):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return item
+
+    list(tpp.Pipeline([tpp.PipelineStage('media', media, workers=4)]).run(range(12)))
+    assert 1 < peak[0] <= 4
+
+
+def test_stage_error_is_raised():
+    def send(item):
+        if item == 3:
+            raise ValueError("boom")
+        return item
+
+    with pytest.raises(ValueError, match="boom"):
+        list(tpp.Pipeline([tpp.PipelineStage('send', send)]).run(range(10)))
+
+
+def test_feed_error_is_raised():
+    def items():
+        yield 1
+        raise OSError("catalog gone")
+
+    with pytest.raises(OSError):
+        list(tpp.Pipeline([tpp.PipelineStage('send', lambda item: item)]).run(items()))
+
+
+def test_bounded_queues_apply_backpressure():
+    fed = []
+
+    def items():
+        for i in range(100):
+            fed.append(i)
+            yield i
+
+    results = tpp.Pipeline([tpp.PipelineStage('render', lambda item: item)], queue_size=2).run(items())
+    assert next(results) == 0
+    time.sleep(0.2)
+    # Only a few queue slots and the stage's in-flight item are read ahead
+    assert len(fed) < 10
+    results.close()
+
+
+def test_close_waits_for_running_calls():
+    started, finished = threading.Event(), threading.Event()
+
+    def send(item):
+        if item == 1:
+            started.set()
+            time.sleep(0.3)
+            finished.set()
+        return item
+
+    results = tpp.Pipeline([tpp.PipelineStage('send', send)]).run(range(5))
+    assert next(results) == 0
+    started.wait(1)
+    results.close()
+    assert finished.is_set()
+
+
+def test_profiler_sees_stage_threads():
+    def format_item(item):
+        return item
+
+    profiler = tpp.SessionProfiler('test')
+    profiler.start()
+    try:
+        stages = [tpp.PipelineStage('render', profiler.wrap(format_item), workers=3)]
+        list(tpp.Pipeline(stages).run(range(20)))
+    finally:
+        profiler.stop()
+    calls = sum(stat[1] for key, stat in profiler.stats().stats.items() if key[2] == 'format_item')
+    assert calls == 20
+    assert profiler.thread_profiles
+
+
+def test_only_one_session_is_profiled_at_a_time():
+    first = tpp.SessionProfiler('first')
+    assert first.start()
+    try:
+        assert not tpp.SessionProfiler('second').start()
+    finally:
+        first.stop()
+    second = tpp.SessionProfiler('second')
+    assert second.start()
+    second.stop()
@@ -0,0 +1,43 @@
+import telegram_product_poster as tpp
+
+
+class FakeBot:
+    bot_token = 'token'
+
+    def __init__(self, status):
+        self.status = status
+        self.checks = 0
+
+    def call(self, method, data=None, files=None, timeout=None):
+        if method == 'getMe':
+            return {'id': 1}
+        if method == 'getChat':
+            self.checks += 1
+            return {'id': -100, 'title': 'Shop', 'type': 'channel'}
+        return {'status': self.status, 'can_post_messages': True}
+
+
+def age(preflight, seconds):
+    for result in preflight.results.values():
+        result['checked_at'] -= seconds
+
+
+def test_working_channel_is_cached_for_the_ttl():
+    preflight = tpp.ChannelPreflight(ttl=3600, failed_ttl=60)
+    bot = FakeBot('administrator')
+    assert preflight.check_all(bot, ['@shop'])['@shop']['ok']
+    age(preflight, 600)
+    preflight.check_all(bot, ['@shop'])
+    assert bot.checks == 1
+
+
+def test_failed_check_expires_early():
+    preflight = tpp.ChannelPreflight(ttl=3600, failed_ttl=60)
+    bot = FakeBot('left')
+    assert not preflight.check_all(bot, ['@shop'])['@shop']['ok']
+    preflight.check_all(bot, ['@shop'])
+    assert bot.checks == 1
+    bot.status = 'administrator'
+    age(preflight, 61)
+    assert preflight.check_all(bot, ['@shop'])['@shop']['ok']
+    assert bot.checks == 2
@@ -0,0 +1,142 @@
+import pytest
+
+import telegram_product_poster as tpp
+
+
+class FakeChannel:
+    """Answers editMessageReplyMarkup like Telegram for a channel's message ids"""
+
+    def __init__(self, ours=(), others=()):
+        self.ours = set(ours)
+        self.others = set(others)
+        self.probed = []
+
+    def call(self, method, data=None, files=None, timeout=None):
+        assert method == 'editMessageReplyMarkup'
+        message_id = data['message_id']
+        self.probed.append(message_id)
+        if message_id in self.ours:
+            raise tpp.TelegramAPIError("Bad Request: message is not modified", error_code=400)
+        if message_id in self.others:
+            raise tpp.TelegramAPIError("Bad Request: message can't be edited", error_code=400)
+        raise tpp.TelegramAPIError("Bad Request: message to edit not found", error_code=400)
+
+
+def begin(poster, key, after_id, method='sendMessage', expected=1, part=0):
+    return poster.ledger.begin_send(key, '@shop', part, method, expected, after_id)
+
+
+def test_found_in_window(poster):
+    poster.channel_message_ids['@shop'] = {10}
+    intent = begin(poster, 'p1', 10)
+    client = FakeChannel(ours={10, 12}, others={11})
+    assert poster.reconcile_send(client, '@shop', intent) == {'message_id': 12}
+    assert 12 in poster.channel_message_ids['@shop']
+    assert 10 not in client.probed
+
+
+def test_copy_messages_found_in_a_row(poster):
+    intent = begin(poster, 'p1', 10, method='copyMessages', expected=3)
+    client = FakeChannel(ours={11, 12, 13})
+    assert poster.reconcile_send(client, '@shop', intent) == [{'message_id': i} for i in (11, 12, 13)]
+
+
+def test_not_found(poster):
+    intent = begin(poster, 'p1', 10)
+    client = FakeChannel(others={11, 12})
+    assert poster.reconcile_send(client, '@shop', intent) is False
+    assert client.probed == list(range(11, 12 + tpp.RECONCILE_PROBES))
+
+
+def test_more_messages_than_expected_is_ambiguous(poster):
+    intent = begin(poster, 'p1', 10)
+    client = FakeChannel(ours={11, 14})
+    assert poster.reconcile_send(client, '@shop', intent) is None
+    assert 11 not in poster.channel_message_ids.get('@shop', set())
+
+
+def test_gap_in_copied_messages_is_ambiguous(poster):
+    intent = begin(poster, 'p1', 10, method='copyMessages', expected=2)
+    client = FakeChannel(ours={11, 13})
+    assert poster.reconcile_send(client, '@shop', intent) is None
+
+
+def test_window_shared_with_another_open_intent_is_ambiguous(poster):
+    # p2 timed out too, after p1: the message found may be p2's
+    intent = begin(poster, 'p1', 10)
+    begin(poster, 'p2', 10)
+    client = FakeChannel(ours={11})
+    assert poster.reconcile_send(client, '@shop', intent) is None
+
+
+def test_known_messages_are_not_matched(poster):
+    poster.channel_message_ids['@shop'] = {11}
+    intent = begin(poster, 'p1', 10)
+    client = FakeChannel(ours={11})
+    assert poster.reconcile_send(client, '@shop', intent) is False
+
+
+def test_no_known_messages_cannot_be_told(poster):
+    intent = begin(poster, 'p1', None)
+    client = FakeChannel(ours={1})
+    assert poster.reconcile_send(client, '@shop', intent) is None
+    assert client.probed == []
+
+
+def test_transient_probe_error_cannot_be_told(poster):
+    intent = begin(poster, 'p1', 10)
+
+    class Down(FakeChannel):
+        def call(self, method, data=None, files=None, timeout=None):
+            raise tpp.TelegramAPIError("Bad Gateway", error_code=502)
+
+    assert poster.reconcile_send(Down(), '@shop', intent) is None
+
+
+class TimeoutBot(FakeChannel):
+    """Times out on every send; probes find no message"""
+
+    def __init__(self):
+        super().__init__()
+        self.sends = 0
+
+    def call(self, method, data=None, files=None, timeout=None):
+        if method == 'sendMessage':
+            self.sends += 1
+            raise tpp.TelegramAPIError("ReadTimeout", unknown=True)
+        return super().call(method, data)
+
+
+def test_unconfirmed_send_is_given_up_after_bounded_checks(poster):
+    # A window that stays ambiguous: two unknown bot messages where one post should be
+    poster.channel_message_ids['@shop'] = {10}
+    poster.ledger.begin_send('p1', '@shop', 0, 'sendMessage', 1, 10)
+    client = FakeChannel(ours={11, 12})
+    sent = []
+
+    def call(method, data=None, files=None, timeout=None):
+        if method == 'sendMessage':
+            sent.append(data['text'])
+            return {'message_id': 13}
+        return FakeChannel.call(client, method, data)
+
+    client.call = call
+    for _ in range(tpp.RECONCILE_MAX_CHECKS - 1):
+        with pytest.raises(tpp.TelegramAPIError) as error:
+            poster.send_once(client, 'sendMessage', {'chat_id': '@shop', 'text': 'hi'}, '@shop', 'p1', 0)
+        assert error.value.unknown
+    assert poster.ledger.open_intent('p1', '@shop', 0)['checks'] == tpp.RECONCILE_MAX_CHECKS - 1
+    result = poster.send_once(client, 'sendMessage', {'chat_id': '@shop', 'text': 'hi'}, '@shop', 'p1', 0)
+    assert result == {'message_id': 13} and sent == ['hi']
+    assert poster.ledger.open_intent('p1', '@shop', 0) is None
+
+
+def test_no_intents_with_a_job_store(poster):
+    poster.job_store_var.value = 'jobs.db'
+    poster.posting_active = False
+    bot = TimeoutBot()
+    poster.bot_client = lambda: bot
+    assert poster.deliver_to_channel('@shop', [('sendMessage', {'text': 'hi'})], 'p1') is None
+    assert poster.ledger.open_intents('@shop') == []
+    assert poster.channel_failures['@shop'].startswith('failed')
+    assert bot.probed == []
@@ -0,0 +1,99 @@
+import telegram_product_poster as tpp
+
+
+def test_telegram_length_counts_utf16_units():
+    assert tpp.telegram_length("abc") == 3
+    assert tpp.telegram_length("é") == 1
+    assert tpp.telegram_length("🔥") == 2
+
+
+def test_split_prefers_lines_then_words():
+    text = "first line\nsecond line here\nthird"
+    assert tpp.split_telegram_text(text, 20) == ["first line", "second line here", "third"]
+    assert tpp.split_telegram_text("aaa bbb ccc ddd", 8) == ["aaa bbb", "ccc ddd"]
+    assert tpp.split_telegram_text("short", 100) == ["short"]
+
+
+def test_split_cuts_long_words_and_respects_utf16_limit():
+    assert tpp.split_telegram_text("x" * 25, 10) == ["x" * 10, "x" * 10, "x" * 5]
+    chunks = tpp.split_telegram_text("🔥" * 7, 5)
+    assert chunks == ["🔥" * 2] * 3 + ["🔥"]
+    assert all(tpp.telegram_length(chunk) <= 5 for chunk in chunks)
+
+
+def test_plan_text_and_photo():
+    assert tpp.plan_telegram_post("Hello") == ([('sendMessage', {'text': "Hello"})], [])
+    parts, problems = tpp.plan_telegram_post("Hello", photo="https://x/y.jpg")
+    assert parts == [('sendPhoto', {'photo': "https://x/y.jpg", 'caption': "Hello"})] and problems == []
+
+
+def test_plan_reports_errors():
+    _, problems = tpp.plan_telegram_post("  ")
+    assert ('error', "message is empty") in problems
+    _, problems = tpp.plan_telegram_post("Price [Missing: price]")
+    assert problems == [('error', "template placeholder {price} has no matching column")]
+    _, problems = tpp.plan_telegram_post("x" * (tpp.TELEGRAM_TEXT_LIMIT + 1))
+    assert [severity for severity, _ in problems] == ['error']
+    _, problems = tpp.plan_telegram_post("x" * (tpp.TELEGRAM_CAPTION_LIMIT + 1), photo="p.jpg")
+    assert [severity for severity, _ in problems] == ['error']
+
+
+def test_plan_auto_split():
+    message = "\n".join(f"line {i} " + "x" * 90 for i in range(60))
+    parts, problems = tpp.plan_telegram_post(message, auto_split=True)
+    assert [method for method, _ in parts] == ['sendMessage'] * 2
+    assert "\n".join(data['text'] for _, data in parts) == message
+    assert [severity for severity, _ in problems] == ['warning']
+
+    parts, problems = tpp.plan_telegram_post(message, photo="p.jpg", auto_split=True)
+    assert parts[0][0] == 'sendPhoto'
+    assert tpp.telegram_length(parts[0][1]['caption']) <= tpp.TELEGRAM_CAPTION_LIMIT
+    assert [method for method, _ in parts[1:]] == ['sendMessage'] * 2
+    assert "\n".join([parts[0][1]['caption']] + [data['text'] for _, data in parts[1:]]) == message
+
+
+class FakeBot:
+    """Posts every call except sendMessage calls with a failing text"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self.next_id = 100
+
+    def call(self, method, data=None, files=None, timeout=None):
+        self.calls.append((method, data.get('text', data.get('message_ids'))))
+        if method == 'sendMessage' and data['text'] == self.fail_on:
+            raise tpp.TelegramAPIError("Bad Request: can't parse entities", error_code=400)
+        self.next_id += 1
+        return {'message_id': self.next_id}
+
+
+def test_failed_multipart_post_resumes_from_the_missing_part(poster):
+    calls = [('sendMessage', {'text': text}) for text in ("one", "two", "three")]
+    bot = FakeBot(fail_on="two")
+    poster.bot_client = lambda: bot
+    assert poster.deliver_to_channel('@shop', calls, 'p1') is None
+    assert bot.calls == [('sendMessage', "one"), ('sendMessage', "two")]
+
+    bot.fail_on, bot.calls = None, []
+    assert poster.deliver_to_channel('@shop', calls, 'p1') == [{'message_id': i} for i in (101, 102, 103)]
+    assert bot.calls == [('sendMessage', "two"), ('sendMessage', "three")]
+    assert poster.ledger.sent_parts('p1', '@shop', tpp.post_content_hash(calls)) == {}
+
+
+def test_changed_post_is_not_resumed(poster):
+    bot = FakeBot(fail_on="two")
+    poster.bot_client = lambda: bot
+    poster.deliver_to_channel('@shop', [('sendMessage', {'text': text}) for text in ("one", "two")], 'p1')
+    bot.calls = []
+    poster.deliver_to_channel('@shop', [('sendMessage', {'text': text}) for text in ("uno", "dos")], 'p1')
+    assert bot.calls == [('sendMessage', "uno"), ('sendMessage', "dos")]
+
+
+def test_failed_post_without_key_deletes_its_parts(poster):
+    bot = FakeBot(fail_on="two")
+    poster.bot_client = lambda: bot
+    calls = [('sendMessage', {'text': text}) for text in ("one", "two")]
+    assert poster.deliver_to_channel('@shop', calls) is None
+    assert bot.calls[-1] == ('deleteMessages', '[101]')
+    assert poster.channel_failures['@shop'].startswith("failed")
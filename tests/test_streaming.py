@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+
+from conftest import Var
+
+
+def test_attempted_rows_are_skipped_by_key_or_position(poster):
+    poster.id_column_var = Var('id')
+    poster.products_df = pd.DataFrame({'id': ['p0', None, 'p2', '', 'p4'], 'name': list('abcde')})
+    poster.eligible_positions = lambda: np.arange(5)
+    assert poster.next_stream_positions(set()).tolist() == [0, 1, 2, 3, 4]
+    # p2 by key; the rows without an id by position
+    assert poster.next_stream_positions({'p2', 1, 3}).tolist() == [0, 4]
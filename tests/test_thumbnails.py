@@ -0,0 +1,34 @@
+import os
+import time
+
+import telegram_product_poster as tpp
+
+
+def write(path, age):
+    with open(path, 'wb') as f:
+        f.write(b'x')
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_keeps_the_most_recently_used_files(tmp_path):
+    cache = tpp.ThumbnailCache(None, directory=str(tmp_path), max_files=2)
+    for name, age in [('old', 300), ('newest', 0), ('middle', 100), ('oldest', 400)]:
+        write(tmp_path / f'{name}.thumb', age)
+    write(tmp_path / 'crashed.thumb.1.tmp', 2 * 60 * 60)
+    write(tmp_path / 'writing.thumb.2.tmp', 0)
+    cache.prune()
+    assert sorted(os.listdir(tmp_path)) == ['middle.thumb', 'newest.thumb', 'writing.thumb.2.tmp']
+
+
+def test_reading_a_file_marks_it_used(tmp_path):
+    cache = tpp.ThumbnailCache(None, directory=str(tmp_path), max_files=1)
+    write(cache.path('a'), 300)
+    write(cache.path('b'), 10)
+    assert cache.load_file('a') == b'x'
+    cache.prune()
+    assert os.listdir(tmp_path) == [os.path.basename(cache.path('a'))]
+
+
+def test_prune_without_a_cache_directory(tmp_path):
+    tpp.ThumbnailCache(None, directory=str(tmp_path / 'missing')).prune()
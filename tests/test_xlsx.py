@@ -0,0 +1,99 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+import telegram_product_poster as tpp
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Products" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>"""
+
+SHARED_STRINGS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="6" uniqueCount="6">
+<si><t>SKU</t></si><si><t>Name</t></si><si><t>Price</t></si><si><t>In Stock</t></si>
+<si><t>Notes</t></si><si><r><t>Red </t></r><r><t>shoe</t></r></si>
+</sst>"""
+
+# Shared and inline strings, skipped and missing cells, ints, floats, booleans
+# and a trailing all-empty row
+SHEET = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c>
+<c r="D1" t="s"><v>3</v></c><c r="E1" t="s"><v>4</v></c></row>
+<row r="2"><c r="A2"><v>1001</v></c><c r="B2" t="s"><v>5</v></c><c r="C2"><v>19.99</v></c>
+<c r="D2" t="b"><v>1</v></c></row>
+<row r="3"><c r="A3"><v>1002</v></c><c r="B3" t="inlineStr"><is><t>Blue hat</t></is></c>
+<c r="C3"><v>25</v></c><c r="E3" t="inlineStr"><is><t>new</t></is></c></row>
+<row r="4"><c r="A4" t="inlineStr"><is><t>A-3</t></is></c></row>
+<row r="6"><c r="B6" t="inlineStr"><is><t>Scarf</t></is></c><c r="C6"><v>7.5</v></c>
+<c r="D6" t="b"><v>0</v></c><c r="F6"><v>3</v></c></row>
+<row r="7"><c r="A7"/><c r="B7" t="inlineStr"><is><t></t></is></c></row>
+</sheetData></worksheet>"""
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / 'catalog.xlsx')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr('xl/workbook.xml', WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        archive.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+        archive.writestr('xl/worksheets/sheet1.xml', SHEET)
+    return path
+
+
+@pytest.mark.parametrize('sheet', [0, 'Products'])
+def test_matches_read_excel(workbook, sheet):
+    df = tpp.read_xlsx_sheet(workbook, sheet, lambda rows: None)
+    pd.testing.assert_frame_equal(df, pd.read_excel(workbook, sheet_name=sheet, header=0))
+    assert df['Name'].tolist()[:2] == ['Red shoe', 'Blue hat']
+    assert df['SKU'].tolist()[:2] == [1001, 1002]
+
+
+def test_catalog_sheet_is_the_same_streamed_or_not(workbook):
+    pd.testing.assert_frame_equal(tpp.read_catalog_sheet(workbook, progress=lambda rows: None),
+                                  tpp.read_catalog_sheet(workbook))
+
+
+def test_progress_and_cancel(workbook, monkeypatch):
+    monkeypatch.setattr(tpp, 'LOAD_PROGRESS_ROWS', 2)
+    seen = []
+    tpp.read_xlsx_sheet(workbook, 0, seen.append)
+    assert seen == [2, 4, 6, 5]
+
+    def cancel(rows):
+        raise tpp.CatalogLoadCancelled()
+
+    with pytest.raises(tpp.CatalogLoadCancelled):
+        tpp.read_xlsx_sheet(workbook, 0, cancel)
+
+
+def test_empty_sheet(tmp_path):
+    path = str(tmp_path / 'empty.xlsx')
+    pd.DataFrame().to_excel(path, index=False)
+    assert tpp.read_xlsx_sheet(path, 0, lambda rows: None).empty